@@ -0,0 +1,91 @@
+"""
+Per-user authorization snapshot used by permission checks
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from apps.common.constants import UserRole
+
+
+class AuthzSnapshot:
+    """
+    Authorization facts of a user for the current request: role, primary
+    department, the departments managed as dean and the deadline override
+    flag. Membership checks are set lookups and never query the database.
+    """
+
+    __slots__ = (
+        'user_id', 'role', 'department_id', 'dean_department_ids',
+        'can_override_deadlines', 'is_superuser', 'is_staff'
+    )
+
+    def __init__(self, user_id, role, department_id, dean_department_ids,
+                 can_override_deadlines=False, is_superuser=False, is_staff=False):
+        self.user_id = user_id
+        self.role = role
+        self.department_id = department_id
+        self.dean_department_ids = frozenset(dean_department_ids)
+        self.can_override_deadlines = can_override_deadlines
+        self.is_superuser = is_superuser
+        self.is_staff = is_staff
+
+    @property
+    def is_admin(self):
+        return self.role == UserRole.ADMIN or self.is_superuser
+
+    def has_role(self, *roles):
+        return self.role in roles
+
+    def managed_department_ids(self):
+        """Department ids managed by the user, or None for all departments (admins)"""
+        if self.is_admin:
+            return None
+        if self.role == UserRole.DEAN:
+            return self.dean_department_ids
+        if self.role == UserRole.HOD and self.department_id:
+            return frozenset([self.department_id])
+        return frozenset()
+
+    def manages_department(self, department_id):
+        """HoD of the department, dean managing it, or admin"""
+        managed = self.managed_department_ids()
+        return managed is None or department_id in managed
+
+    def can_view_department(self, department_id):
+        if self.role == UserRole.FACULTY:
+            return department_id == self.department_id
+        return self.manages_department(department_id)
+
+
+def authz_cache_key(user):
+    # created_at guards against primary keys reused after a rollback
+    created = user.created_at.timestamp() if user.created_at else 0
+    return f'authz:{user.pk}:{created}:{user.authz_version}'
+
+
+def get_authz(user):
+    """
+    Build the snapshot of a user. Role, department and flags come from the
+    user row itself; dean departments are cached per authz_version, which
+    changes whenever they do.
+    """
+    key = authz_cache_key(user)
+    dean_department_ids = cache.get(key)
+    if dean_department_ids is None:
+        dean_department_ids = frozenset(user.dean_departments.values_list('id', flat=True))
+        cache.set(key, dean_department_ids, settings.AUTHZ_CACHE_TIMEOUT)
+    return AuthzSnapshot(
+        user_id=user.pk,
+        role=user.role,
+        department_id=user.department_id,
+        dean_department_ids=dean_department_ids,
+        can_override_deadlines=user.can_override_deadlines,
+        is_superuser=user.is_superuser,
+        is_staff=user.is_staff
+    )
+
+
+def invalidate_authz(user_ids):
+    """Move users to a new authz_version so cached snapshots are not used"""
+    from apps.accounts.models import User
+    User.objects.filter(pk__in=user_ids).update(authz_version=F('authz_version') + 1)
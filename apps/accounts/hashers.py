@@ -0,0 +1,66 @@
+"""
+Password hashers whose cost is tuned per environment from settings
+
+The algorithm names are Django's, so hashes made by the stock hashers still
+verify. Django rehashes a password on login when it was made by another
+hasher than the first of PASSWORD_HASHERS or with other cost parameters, so
+changing PASSWORD_HASHER or a cost setting upgrades users as they log in.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher, make_password
+)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with PASSWORD_PBKDF2_ITERATIONS (0: Django's default)"""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """scrypt with PASSWORD_SCRYPT_WORK_FACTOR (0: Django's default)"""
+
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR or ScryptPasswordHasher.work_factor
+
+    @property
+    def maxmem(self):
+        # scrypt needs 128 * n * r bytes; OpenSSL refuses more than 32 MiB
+        # unless allowed. The headroom lets hashes made with a work factor
+        # twice the current one still verify after lowering it.
+        return max(64 * 1024 * 1024, 2 * 128 * self.work_factor * self.block_size * self.parallelism)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with PASSWORD_ARGON2_TIME_COST and PASSWORD_ARGON2_MEMORY_COST
+    (KiB; 0: Django's defaults). Needs argon2-cffi.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST or Argon2PasswordHasher.time_cost
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST or Argon2PasswordHasher.memory_cost
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Hash many passwords with the preferred hasher, in parallel. hashlib's
+    PBKDF2 and scrypt and argon2-cffi release the GIL while hashing, so
+    threads use every core without forking the web worker.
+    """
+    passwords = list(passwords)
+    workers = min(workers or settings.PASSWORD_HASH_WORKERS, len(passwords))
+    if workers <= 1:
+        return [make_password(password) for password in passwords]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(make_password, passwords))
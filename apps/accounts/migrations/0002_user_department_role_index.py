@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-19 09:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('departments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['department', 'role'], name='users_department_role_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-19 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_department_role_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='authz_version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped when dean departments change, invalidating the cached authorization snapshot'),
+        ),
+    ]
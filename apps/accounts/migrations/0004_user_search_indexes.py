@@ -0,0 +1,52 @@
+# Generated by Django 5.0 on 2026-10-19 10:44
+
+from django.db import migrations, models
+
+# Expression indexes matching the UPPER(column::text) LIKE UPPER(...) SQL of
+# icontains / istartswith lookups, so UserSearchService filters use them
+TRIGRAM_INDEXES = {
+    'users_full_name_trgm_idx': 'full_name',
+    'users_email_trgm_idx': 'email',
+    'users_employee_id_trgm_idx': 'employee_id',
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            # Server without the contrib modules: search still works, with
+            # sequential scans. After installing them, migrate accounts back
+            # to 0003 and forward again to create the indexes.
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, column in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON users USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_authz_version'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('departments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['full_name', 'id'], name='users_full_name_id_idx'),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
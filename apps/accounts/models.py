@@ -5,6 +5,7 @@ User model and related models for authentication and authorization
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.core.validators import EmailValidator
+from django.utils.functional import cached_property
 from apps.common.constants import UserRole
 from apps.common.models import TimeStampedModel
 
@@ -13,14 +14,20 @@ class UserManager(BaseUserManager):
     """
     Custom user manager for email-based authentication
     """
-    def create_user(self, email, password=None, **extra_fields):
-        """Create and return a regular user"""
+    def create_user(self, email, password=None, encoded_password=None, **extra_fields):
+        """
+        Create and return a regular user. encoded_password is an already
+        hashed password (see apps.accounts.hashers.hash_passwords).
+        """
         if not email:
             raise ValueError('Users must have an email address')
         
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
-        user.set_password(password)
+        if encoded_password is not None:
+            user.password = encoded_password
+        else:
+            user.set_password(password)
         user.save(using=self._db)
         return user
     
@@ -110,6 +117,10 @@ class User(AbstractBaseUser, PermissionsMixin, TimeStampedModel):
         default=False,
         help_text="Can submit/approve after deadlines"
     )
+    authz_version = models.PositiveIntegerField(
+        default=0,
+        help_text="Bumped when dean departments change, invalidating the cached authorization snapshot"
+    )
     
     objects = UserManager()
     
@@ -123,7 +134,11 @@ class User(AbstractBaseUser, PermissionsMixin, TimeStampedModel):
             models.Index(fields=['email']),
             models.Index(fields=['role']),
             models.Index(fields=['department']),
+            models.Index(fields=['department', 'role'], name='users_department_role_idx'),
             models.Index(fields=['is_active']),
+            # Keyset pagination of the user list; trigram search indexes
+            # are PostgreSQL only and created in migration 0004
+            models.Index(fields=['full_name', 'id'], name='users_full_name_id_idx'),
         ]
         verbose_name = 'User'
         verbose_name_plural = 'Users'
@@ -153,29 +168,30 @@ class User(AbstractBaseUser, PermissionsMixin, TimeStampedModel):
     def is_dean(self):
         return self.role == UserRole.DEAN
     
+    @cached_property
+    def authz(self):
+        """
+        Authorization snapshot (role, department, dean departments, override
+        flag), built once per instance, i.e. once per request for request.user
+        """
+        from apps.accounts.authz import get_authz
+        return get_authz(self)
+    
     def get_managed_departments(self):
         """
         Get departments managed by this user based on role
         """
-        if self.is_admin:
-            from apps.departments.models import Department
+        from apps.departments.models import Department
+        managed = self.authz.managed_department_ids()
+        if managed is None:
             return Department.objects.all()
-        elif self.is_dean:
-            return self.dean_departments.all()
-        elif self.is_hod and self.department:
-            return [self.department]
-        return []
+        if self.is_hod:
+            return [self.department] if self.department else []
+        return Department.objects.filter(pk__in=managed)
     
     def can_view_department(self, department):
         """
         Check if user can view data for a specific department
         """
-        if self.is_admin:
-            return True
-        elif self.is_dean:
-            return department in self.dean_departments.all()
-        elif self.is_hod:
-            return self.department == department
-        elif self.is_faculty:
-            return self.department == department
-        return False
+        department_id = getattr(department, 'pk', department)
+        return self.authz.can_view_department(department_id)
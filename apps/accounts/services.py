@@ -0,0 +1,180 @@
+"""
+Service layer for accounts - user search
+"""
+import base64
+import json
+import re
+import time
+from bisect import bisect_left
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from apps.accounts.models import User
+
+TOKEN_SEPARATORS = re.compile(r'[^\w]+')
+
+
+def search_tokens(value):
+    """Lowercased value and its words, e.g. an email and its local part and domain labels"""
+    if not value:
+        return set()
+    value = value.lower()
+    return {value, *filter(None, TOKEN_SEPARATORS.split(value))}
+
+
+class UserPrefixIndex:
+    """
+    In-memory prefix index over name words, email parts and employee ids:
+    sorted (token, user id) pairs, so a prefix lookup is two bisections.
+    Used where the database has no trigram indexes (SQLite).
+    """
+
+    def __init__(self, rows):
+        entries = sorted({
+            (token, pk)
+            for pk, *values in rows
+            for value in values
+            for token in search_tokens(value)
+        })
+        self.tokens = [token for token, _ in entries]
+        self.ids = [pk for _, pk in entries]
+
+    @classmethod
+    def build(cls, using=None):
+        rows = User.objects.using(using).values_list(
+            'pk', 'full_name', 'email', 'employee_id'
+        ).order_by().iterator(chunk_size=2000)
+        return cls(rows)
+
+    def lookup(self, prefix):
+        """Ids of users with a token starting with prefix"""
+        start = bisect_left(self.tokens, prefix)
+        end = bisect_left(self.tokens, prefix + '\U0010ffff', start)
+        return set(self.ids[start:end])
+
+    def search(self, query):
+        """Ids of users matching the whole query as a prefix, or every word of it"""
+        query = query.lower().strip()
+        words = [word for word in TOKEN_SEPARATORS.split(query) if word]
+        ids = self.lookup(query)
+        if words:
+            matches = [self.lookup(word) for word in words]
+            ids |= set.intersection(*matches)
+        return ids
+
+
+class UserSearchService:
+    """
+    Ranked user search with keyset pagination.
+
+    On PostgreSQL the substring filters run in SQL, served by pg_trgm GIN
+    indexes (accounts migration 0004); elsewhere candidates come from a
+    per-process UserPrefixIndex, which matches word prefixes only. Results are ordered
+    by (rank desc, full_name, id) and the cursor of the last user on a page
+    is passed back as `after` to fetch the next one.
+    """
+
+    RANK_EXACT = 3
+    RANK_PREFIX = 2
+    RANK_CONTAINS = 1
+
+    DEFAULT_PAGE_SIZE = 50
+    # Rebuild the prefix index at least this often, to pick up bulk writes
+    # that bypass the signals which invalidate it
+    PREFIX_INDEX_MAX_AGE = 300
+
+    _prefix_index = None
+    _prefix_index_built_at = 0
+
+    @staticmethod
+    def searches_in_database(using='default'):
+        return connections[using].vendor == 'postgresql'
+
+    @staticmethod
+    def invalidate_prefix_index():
+        UserSearchService._prefix_index = None
+
+    @staticmethod
+    def get_prefix_index(using=None):
+        index = UserSearchService._prefix_index
+        age = time.monotonic() - UserSearchService._prefix_index_built_at
+        if index is None or age > UserSearchService.PREFIX_INDEX_MAX_AGE:
+            index = UserPrefixIndex.build(using)
+            UserSearchService._prefix_index = index
+            UserSearchService._prefix_index_built_at = time.monotonic()
+        return index
+
+    @staticmethod
+    def filter(queryset, query):
+        """Restrict a user queryset to users matching query"""
+        query = (query or '').strip()
+        if not query:
+            return queryset
+        if UserSearchService.searches_in_database(queryset.db):
+            return queryset.filter(
+                Q(full_name__icontains=query) |
+                Q(email__icontains=query) |
+                Q(employee_id__icontains=query)
+            )
+        return queryset.filter(pk__in=UserSearchService.get_prefix_index(queryset.db).search(query))
+
+    @staticmethod
+    def rank(query):
+        """Exact email/employee id matches first, then prefix matches of any field or name word"""
+        if not query:
+            return Value(0, output_field=IntegerField())
+        return Case(
+            When(
+                Q(email__iexact=query) | Q(employee_id__iexact=query) | Q(full_name__iexact=query),
+                then=Value(UserSearchService.RANK_EXACT)
+            ),
+            When(
+                Q(full_name__istartswith=query) | Q(full_name__icontains=f' {query}') |
+                Q(email__istartswith=query) | Q(employee_id__istartswith=query),
+                then=Value(UserSearchService.RANK_PREFIX)
+            ),
+            default=Value(UserSearchService.RANK_CONTAINS),
+            output_field=IntegerField()
+        )
+
+    @staticmethod
+    def encode_cursor(user):
+        data = json.dumps([user.search_rank, user.full_name, user.pk])
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Parse a cursor string, returning None when it is malformed"""
+        try:
+            rank, full_name, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return int(rank), str(full_name), int(pk)
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def search(queryset, query=None, after=None, limit=None):
+        """
+        One page of users of queryset matching query (all of them when empty).
+        Returns {'users': [...], 'next_cursor': str or None}; each user has a
+        search_rank attribute.
+        """
+        limit = limit or UserSearchService.DEFAULT_PAGE_SIZE
+        query = (query or '').strip()
+        users = UserSearchService.filter(queryset, query).annotate(
+            search_rank=UserSearchService.rank(query)
+        )
+        cursor = UserSearchService.decode_cursor(after) if after else None
+        if cursor is not None:
+            rank, full_name, pk = cursor
+            users = users.filter(
+                Q(search_rank__lt=rank) |
+                Q(search_rank=rank, full_name__gt=full_name) |
+                Q(search_rank=rank, full_name=full_name, pk__gt=pk)
+            )
+
+        users = list(users.order_by('-search_rank', 'full_name', 'pk')[:limit + 1])
+        has_more = len(users) > limit
+        users = users[:limit]
+        return {
+            'users': users,
+            'next_cursor': UserSearchService.encode_cursor(users[-1]) if has_more else None,
+        }
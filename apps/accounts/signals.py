@@ -1,11 +1,26 @@
-
 """
 Signals for the accounts app
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, pre_save, post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import Group
+from django.utils import timezone
+from apps.accounts.authz import invalidate_authz
 from apps.accounts.models import User
+from apps.accounts.services import UserSearchService
+from apps.common.constants import SubmissionStatus
+
+
+# Submissions whose department/role snapshot still follows the owner.
+# Reviewed submissions keep the attribution they were approved under.
+IN_FLIGHT_STATUSES = [
+    SubmissionStatus.DRAFT,
+    SubmissionStatus.SUBMITTED,
+    SubmissionStatus.NEEDS_REVISION,
+]
+
+# Fields a save must touch for the attribution to change
+ATTRIBUTION_FIELDS = {'department', 'department_id', 'role'}
 
 
 @receiver(post_save, sender=User)
@@ -23,3 +38,72 @@ def assign_user_to_group(sender, instance, created, **kwargs):
             instance.groups.add(group)
         except Group.DoesNotExist:
             pass
+
+
+@receiver(pre_save, sender=User)
+def remember_attribution(sender, instance, **kwargs):
+    """
+    Remember the stored department and role so post_save can detect a change
+    """
+    instance._previous_attribution = None
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not ATTRIBUTION_FIELDS & set(update_fields):
+        # e.g. update_last_login on every sign-in
+        return
+    if instance.pk and not kwargs.get('raw'):
+        instance._previous_attribution = User.objects.filter(pk=instance.pk).values_list(
+            'department_id', 'role'
+        ).first()
+
+
+@receiver(post_save, sender=User)
+def sync_submission_attribution(sender, instance, created, **kwargs):
+    """
+    Move the user's in-flight submissions along when their department or role changes
+    """
+    previous = getattr(instance, '_previous_attribution', None)
+    if created or previous is None:
+        return
+    if previous == (instance.department_id, instance.role):
+        return
+    
+    from apps.submissions.models import Submission
+    Submission.objects.filter(
+        user=instance,
+        status__in=IN_FLIGHT_STATUSES
+    ).update(
+        department_id=instance.department_id,
+        owner_role=instance.role,
+        updated_at=timezone.now()
+    )
+
+
+@receiver(m2m_changed, sender=User.dean_departments.through)
+def invalidate_dean_authz(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Give users whose dean departments changed a new authz_version, so their
+    cached authorization snapshot is rebuilt
+    """
+    if reverse and action == 'pre_clear':
+        # pk_set is not sent for clear(); remember the deans being removed
+        instance._cleared_dean_ids = list(instance.deans.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    
+    if reverse:
+        user_ids = pk_set if action != 'post_clear' else instance.__dict__.pop('_cleared_dean_ids', [])
+    else:
+        user_ids = [instance.pk]
+        # Keep the instance in step so a later save() does not write back the old version
+        instance.authz_version += 1
+        instance.__dict__.pop('authz', None)
+    if user_ids:
+        invalidate_authz(user_ids)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_search_index(sender, **kwargs):
+    """Rebuild the in-memory user search index (SQLite fallback) on next use"""
+    UserSearchService.invalidate_prefix_index()
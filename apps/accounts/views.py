@@ -6,9 +6,11 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
+from django.db.models import Count, Q
 from apps.accounts.models import User
 from apps.accounts.forms import LoginForm, UserCreateForm, UserUpdateForm, ProfileUpdateForm
+from apps.accounts.hashers import hash_passwords
+from apps.accounts.services import UserSearchService
 from apps.common.decorators import admin_required
 from apps.common.utils import log_activity
 from apps.common.constants import ActivityAction
@@ -87,15 +89,25 @@ def user_list(request):
         users = users.filter(department_id=department)
     if is_active:
         users = users.filter(is_active=(is_active == 'true'))
-    if search:
-        users = users.filter(
-            Q(full_name__icontains=search) |
-            Q(email__icontains=search) |
-            Q(employee_id__icontains=search)
-        )
+    
+    # Ranked, keyset-paginated search (trigram indexes on PostgreSQL)
+    page = UserSearchService.search(users, search, after=request.GET.get('after'))
+    counts = UserSearchService.filter(users, search).aggregate(
+        total=Count('id'), active=Count('id', filter=Q(is_active=True))
+    )
+    params = request.GET.copy()
+    params.pop('after', None)
+    first_page_url = f'?{params.urlencode()}' if request.GET.get('after') else None
+    next_page_url = None
+    if page['next_cursor']:
+        params['after'] = page['next_cursor']
+        next_page_url = f'?{params.urlencode()}'
     
     context = {
-        'users': users,
+        'users': page['users'],
+        'user_counts': counts,
+        'first_page_url': first_page_url,
+        'next_page_url': next_page_url,
         'role_filter': role,
         'department_filter': department,
         'is_active_filter': is_active,
@@ -187,12 +199,19 @@ def user_import_csv(request):
             created_count = 0
             error_count = 0
             
-            for row in reader:
+            rows = list(reader)
+            # Hash every password up front in parallel; hashing dominates
+            # the cost of creating a user
+            encoded_passwords = hash_passwords(
+                row.get('password') or 'rtc@123' for row in rows  # Default password
+            )
+            
+            for row, encoded_password in zip(rows, encoded_passwords):
                 try:
                     # Create user from CSV row
                     User.objects.create_user(
                         email=row['email'],
-                        password=row.get('password', 'rtc@123'),  # Default password
+                        encoded_password=encoded_password,
                         full_name=row['full_name'],
                         role=row['role'],
                         department_id=row.get('department_id'),
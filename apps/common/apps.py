@@ -6,3 +6,6 @@ class CommonConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.common'
     verbose_name = 'Common'
+    
+    def ready(self):
+        import apps.common.checks
@@ -0,0 +1,193 @@
+"""
+Buffered ActivityLog writer
+
+Entries recorded inside a transaction are held until it commits and then
+written with one bulk INSERT (entries from a rolled-back transaction or
+savepoint are dropped with it). Entries recorded outside a transaction are
+collected for the current request by AuditBufferMiddleware. Non-critical
+entries can instead be handed to a background thread when
+AUDIT_QUEUE_ENABLED is set.
+
+Every buffer is bounded: a full transaction or request buffer is written
+immediately, and a full queue makes the caller write its own entries
+(back-pressure instead of unbounded memory growth).
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, connections, router, transaction
+
+logger = logging.getLogger('apps.common.audit')
+
+
+class _PendingEntries:
+    """
+    on_commit callback holding the entries recorded in one savepoint scope.
+    Django discards the callback when that savepoint rolls back.
+    """
+
+    def __init__(self, writer, sids, critical):
+        self.writer = writer
+        self.sids = sids
+        self.critical = critical
+        self.entries = []
+
+    def __call__(self):
+        entries, self.entries = self.entries, []
+        self.writer.dispatch(entries, self.critical)
+
+
+class AuditWriter:
+    """
+    Collects ActivityLog instances and writes them in batches
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+
+    @property
+    def buffer_size(self):
+        return getattr(settings, 'AUDIT_BUFFER_SIZE', 500)
+
+    @property
+    def queue_enabled(self):
+        return getattr(settings, 'AUDIT_QUEUE_ENABLED', False)
+
+    # Recording
+
+    def record(self, entry, critical=True):
+        """Buffer an unsaved ActivityLog instance"""
+        from apps.common.models import ActivityLog
+
+        using = router.db_for_write(ActivityLog)
+        connection = transaction.get_connection(using)
+        if not connection.in_atomic_block:
+            if critical or not self.queue_enabled:
+                self._buffer_for_request(entry)
+            else:
+                self.enqueue([entry])
+            return
+
+        pending = self._pending_for(connection, using, critical)
+        pending.entries.append(entry)
+        if len(pending.entries) >= self.buffer_size:
+            # Still inside the transaction, so these roll back with it
+            self.write(pending.entries)
+            pending.entries = []
+
+    def _pending_for(self, connection, using, critical):
+        """Find or register the on_commit callback for the current savepoint scope"""
+        sids = tuple(connection.savepoint_ids)
+        for _, func, _ in connection.run_on_commit:
+            if isinstance(func, _PendingEntries) and func.writer is self \
+                    and func.sids == sids and func.critical == critical:
+                return func
+        pending = _PendingEntries(self, sids, critical)
+        transaction.on_commit(pending, using=using, robust=True)
+        return pending
+
+    def dispatch(self, entries, critical):
+        """Route committed entries to the queue or the database"""
+        if not entries:
+            return
+        if not critical and self.queue_enabled:
+            self.enqueue(entries)
+        else:
+            self.write(entries)
+
+    def write(self, entries):
+        from apps.common.models import ActivityLog
+
+        if entries:
+            ActivityLog.objects.bulk_create(entries, batch_size=self.buffer_size)
+
+    # Per-request buffering
+
+    @contextmanager
+    def request_scope(self):
+        """Collect entries recorded outside transactions until the scope exits"""
+        if getattr(self._local, 'request_buffer', None) is not None:
+            yield
+            return
+        self._local.request_buffer = []
+        try:
+            yield
+        finally:
+            entries, self._local.request_buffer = self._local.request_buffer, None
+            try:
+                self.write(entries)
+            except Exception:
+                logger.exception('Failed to write %d buffered activity log entries', len(entries))
+
+    def _buffer_for_request(self, entry):
+        buffer = getattr(self._local, 'request_buffer', None)
+        if buffer is None:
+            self.write([entry])
+            return
+        buffer.append(entry)
+        if len(buffer) >= self.buffer_size:
+            self.write(buffer)
+            buffer.clear()
+
+    # Background queue
+
+    def enqueue(self, entries):
+        """Hand entries to the background writer, or write them here if the queue is full"""
+        work_queue = self._ensure_worker()
+        timeout = getattr(settings, 'AUDIT_QUEUE_TIMEOUT', 0.05)
+        for n, entry in enumerate(entries):
+            try:
+                work_queue.put(entry, timeout=timeout)
+            except queue.Full:
+                logger.warning('Activity log queue full; writing %d entries synchronously', len(entries) - n)
+                self.write(entries[n:])
+                return
+
+    def _ensure_worker(self):
+        with self._lock:
+            # A forked worker process inherits the queue but not the thread
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=getattr(settings, 'AUDIT_QUEUE_SIZE', 10000))
+                self._thread = threading.Thread(target=self._run, args=(self._queue,), name='audit-writer', daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+            return self._queue
+
+    def _run(self, work_queue):
+        interval = getattr(settings, 'AUDIT_FLUSH_INTERVAL', 1.0)
+        while True:
+            batch = [work_queue.get()]
+            while len(batch) < self.buffer_size:
+                try:
+                    batch.append(work_queue.get(timeout=interval))
+                except queue.Empty:
+                    break
+            try:
+                close_old_connections()
+                self.write(batch)
+            except Exception:
+                logger.exception('Background writer dropped %d activity log entries', len(batch))
+            finally:
+                if work_queue.empty():
+                    # Do not hold a database connection while idle
+                    connections.close_all()
+                for _ in batch:
+                    work_queue.task_done()
+
+    def drain(self):
+        """Block until the background queue has been written"""
+        if self._queue is not None and self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+
+audit_writer = AuditWriter()
+atexit.register(audit_writer.drain)
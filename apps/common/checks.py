@@ -0,0 +1,26 @@
+"""
+System checks for deployment settings
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+CACHE_SESSION_ENGINES = {
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+}
+
+
+@register()
+def check_session_cache(app_configs, **kwargs):
+    """Cache-backed sessions need a cache that every worker shares"""
+    if settings.SESSION_ENGINE not in CACHE_SESSION_ENGINES:
+        return []
+    alias = getattr(settings, 'SESSION_CACHE_ALIAS', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    if backend.endswith('LocMemCache'):
+        return [Warning(
+            'Cache-backed sessions are stored in a per-process local memory cache.',
+            hint='Other workers will not see logins or logouts; set CACHE_BACKEND to redis or memcached.',
+            id='common.W001',
+        )]
+    return []
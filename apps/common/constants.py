@@ -107,6 +107,36 @@ class ActivityAction:
     ]
 
 
+# Attachment preview generation
+class PreviewStatus:
+    PENDING = 'PENDING'
+    PROCESSING = 'PROCESSING'
+    READY = 'READY'
+    UNSUPPORTED = 'UNSUPPORTED'
+    FAILED = 'FAILED'
+    
+    CHOICES = [
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (READY, 'Ready'),
+        (UNSUPPORTED, 'Unsupported'),
+        (FAILED, 'Failed'),
+    ]
+
+
+# Duplicate evidence fingerprints
+class FingerprintKind:
+    URL = 'url'
+    TITLE = 'title'
+    FILE = 'file'
+    
+    CHOICES = [
+        (URL, 'Same link'),
+        (TITLE, 'Similar title'),
+        (FILE, 'Same file'),
+    ]
+
+
 # Aggregation Types for HOD Mapping
 class AggregationType:
     AVERAGE = 'AVERAGE'
@@ -0,0 +1,58 @@
+"""
+Database connection settings and server-side connection statistics
+"""
+from django.conf import settings
+from django.db import connections
+
+
+def connection_stats(alias='default'):
+    """
+    Connection configuration of this process and, on PostgreSQL, the
+    server's connections to the same database grouped by application and
+    state. Includes pool counters when a connection pool is configured.
+    """
+    connection = connections[alias]
+    config = connection.settings_dict
+    stats = {
+        'alias': alias,
+        'vendor': connection.vendor,
+        'process_role': getattr(settings, 'DB_PROCESS_ROLE', None),
+        'conn_max_age': config.get('CONN_MAX_AGE'),
+        'conn_health_checks': config.get('CONN_HEALTH_CHECKS'),
+        'pool': None,
+        'server': None,
+    }
+
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        stats['pool'] = {'config': config['OPTIONS']['pool'], **pool.get_stats()}
+
+    if connection.vendor != 'postgresql':
+        return stats
+
+    with connection.cursor() as cursor:
+        cursor.execute('SHOW statement_timeout')
+        statement_timeout = cursor.fetchone()[0]
+        cursor.execute("SELECT setting::int FROM pg_settings WHERE name = 'max_connections'")
+        max_connections = cursor.fetchone()[0]
+        cursor.execute(
+            """
+            SELECT application_name, COALESCE(state, 'unknown'), COUNT(*)
+            FROM pg_stat_activity
+            WHERE datname = current_database() AND backend_type = 'client backend'
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+            """
+        )
+        rows = cursor.fetchall()
+
+    applications = {}
+    for application, state, count in rows:
+        applications.setdefault(application or '(none)', {})[state] = count
+    stats['statement_timeout'] = statement_timeout
+    stats['server'] = {
+        'max_connections': max_connections,
+        'total': sum(count for _, _, count in rows),
+        'applications': applications,
+    }
+    return stats
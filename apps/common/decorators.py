@@ -17,7 +17,7 @@ def role_required(*roles):
         @wraps(view_func)
         @login_required
         def wrapper(request, *args, **kwargs):
-            if request.user.role in roles:
+            if request.user.authz.has_role(*roles):
                 return view_func(request, *args, **kwargs)
             else:
                 messages.error(request, 'You do not have permission to access this page.')
@@ -0,0 +1,126 @@
+"""
+File download responses: web-server offload, HTTP Range and conditional GET
+"""
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_etags, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range Range header into inclusive (start, end) bounds.
+    Returns None for a missing, malformed or multi-range header (the full
+    file is served instead) and raises ValueError if it is unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def read_range(file, start, end):
+    """Yield bytes start..end (inclusive) of an open file"""
+    try:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def sendfile_response(field_file, content_type):
+    """
+    Empty response telling the web server to send the file itself, or None
+    when SENDFILE_BACKEND is not configured. The server then handles Range
+    and conditional requests without holding a Django worker.
+    """
+    backend = getattr(settings, 'SENDFILE_BACKEND', '')
+    if not backend:
+        return None
+    response = HttpResponse(content_type=content_type)
+    if backend == 'nginx':
+        response['X-Accel-Redirect'] = quote(f"{settings.SENDFILE_URL.rstrip('/')}/{field_file.name}")
+    elif backend == 'xsendfile':
+        response['X-Sendfile'] = field_file.path
+    else:
+        raise ValueError(f"Unknown SENDFILE_BACKEND {backend!r}")
+    return response
+
+
+def serve_file(request, field_file, filename, content_type, size, etag=None, last_modified=None,
+               as_attachment=True):
+    """
+    Download response for a stored file.
+
+    Answers If-None-Match/If-Modified-Since with 304, then either offloads
+    to the web server (X-Accel-Redirect/X-Sendfile) or streams the file
+    with FileResponse, honouring a single-range Range header (206/416)
+    and If-Range. as_attachment=False lets the browser display it inline.
+    """
+    etag = quote_etag(etag) if etag else None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = sendfile_response(field_file, content_type)
+    if response is None:
+        response = _stream_file(request, field_file, content_type, size, etag)
+
+    if response.status_code in (200, 206):
+        response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    if etag:
+        response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    response['Cache-Control'] = 'private, no-cache'
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+
+def _stream_file(request, field_file, content_type, size, etag):
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    # A stale If-Range validator means the client must get the whole file
+    if not if_range or (etag and etag in parse_etags(if_range)):
+        try:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    file = field_file.storage.open(field_file.name, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+        response.block_size = CHUNK_SIZE
+        response['Content-Length'] = size
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(read_range(file, start, end), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    return response
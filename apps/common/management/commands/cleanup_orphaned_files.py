@@ -0,0 +1,131 @@
+"""
+Delete files under MEDIA_ROOT that no database row references
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+from django.template.defaultfilters import filesizeformat
+
+
+def file_fields():
+    """(model, field name) of every FileField of every installed model"""
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, models.FileField) and field.concrete
+    ]
+
+
+def referenced_names():
+    """Storage names held by every FileField"""
+    names = set()
+    for model, field_name in file_fields():
+        names.update(
+            model._base_manager.exclude(**{field_name: ''})
+            .values_list(field_name, flat=True)
+            .iterator(chunk_size=2000)
+        )
+    return names
+
+
+def still_referenced(names, batch_size=500):
+    """The subset of names referenced now, e.g. by a blob re-uploaded during the scan"""
+    names = list(names)
+    found = set()
+    for model, field_name in file_fields():
+        for start in range(0, len(names), batch_size):
+            found.update(
+                model._base_manager.filter(**{f'{field_name}__in': names[start:start + batch_size]})
+                .values_list(field_name, flat=True)
+            )
+    return found
+
+
+def scan_files(root, path=''):
+    """Yield (storage name, DirEntry) for every regular file below root/path"""
+    with os.scandir(os.path.join(root, path)) as entries:
+        for entry in entries:
+            name = f'{path}/{entry.name}' if path else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_files(root, name)
+            elif entry.is_file(follow_symlinks=False):
+                yield name, entry
+
+
+def remove_file(path):
+    """Delete a file, returning False if it was already gone"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+class Command(BaseCommand):
+    help = ('Delete files under MEDIA_ROOT that no FileField references, such as files left behind '
+            'by queryset deletes, cascades and interrupted uploads')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=float, default=24,
+            help='Only delete files not modified for this many hours (default: 24)'
+        )
+        parser.add_argument(
+            '--path', default='',
+            help='Only scan this directory, relative to MEDIA_ROOT (default: all of MEDIA_ROOT)'
+        )
+        parser.add_argument('--workers', type=int, default=4, help='Parallel delete threads (default: 4)')
+        parser.add_argument('--dry-run', action='store_true', help='Report orphaned files without deleting them')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        if options['min_age'] < 0:
+            raise CommandError('--min-age cannot be negative')
+        root = os.path.abspath(settings.MEDIA_ROOT)
+        path = options['path'].strip('/')
+        if not os.path.isdir(os.path.join(root, path)):
+            self.stdout.write(f'Nothing to scan: {os.path.join(root, path)} does not exist.')
+            return
+
+        # Load references before scanning: a file saved after this point is
+        # younger than the age threshold and is left alone
+        referenced = referenced_names()
+        cutoff = time.time() - options['min_age'] * 3600
+
+        orphans = []
+        scanned = recent = 0
+        for name, entry in scan_files(root, path):
+            scanned += 1
+            if name in referenced:
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                recent += 1
+                continue
+            orphans.append((name, entry.path, stat.st_size))
+
+        revived = still_referenced(name for name, _, _ in orphans)
+        orphans = [(path, size) for name, path, size in orphans if name not in revived]
+        total = sum(size for _, size in orphans)
+        self.stdout.write(
+            f'Scanned {scanned} file(s) against {len(referenced)} reference(s); '
+            f'{len(orphans)} orphaned ({filesizeformat(total)}), {recent} unreferenced but too recent.'
+        )
+        if options['dry_run']:
+            for orphan_path, size in orphans:
+                self.stdout.write(f'  {os.path.relpath(orphan_path, root)} ({filesizeformat(size)})')
+            return
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            removed = list(pool.map(remove_file, [orphan_path for orphan_path, _ in orphans]))
+        reclaimed = sum(size for (_, size), done in zip(orphans, removed) if done)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {sum(removed)} file(s), reclaimed {filesizeformat(reclaimed)}.'
+        ))
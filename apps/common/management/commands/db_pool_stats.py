@@ -0,0 +1,41 @@
+"""
+Show database connection settings and server connection counts
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.common.db import connection_stats
+
+
+class Command(BaseCommand):
+    help = 'Show connection settings of this process, pool counters and server connections by application'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias (default: default)')
+        parser.add_argument('--json', action='store_true', help='Print the statistics as JSON')
+
+    def handle(self, *args, **options):
+        stats = connection_stats(options['database'])
+        if options['json']:
+            self.stdout.write(json.dumps(stats, indent=2, default=str))
+            return
+
+        self.stdout.write(f"Database '{stats['alias']}' ({stats['vendor']}), role {stats['process_role']}")
+        self.stdout.write(f"  CONN_MAX_AGE: {stats['conn_max_age']}, health checks: {stats['conn_health_checks']}")
+        if 'statement_timeout' in stats:
+            self.stdout.write(f"  statement_timeout: {stats['statement_timeout']}")
+        if stats['pool']:
+            self.stdout.write('  Pool:')
+            for key, value in stats['pool'].items():
+                self.stdout.write(f'    {key}: {value}')
+        else:
+            self.stdout.write('  Pool: not configured')
+
+        server = stats['server']
+        if server is None:
+            return
+        self.stdout.write(f"Server connections: {server['total']} of max_connections {server['max_connections']}")
+        for application, states in server['applications'].items():
+            counts = ', '.join(f'{state} {count}' for state, count in states.items())
+            self.stdout.write(f'  {application}: {counts}')
@@ -0,0 +1,422 @@
+"""
+Generate a large synthetic dataset for load testing and benchmarks
+"""
+import json
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.accounts.models import User
+from apps.common.constants import (
+    ActivityAction, ApprovalRouting, FieldType, RoleOwner, SubmissionStatus, UserRole
+)
+from apps.common.models import ActivityLog
+from apps.common.partitions import ensure_partitions, is_partitioned
+from apps.departments.models import Department
+from apps.forms_builder.models import DynamicField, DynamicFormTemplate
+from apps.kpi.models import HodSubParamMapping, MainParameter, SubParameter
+from apps.notifications.models import Notification
+from apps.reviews.models import DeanApproval, Review
+from apps.submissions.models import Submission, SubmissionFieldValue
+from apps.submissions.duplicates import DuplicateIndexService
+from apps.submissions.search import SubmissionSearchService
+
+# Every generated row is namespaced so --clear only removes load data
+EMAIL_DOMAIN = 'load.rtc.edu'
+CODE_PREFIX = 'LD'
+PARAM_PREFIX = 'Load'
+
+STATUS_WEIGHTS = [
+    (SubmissionStatus.DEAN_APPROVED, 55),
+    (SubmissionStatus.HOD_APPROVED, 15),
+    (SubmissionStatus.SUBMITTED, 10),
+    (SubmissionStatus.DRAFT, 8),
+    (SubmissionStatus.NEEDS_REVISION, 5),
+    (SubmissionStatus.REJECTED, 7),
+]
+
+REVIEW_ACTIONS = {
+    SubmissionStatus.HOD_APPROVED: (ActivityAction.APPROVED, 'APPROVED'),
+    SubmissionStatus.DEAN_APPROVED: (ActivityAction.APPROVED, 'APPROVED'),
+    SubmissionStatus.REJECTED: (ActivityAction.REJECTED, 'REJECTED'),
+    SubmissionStatus.NEEDS_REVISION: (ActivityAction.NEEDS_REVISION, 'NEEDS_REVISION'),
+}
+
+FIELD_SPECS = [
+    ('title', 'Title', FieldType.TEXT),
+    ('count', 'Count', FieldType.NUMBER),
+    ('event_date', 'Event Date', FieldType.DATE),
+    ('category', 'Category', FieldType.SELECT),
+    ('link', 'Evidence Link', FieldType.URL),
+    ('indexing', 'Indexed In', FieldType.MULTISELECT),
+]
+CATEGORIES = ['National', 'International', 'Institutional', 'Industry']
+INDEXING = ['Scopus', 'Web of Science', 'UGC CARE', 'Google Scholar', 'IEEE Xplore']
+# Vocabulary of generated titles, so full-text search has realistic text
+TITLE_PREFIXES = [
+    'A study of', 'Advances in', 'A survey on', 'Optimizing', 'Towards', 'Workshop on',
+    'Applications of', 'Experimental analysis of',
+]
+TOPICS = [
+    'machine learning', 'renewable energy', 'structural health monitoring', 'wireless sensor networks',
+    'data mining', 'power electronics', 'image processing', 'cloud computing', 'VLSI design',
+    'control systems', 'natural language processing', 'blockchain', 'IoT security', 'thermal analysis',
+    'fluid dynamics', 'composite materials',
+]
+
+
+@contextmanager
+def preserve_timestamps(*models):
+    """
+    Let bulk_create keep explicit created_at/updated_at values
+    (auto_now/auto_now_add would otherwise stamp every row with now())
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Generate deterministic synthetic departments, users and submissions with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departments', type=int, default=100, help='Number of departments (default: 100)')
+        parser.add_argument('--users', type=int, default=20000, help='Number of faculty users (default: 20000)')
+        parser.add_argument('--years', type=int, default=5, help='Years of submission history (default: 5)')
+        parser.add_argument('--end-year', type=int, default=2025, help='Last year of history (default: 2025)')
+        parser.add_argument(
+            '--per-month', type=int, default=2,
+            help='Submissions per faculty member per month (default: 2)'
+        )
+        parser.add_argument(
+            '--departments-per-dean', type=int, default=5,
+            help='Departments managed by each dean (default: 5)'
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows per bulk INSERT (default: 5000)'
+        )
+        parser.add_argument(
+            '--chunk-users', type=int, default=500,
+            help='Faculty generated per transaction, bounds memory use (default: 500)'
+        )
+        parser.add_argument('--password', default='loadtest', help='Password for every generated user')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated load data first')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.clear()
+        elif Department.objects.filter(code__startswith=CODE_PREFIX).exists():
+            raise CommandError('Load data already exists; rerun with --clear to regenerate it.')
+
+        if options['departments'] < 1 or options['users'] < 1 or options['years'] < 1:
+            raise CommandError('--departments, --users and --years must be positive')
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.end_year = options['end_year']
+        self.periods = [
+            (month, year)
+            for year in range(self.end_year - options['years'] + 1, self.end_year + 1)
+            for month in range(1, 13)
+        ]
+        self.password = make_password(options['password'])
+
+        activity_table = ActivityLog._meta.db_table
+        if is_partitioned(activity_table):
+            first_month, first_year = self.periods[0]
+            ensure_partitions(activity_table, (first_year, first_month))
+
+        with preserve_timestamps(Submission, SubmissionFieldValue, Review, DeanApproval, Notification, ActivityLog):
+            with transaction.atomic():
+                self.create_structure(options)
+            faculty_ids = list(
+                User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}', role=UserRole.FACULTY,
+                                    department__isnull=False)
+                .order_by('id').values_list('id', 'department_id')
+            )
+            chunk = options['chunk_users']
+            for start in range(0, len(faculty_ids), chunk):
+                with transaction.atomic():
+                    self.create_activity(faculty_ids[start:start + chunk], options['per_month'])
+                self.stdout.write(f'  faculty {min(start + chunk, len(faculty_ids))}/{len(faculty_ids)}')
+            with transaction.atomic():
+                self.create_hod_activity()
+
+        self.stdout.write(self.style.SUCCESS(self.summary()))
+
+    def clear(self):
+        """Remove every row generated by a previous run"""
+        with transaction.atomic():
+            users = User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}')
+            ActivityLog.objects.filter(actor__in=users).delete()
+            Submission.objects.filter(user__in=users).delete()
+            DeanApproval.objects.filter(faculty__in=users).delete()
+            users.delete()
+            MainParameter.objects.filter(name__startswith=f'{PARAM_PREFIX} ').delete()
+            Department.objects.filter(code__startswith=CODE_PREFIX).delete()
+
+    def bulk(self, model, objs):
+        return model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+    def timestamp(self, month, year, day=None):
+        day = day or self.rng.randint(1, 20)
+        return datetime(year, month, day, self.rng.randint(8, 18), self.rng.randint(0, 59), tzinfo=dt_timezone.utc)
+
+    def make_user(self, email, full_name, role, department=None):
+        return User(
+            email=f'{email}@{EMAIL_DOMAIN}',
+            full_name=full_name,
+            role=role,
+            department=department,
+            password=self.password,
+            is_active=True,
+        )
+
+    def create_structure(self, options):
+        """Departments, staff, KPI parameters and form templates"""
+        rng = self.rng
+        self.departments = self.bulk(Department, [
+            Department(code=f'{CODE_PREFIX}{i:04d}', name=f'Load Department {i:04d}')
+            for i in range(options['departments'])
+        ])
+
+        self.bulk(User, [self.make_user('admin', 'Load Admin', UserRole.ADMIN)])
+        hods = self.bulk(User, [
+            self.make_user(f'hod.{dept.code.lower()}', f'HoD {dept.code}', UserRole.HOD, dept)
+            for dept in self.departments
+        ])
+        self.hod_by_dept = {hod.department_id: hod for hod in hods}
+
+        per_dean = max(options['departments_per_dean'], 1)
+        dean_groups = [self.departments[i:i + per_dean] for i in range(0, len(self.departments), per_dean)]
+        deans = self.bulk(User, [
+            self.make_user(f'dean{n:03d}', f'Dean {n:03d}', UserRole.DEAN) for n in range(len(dean_groups))
+        ])
+        self.bulk(User.dean_departments.through, [
+            User.dean_departments.through(user_id=dean.id, department_id=dept.id)
+            for dean, group in zip(deans, dean_groups) for dept in group
+        ])
+        self.dean_by_dept = {dept.id: dean for dean, group in zip(deans, dean_groups) for dept in group}
+
+        self.other_approvers = self.bulk(User, [
+            self.make_user(f'approver{n}', f'Approver {n}', UserRole.FACULTY) for n in range(2)
+        ])
+
+        departments = self.departments
+        self.bulk(User, [
+            self.make_user(f'faculty{i:06d}', f'Faculty {i:06d}', UserRole.FACULTY, departments[i % len(departments)])
+            for i in range(options['users'])
+        ])
+
+        faculty_params = self.bulk(MainParameter, [
+            MainParameter(name=f'{PARAM_PREFIX} Faculty {i}', weightage=Decimal('1.00'),
+                          role_owner=RoleOwner.FACULTY, order=i)
+            for i in range(5)
+        ])
+        hod_param = self.bulk(MainParameter, [
+            MainParameter(name=f'{PARAM_PREFIX} Leadership', weightage=Decimal('1.00'), role_owner=RoleOwner.HOD)
+        ])[0]
+
+        sub_params = []
+        for main_param in faculty_params:
+            for j in range(4):
+                other = self.other_approvers[j % 2] if (main_param.order + j) % 8 == 7 else None
+                sub_params.append(SubParameter(
+                    main_parameter=main_param,
+                    name=f'{main_param.name} / {j}',
+                    max_points=rng.choice([10, 20, 25, 50]),
+                    order=j,
+                    approval_routing=ApprovalRouting.OTHER if other else ApprovalRouting.HOD,
+                    other_approver_email=other.email if other else '',
+                ))
+        self.faculty_sub_params = self.bulk(SubParameter, sub_params)
+        self.hod_sub_params = self.bulk(SubParameter, [
+            SubParameter(main_parameter=hod_param, name=f'{hod_param.name} / {j}', max_points=50, order=j)
+            for j in range(2)
+        ])
+        self.bulk(HodSubParamMapping, [
+            HodSubParamMapping(hod_subparam=hod_sub, faculty_subparam=faculty_sub)
+            for hod_sub, faculty_sub in zip(self.hod_sub_params, self.faculty_sub_params)
+        ])
+
+        all_sub_params = self.faculty_sub_params + self.hod_sub_params
+        templates = self.bulk(DynamicFormTemplate, [
+            DynamicFormTemplate(sub_parameter=sub_param) for sub_param in all_sub_params
+        ])
+        fields = self.bulk(DynamicField, [
+            DynamicField(
+                template=template, name=name, label=label, field_type=field_type, order=order,
+                choices={FieldType.SELECT: CATEGORIES, FieldType.MULTISELECT: INDEXING}.get(field_type, []),
+            )
+            for template in templates
+            for order, (name, label, field_type) in enumerate(FIELD_SPECS)
+        ])
+        by_template = {}
+        for field in fields:
+            by_template.setdefault(field.template_id, []).append(field)
+        self.fields_by_sub_param = {
+            template.sub_parameter_id: by_template[template.id] for template in templates
+        }
+
+    def field_value(self, field, month, year, serial):
+        rng = self.rng
+        if field.field_type == FieldType.NUMBER:
+            return str(rng.randint(0, 40))
+        if field.field_type == FieldType.DATE:
+            return f'{year:04d}-{month:02d}-{rng.randint(1, 28):02d}'
+        if field.field_type == FieldType.SELECT:
+            return rng.choice(CATEGORIES)
+        if field.field_type == FieldType.URL:
+            return f'https://evidence.example.org/{rng.randint(1, 50000)}'
+        if field.field_type == FieldType.MULTISELECT:
+            return json.dumps(sorted(rng.sample(INDEXING, rng.randint(1, 3))))
+        if field.field_type == FieldType.TEXT:
+            return f'{rng.choice(TITLE_PREFIXES)} {rng.choice(TOPICS)} for {rng.choice(TOPICS)} ({serial})'
+        return f'Synthetic evidence {serial}'
+
+    def create_submissions(self, owners, sub_params, per_month, reviewer_for):
+        """
+        Build one batch of submissions plus their field values, reviews,
+        notifications and activity logs. owners is a list of (user_id, department_id, role).
+        """
+        rng = self.rng
+        statuses, weights = zip(*STATUS_WEIGHTS)
+        submissions = []
+        for user_id, department_id, role in owners:
+            for month, year in self.periods:
+                for sub_param in rng.sample(sub_params, min(per_month, len(sub_params))):
+                    status = rng.choices(statuses, weights)[0]
+                    created = self.timestamp(month, year)
+                    submission = Submission(
+                        user_id=user_id, department_id=department_id, owner_role=role,
+                        sub_parameter=sub_param, month=month, year=year, status=status,
+                        created_at=created, updated_at=created,
+                    )
+                    if status != SubmissionStatus.DRAFT:
+                        submission.submitted_at = created + timedelta(days=rng.randint(0, 5))
+                        submission.updated_at = submission.submitted_at
+                    if status in REVIEW_ACTIONS:
+                        submission.reviewer = reviewer_for(sub_param, department_id)
+                        submission.reviewed_at = submission.submitted_at + timedelta(days=rng.randint(1, 7))
+                        submission.review_comment = 'Synthetic review'
+                        submission.updated_at = submission.reviewed_at
+                        if status in (SubmissionStatus.HOD_APPROVED, SubmissionStatus.DEAN_APPROVED):
+                            submission.awarded_points = Decimal(rng.randint(0, sub_param.max_points))
+                    if status == SubmissionStatus.DEAN_APPROVED:
+                        submission.dean_approved = True
+                        submission.dean_approver = self.dean_by_dept.get(department_id)
+                        submission.dean_approved_at = submission.reviewed_at + timedelta(days=rng.randint(1, 7))
+                        submission.updated_at = submission.dean_approved_at
+                    submissions.append(submission)
+        self.bulk(Submission, submissions)
+
+        values, reviews, notifications, logs = [], [], [], []
+        for submission in submissions:
+            for field in self.fields_by_sub_param[submission.sub_parameter_id]:
+                value = SubmissionFieldValue(
+                    submission_id=submission.id, field_id=field.id, field_name=field.name,
+                    value=self.field_value(field, submission.month, submission.year, submission.id),
+                    created_at=submission.created_at, updated_at=submission.created_at,
+                )
+                # bulk_create skips save(), which fills the typed columns
+                value.set_typed_values(field.field_type)
+                values.append(value)
+            logs.append(ActivityLog(
+                actor_id=submission.user_id, action=ActivityAction.CREATED, target_model='Submission',
+                target_id=submission.id, description='Created submission', created_at=submission.created_at,
+            ))
+            if submission.submitted_at:
+                logs.append(ActivityLog(
+                    actor_id=submission.user_id, action=ActivityAction.SUBMITTED, target_model='Submission',
+                    target_id=submission.id, description='Submitted for review', created_at=submission.submitted_at,
+                ))
+            if submission.status in REVIEW_ACTIONS:
+                log_action, review_action = REVIEW_ACTIONS[submission.status]
+                new_status = (SubmissionStatus.HOD_APPROVED if submission.status == SubmissionStatus.DEAN_APPROVED
+                              else submission.status)
+                reviews.append(Review(
+                    submission_id=submission.id, reviewer=submission.reviewer, action=review_action,
+                    awarded_points=submission.awarded_points or 0, comment=submission.review_comment,
+                    previous_status=SubmissionStatus.SUBMITTED, new_status=new_status,
+                    created_at=submission.reviewed_at, updated_at=submission.reviewed_at,
+                ))
+                logs.append(ActivityLog(
+                    actor_id=submission.reviewer.id, action=log_action, target_model='Submission',
+                    target_id=submission.id, description=f'Review: {review_action}',
+                    created_at=submission.reviewed_at,
+                ))
+                notifications.append(Notification(
+                    recipient_id=submission.user_id, title=f'Submission {review_action.lower().replace("_", " ")}',
+                    message='Your submission has been reviewed', notification_type='info',
+                    related_submission_id=submission.id, is_read=rng.random() < 0.8,
+                    created_at=submission.reviewed_at, updated_at=submission.reviewed_at,
+                ))
+        self.bulk(SubmissionFieldValue, values)
+        self.bulk(Review, reviews)
+        self.bulk(Notification, notifications)
+        self.bulk(ActivityLog, logs)
+        # bulk_create skips the signals that maintain search documents and fingerprints
+        submission_ids = [submission.id for submission in submissions]
+        SubmissionSearchService.index_submissions(submission_ids)
+        DuplicateIndexService.index_submissions(submission_ids)
+        return submissions
+
+    def faculty_reviewer(self, sub_param, department_id):
+        if sub_param.approval_routing == ApprovalRouting.OTHER:
+            return next(u for u in self.other_approvers if u.email == sub_param.other_approver_email)
+        return self.hod_by_dept[department_id]
+
+    def create_activity(self, faculty, per_month):
+        """Submissions and dean approvals for one chunk of faculty"""
+        owners = [(user_id, department_id, UserRole.FACULTY) for user_id, department_id in faculty]
+        submissions = self.create_submissions(owners, self.faculty_sub_params, per_month, self.faculty_reviewer)
+
+        totals = {}
+        for submission in submissions:
+            if submission.status == SubmissionStatus.DEAN_APPROVED:
+                key = (submission.user_id, submission.department_id, submission.month, submission.year)
+                totals[key] = totals.get(key, 0) + submission.awarded_points
+        approvals = []
+        for (user_id, department_id, month, year), total in totals.items():
+            dean = self.dean_by_dept.get(department_id)
+            if dean:
+                approved_at = self.timestamp(month, year, day=28)
+                approvals.append(DeanApproval(
+                    faculty_id=user_id, month=month, year=year, dean=dean, total_points=total,
+                    is_approved=True, created_at=approved_at, updated_at=approved_at,
+                ))
+        self.bulk(DeanApproval, approvals)
+
+    def create_hod_activity(self):
+        """HoD submissions, reviewed by the department's dean"""
+        owners = [(hod.id, dept_id, UserRole.HOD) for dept_id, hod in self.hod_by_dept.items()]
+        self.create_submissions(
+            owners, self.hod_sub_params, 1,
+            lambda sub_param, department_id: self.dean_by_dept[department_id]
+        )
+
+    def summary(self):
+        users = User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}')
+        submissions = Submission.objects.filter(user__in=users)
+        return (
+            f'Generated {len(self.departments)} departments, {users.count()} users, '
+            f'{submissions.count()} submissions, '
+            f'{SubmissionFieldValue.objects.filter(submission__in=submissions).count()} field values, '
+            f'{Review.objects.filter(submission__in=submissions).count()} reviews, '
+            f'{ActivityLog.objects.filter(actor__in=users).count()} activity logs.'
+        )
@@ -0,0 +1,47 @@
+"""
+Delete expired database sessions in batches
+"""
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Delete expired sessions in small batches so a large backlog does not hold long locks '
+            '(database-backed session engines only)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Sessions deleted per statement')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Count expired sessions without deleting')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, 'get_model_class'):
+            # Cache entries and signed cookies expire on their own
+            store.clear_expired()
+            self.stdout.write(f'{settings.SESSION_ENGINE} keeps no session rows; nothing to purge.')
+            return
+
+        model = store.get_model_class()
+        expired = model.objects.filter(expire_date__lt=timezone.now())
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} expired session(s).')
+            return
+
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            deleted += model.objects.filter(pk__in=keys).delete()[0]
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired session(s).'))
@@ -0,0 +1,102 @@
+"""
+Roll activity log partitions and archive/drop expired months
+"""
+import os
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from apps.common.models import ActivityLog
+from apps.common.partitions import (
+    add_months, archive_rows, default_partition_months, drop_partition, ensure_partitions,
+    is_partitioned, list_partitions, partition_name
+)
+
+TABLE = ActivityLog._meta.db_table
+
+
+class Command(BaseCommand):
+    help = ('Create upcoming activity log partitions, split rows out of the default partition, '
+            'and archive expired months to gzip JSON Lines before dropping them')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int, default=settings.ACTIVITY_LOG_PARTITIONS_AHEAD,
+            help='Months of partitions to create ahead of the current month'
+        )
+        parser.add_argument(
+            '--retain-months', type=int, default=settings.ACTIVITY_LOG_RETENTION_MONTHS,
+            help='Months to keep online, including the current month'
+        )
+        parser.add_argument(
+            '--archive-dir', default=settings.ACTIVITY_LOG_ARCHIVE_DIR,
+            help='Directory for archived months'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report what would happen without changes')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS, help='Database to roll (default: "default")'
+        )
+
+    def handle(self, *args, **options):
+        if options['retain_months'] < 1:
+            raise CommandError('--retain-months must be at least 1')
+
+        self.using = options['database']
+        today = date.today()
+        cutoff = add_months(today.year, today.month, -(options['retain_months'] - 1))
+        partitioned = is_partitioned(TABLE, using=self.using)
+
+        if partitioned:
+            self.roll(options['ahead'], options['dry_run'])
+            expired = [
+                (year, month) for _, year, month in list_partitions(TABLE, using=self.using) if (year, month) < cutoff
+            ]
+        else:
+            self.stdout.write('Activity log is not partitioned; expiring rows by date range.')
+            oldest = ActivityLog.objects.using(self.using).order_by('created_at').values_list(
+                'created_at', flat=True
+            ).first()
+            expired = []
+            if oldest:
+                year, month = oldest.year, oldest.month
+                while (year, month) < cutoff:
+                    expired.append((year, month))
+                    year, month = add_months(year, month, 1)
+
+        for year, month in expired:
+            self.expire(year, month, partitioned, options['archive_dir'], options['dry_run'])
+
+    def roll(self, ahead, dry_run):
+        """Split rows out of the default partition into monthly ones and pre-create upcoming months"""
+        months = default_partition_months(TABLE, using=self.using)
+        today = date.today()
+        start = min(months + [(today.year, today.month)])
+        if dry_run:
+            self.stdout.write(f'Would ensure partitions from {start[0]}-{start[1]:02d} to {ahead} months ahead.')
+            return
+        created = ensure_partitions(TABLE, start, months_ahead=ahead, using=self.using)
+        for name in created:
+            self.stdout.write(f'Created partition {name}')
+
+    def expire(self, year, month, partitioned, archive_dir, dry_run):
+        """Archive one month to <archive_dir>/<partition>.jsonl.gz, then drop or delete it"""
+        name = partition_name(TABLE, year, month)
+        rows = ActivityLog.objects.using(self.using).for_month(year, month).order_by('created_at', 'id')
+        if dry_run:
+            self.stdout.write(f'Would archive and remove {name} ({rows.count()} rows).')
+            return
+
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f'{name}.jsonl.gz')
+        temp_path = f'{path}.tmp'
+        count = archive_rows(rows, temp_path)
+        os.replace(temp_path, path)
+
+        if partitioned:
+            drop_partition(TABLE, name, using=self.using)
+        else:
+            with transaction.atomic(using=self.using):
+                ActivityLog.objects.using(self.using).for_month(year, month).delete()
+        self.stdout.write(self.style.SUCCESS(f'Archived {count} rows to {path} and removed {name}.'))
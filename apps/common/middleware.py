@@ -0,0 +1,159 @@
+"""
+Middleware for the RTC KPI System
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from apps.common.audit import audit_writer
+from apps.common.signals import query_budget_exceeded
+
+logger = logging.getLogger('apps.common.queries')
+
+IN_LIST_RE = re.compile(r'\((?:%s|\?)(?:\s*,\s*(?:%s|\?))*\)')
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+\b')
+
+
+def fingerprint(sql):
+    """
+    Normalize SQL so statements differing only in parameters compare equal
+    (IN lists of any length collapse to one placeholder)
+    """
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    return IN_LIST_RE.sub('(...)', sql)
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper recording each statement and its duration
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for _, duration in self.queries)
+
+    def duplicates(self):
+        """Fingerprints executed more than once, most repeated first"""
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record query count, DB time and repeated SQL for each request.
+
+    Logs one JSON line per request on the 'apps.common.queries' logger,
+    adds a Server-Timing header, and sends query_budget_exceeded when the
+    view's QUERY_BUDGETS entry is exceeded. Inactive unless
+    QUERY_INSTRUMENTATION is enabled.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', False):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else None
+        duplicates = recorder.duplicates()
+        stats = {
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration * 1000, 2),
+            'total_ms': round(elapsed * 1000, 2),
+            'duplicates': sum(count - 1 for _, count in duplicates),
+            'top_duplicates': [{'sql': sql[:300], 'count': count} for sql, count in duplicates[:3]],
+        }
+
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+        if budget is not None and recorder.count > budget:
+            stats['budget'] = budget
+            logger.warning(json.dumps(stats))
+            query_budget_exceeded.send(
+                sender=self.__class__, request=request, view_name=view_name, budget=budget, stats=stats
+            )
+        else:
+            logger.info(json.dumps(stats))
+
+        response['Server-Timing'] = (
+            f'db;dur={stats["db_ms"]};desc="{recorder.count} queries", app;dur={stats["total_ms"]}'
+        )
+        return response
+
+
+class AuditBufferMiddleware:
+    """
+    Collect activity log entries recorded outside transactions during a
+    request and write them with a single INSERT when the request finishes
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with audit_writer.request_scope():
+            return self.get_response(request)
+
+
+class SessionRefreshMiddleware:
+    """
+    Sliding session expiry with throttled writes.
+
+    Replaces SESSION_SAVE_EVERY_REQUEST: a session used by the request is
+    marked modified (so SessionMiddleware saves it and renews the cookie)
+    only when less than SESSION_REFRESH_THRESHOLD seconds of its lifetime
+    remain. Must come after SessionMiddleware.
+    """
+
+    REFRESHED_KEY = '_refreshed_at'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        session = getattr(request, 'session', None)
+        if session is None or not session.accessed or session.is_empty():
+            return response
+
+        now = int(time.time())
+        refreshed_at = session.get(self.REFRESHED_KEY)
+        interval = settings.SESSION_COOKIE_AGE - settings.SESSION_REFRESH_THRESHOLD
+        if session.modified or refreshed_at is None or now - refreshed_at >= interval:
+            session[self.REFRESHED_KEY] = now
+        return response
@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-19 09:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activitylog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='When the action was performed'),
+        ),
+    ]
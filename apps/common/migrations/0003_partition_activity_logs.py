@@ -0,0 +1,92 @@
+# Generated by Django 5.0 on 2026-10-19 10:05
+
+from django.db import migrations
+
+from apps.common.partitions import add_months, create_partition, default_partition_name
+
+TABLE = 'activity_logs'
+PARTITIONS_AHEAD = 3
+
+
+def table_definition(cursor):
+    """Secondary index and foreign key definitions of the current table"""
+    cursor.execute(
+        'SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s',
+        [TABLE, f'{TABLE}_pkey']
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [TABLE]
+    )
+    foreign_keys = cursor.fetchall()
+    return indexes, foreign_keys
+
+
+def rebuild(schema_editor, partitioned):
+    """
+    Recreate activity_logs as a partitioned (or plain) table, copying rows,
+    indexes and foreign keys. Partitioned tables need the partition key in
+    the primary key, so it becomes (id, created_at).
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = table_definition(cursor)
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {TABLE}_old')
+        cursor.execute(f'ALTER TABLE {TABLE}_old RENAME CONSTRAINT {TABLE}_pkey TO {TABLE}_old_pkey')
+        for name, _ in foreign_keys:
+            cursor.execute(f'ALTER TABLE {TABLE}_old DROP CONSTRAINT {name}')
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {name}')
+
+        like = f'LIKE {TABLE}_old INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS'
+        if partitioned:
+            cursor.execute(f'CREATE TABLE {TABLE} ({like}) PARTITION BY RANGE (created_at)')
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, created_at)')
+            cursor.execute(f'CREATE TABLE {default_partition_name(TABLE)} PARTITION OF {TABLE} DEFAULT')
+            cursor.execute(f'SELECT MIN(created_at), NOW() FROM {TABLE}_old')
+            oldest, now = cursor.fetchone()
+            oldest = oldest or now
+            year, month = oldest.year, oldest.month
+            last = add_months(now.year, now.month, PARTITIONS_AHEAD)
+            while (year, month) <= last:
+                create_partition(TABLE, year, month, using=schema_editor.connection.alias)
+                year, month = add_months(year, month, 1)
+        else:
+            cursor.execute(f'CREATE TABLE {TABLE} ({like})')
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id)')
+
+        cursor.execute(f'INSERT INTO {TABLE} OVERRIDING SYSTEM VALUE SELECT * FROM {TABLE}_old')
+        cursor.execute(f'DROP TABLE {TABLE}_old')
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f'SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {TABLE}), 0) + 1, false)', [sequence])
+        cursor.execute(f'ALTER SEQUENCE {sequence} RENAME TO {TABLE}_id_seq')
+
+        for _, definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+
+
+def partition(apps, schema_editor):
+    rebuild(schema_editor, partitioned=True)
+
+
+def unpartition(apps, schema_editor):
+    rebuild(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    atomic = True
+
+    dependencies = [
+        ('common', '0002_activitylog_created_at_default'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-19 09:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_partition_activity_logs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='activitylog',
+            name='activity_lo_target__23e139_idx',
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['target_model', 'target_id', '-created_at'], name='activity_logs_target_idx'),
+        ),
+    ]
@@ -4,12 +4,43 @@ Common models - Activity Log for audit trail
 """
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
 from apps.common.constants import ActivityAction
 
 
+class ActivityLogQuerySet(models.QuerySet):
+    """
+    Query helpers for the activity log.
+    Always bound created_at where possible: on PostgreSQL the table is
+    range-partitioned by month, and a bounded filter lets the planner
+    skip every partition outside the range.
+    """
+    
+    def in_period(self, start=None, end=None):
+        """Entries with start <= created_at < end (either bound optional)"""
+        queryset = self
+        if start is not None:
+            queryset = queryset.filter(created_at__gte=start)
+        if end is not None:
+            queryset = queryset.filter(created_at__lt=end)
+        return queryset
+    
+    def for_month(self, year, month):
+        """Entries created in a calendar month (UTC), i.e. one partition"""
+        from apps.common.partitions import month_range
+        return self.in_period(*month_range(year, month))
+    
+    def recent(self, days=30):
+        """Entries from the last N days"""
+        return self.in_period(start=timezone.now() - timedelta(days=days))
+
+
 class ActivityLog(models.Model):
     """
-    Audit log for tracking all significant actions in the system
+    Audit log for tracking all significant actions in the system.
+    On PostgreSQL the table is partitioned by month on created_at (see
+    apps.common.partitions and the roll_activity_log command).
     """
     actor = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -49,17 +80,21 @@ class ActivityLog(models.Model):
         help_text="IP address of the actor"
     )
     created_at = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         help_text="When the action was performed"
     )
     
+    objects = ActivityLogQuerySet.as_manager()
+    
     class Meta:
         db_table = 'activity_logs'
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['-created_at']),
             models.Index(fields=['actor', '-created_at']),
-            models.Index(fields=['target_model', 'target_id']),
+            # Object timelines read newest-first per target
+            models.Index(fields=['target_model', 'target_id', '-created_at'], name='activity_logs_target_idx'),
         ]
         verbose_name = 'Activity Log'
         verbose_name_plural = 'Activity Logs'
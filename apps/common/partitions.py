@@ -0,0 +1,159 @@
+"""
+Monthly range partitions for append-only tables (PostgreSQL)
+
+Partitions are named <table>_yYYYYmMM and cover [first of month, first of
+next month). Each partitioned table also has a <table>_default partition
+that catches rows outside every monthly range; creating a monthly
+partition moves the matching rows out of it. On other databases the table
+is an ordinary table and these helpers report it as not partitioned.
+
+Every helper works on the database given by `using` (the default database
+unless told otherwise), so migrations and commands run against another
+database alias change that database only.
+"""
+import gzip
+import json
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+PARTITION_RE = re.compile(r'_y(\d{4})m(\d{2})$')
+
+
+def add_months(year, month, count):
+    """Shift (year, month) by count months"""
+    index = year * 12 + month - 1 + count
+    return index // 12, index % 12 + 1
+
+
+def month_start(year, month):
+    return datetime(year, month, 1, tzinfo=dt_timezone.utc)
+
+
+def month_range(year, month):
+    """Timezone-aware [start, end) bounds of a month"""
+    return month_start(year, month), month_start(*add_months(year, month, 1))
+
+
+def partition_name(table, year, month):
+    return f'{table}_y{year:04d}m{month:02d}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def _quote(name, using):
+    return connections[using].ops.quote_name(name)
+
+
+def is_partitioned(table, using=DEFAULT_DB_ALIAS):
+    """Whether table is a partitioned table on the database"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s',
+            [table]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table, using=DEFAULT_DB_ALIAS):
+    """
+    Monthly partitions of table as (name, year, month), oldest first.
+    The default partition is not included.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'JOIN pg_class p ON p.oid = i.inhparent '
+            'WHERE p.relname = %s',
+            [table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = PARTITION_RE.search(name)
+        if match and name.startswith(table):
+            partitions.append((name, int(match.group(1)), int(match.group(2))))
+    return sorted(partitions, key=lambda p: (p[1], p[2]))
+
+
+def create_partition(table, year, month, column='created_at', using=DEFAULT_DB_ALIAS):
+    """
+    Create the partition for a month if it does not exist, moving any
+    matching rows out of the default partition. Returns True if created.
+    """
+    name = partition_name(table, year, month)
+    start, end = month_range(year, month)
+    partition, parent, default, column = (
+        _quote(identifier, using) for identifier in (name, table, default_partition_name(table), column)
+    )
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute('SELECT to_regclass(%s)', [name])
+            if cursor.fetchone()[0] is not None:
+                return False
+            cursor.execute(f'CREATE TABLE {partition} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {default} WHERE {column} >= %s AND {column} < %s RETURNING *) '
+                f'INSERT INTO {partition} SELECT * FROM moved',
+                [start, end]
+            )
+            cursor.execute(
+                f'ALTER TABLE {parent} ATTACH PARTITION {partition} FOR VALUES FROM (%s) TO (%s)', [start, end]
+            )
+    return True
+
+
+def default_partition_months(table, column='created_at', using=DEFAULT_DB_ALIAS):
+    """(year, month) pairs that currently have rows in the default partition"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', {_quote(column, using)} AT TIME ZONE 'UTC') "
+            f'FROM {_quote(default_partition_name(table), using)}'
+        )
+        return sorted((row[0].year, row[0].month) for row in cursor.fetchall())
+
+
+def ensure_partitions(table, start, months_ahead=3, column='created_at', using=DEFAULT_DB_ALIAS):
+    """
+    Create monthly partitions from start (year, month) through months_ahead
+    months after the current month. Returns the names created.
+    """
+    today = date.today()
+    last = add_months(today.year, today.month, months_ahead)
+    created = []
+    year, month = start
+    while (year, month) <= last:
+        if create_partition(table, year, month, column, using):
+            created.append(partition_name(table, year, month))
+        year, month = add_months(year, month, 1)
+    return created
+
+
+def archive_rows(queryset, path, chunk_size=2000):
+    """
+    Stream a queryset's rows to a gzip-compressed JSON Lines file.
+    Returns the number of rows written.
+    """
+    count = 0
+    with gzip.open(path, 'wt', encoding='utf-8') as handle:
+        for row in queryset.values().iterator(chunk_size=chunk_size):
+            handle.write(json.dumps(row, cls=DjangoJSONEncoder))
+            handle.write('\n')
+            count += 1
+    return count
+
+
+def drop_partition(table, name, using=DEFAULT_DB_ALIAS):
+    """Detach and drop a monthly partition"""
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {_quote(table, using)} DETACH PARTITION {_quote(name, using)}')
+            cursor.execute(f'DROP TABLE {_quote(name, using)}')
@@ -0,0 +1,55 @@
+"""
+pytest plugin failing tests whose requests exceed their view's query budget
+
+Enabled from the root conftest.py. Query instrumentation is switched on for
+every test; any query_budget_exceeded signal sent while a test runs turns a
+passing test into a failure listing the offending views and repeated SQL.
+Use --no-query-budgets to disable, or mark a test with no_query_budget.
+"""
+import pytest
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('query budgets')
+    group.addoption(
+        '--no-query-budgets', action='store_true', default=False,
+        help='Do not fail tests on QUERY_BUDGETS violations'
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'no_query_budget: ignore QUERY_BUDGETS violations in this test')
+
+
+def format_violation(view_name, budget, stats):
+    lines = [f"{stats['method']} {stats['path']} ({view_name}) ran {stats['queries']} queries, budget {budget}"]
+    for duplicate in stats['top_duplicates']:
+        lines.append(f"    {duplicate['count']}x {duplicate['sql']}")
+    return '\n'.join(lines)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    if item.config.getoption('no_query_budgets') or item.get_closest_marker('no_query_budget'):
+        yield
+        return
+
+    from django.test.utils import override_settings
+    from apps.common.signals import query_budget_exceeded
+
+    violations = []
+
+    def record(sender, view_name, budget, stats, **kwargs):
+        violations.append(format_violation(view_name, budget, stats))
+
+    query_budget_exceeded.connect(record, weak=False)
+    try:
+        with override_settings(QUERY_INSTRUMENTATION=True):
+            outcome = yield
+    finally:
+        query_budget_exceeded.disconnect(record)
+
+    if violations and outcome.excinfo is None:
+        outcome.force_exception(
+            pytest.fail.Exception('Query budget exceeded:\n' + '\n'.join(violations), pytrace=False)
+        )
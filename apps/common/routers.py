@@ -0,0 +1,148 @@
+"""
+Read-replica routing for read-only analytic code paths
+
+Reads go to the primary unless code opts in with read_from_replica(). Once
+anything writes during a request (or command), reads stay on the primary
+for the rest of it, and ReplicaPinningMiddleware keeps the following
+requests of that client on the primary for REPLICA_PIN_SECONDS so they see
+their own writes despite replication lag.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Models of these apps are always read from the primary, and writing them
+# does not pin: sessions are written whenever their expiry is refreshed
+PRIMARY_ONLY_APPS = {'sessions'}
+PIN_COOKIE = 'db_pin'
+
+_use_replica = ContextVar('use_replica', default=False)
+_routing_state = ContextVar('routing_state', default=None)
+
+
+class RoutingState:
+    """Per-request routing flags"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+def _state():
+    state = _routing_state.get()
+    if state is None:
+        state = RoutingState()
+        _routing_state.set(state)
+    return state
+
+
+def replica_alias():
+    """The configured replica alias, or None when there is no replica"""
+    alias = getattr(settings, 'REPLICA_DATABASE', None)
+    return alias if alias and alias in settings.DATABASES else None
+
+
+@contextmanager
+def read_from_replica():
+    """
+    Send reads in this block (or decorated function) to the replica.
+    Usage: @read_from_replica() or with read_from_replica(): ...
+    """
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+@contextmanager
+def pin_to_primary():
+    """Send all reads in this block to the primary"""
+    state = _state()
+    pinned, state.pinned = state.pinned, True
+    try:
+        yield
+    finally:
+        state.pinned = pinned
+
+
+def replica_iterator(iterable):
+    """
+    Iterate on the replica, e.g. a streaming response body, which is
+    consumed after the view (and any read_from_replica block) returned
+    """
+    iterator = iter(iterable)
+    while True:
+        with read_from_replica():
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+class ReplicaRouter:
+    """
+    Route opted-in reads to REPLICA_DATABASE, everything else to the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        replica = replica_alias()
+        if replica is None:
+            return None
+        if (
+            _use_replica.get()
+            and not _state().pinned
+            and model._meta.app_label not in PRIMARY_ONLY_APPS
+            # Reads inside a transaction must see its uncommitted writes
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return replica
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if replica_alias() is None:
+            return None
+        if model._meta.app_label not in PRIMARY_ONLY_APPS:
+            state = _state()
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Scope routing state to each request. Unsafe methods and clients that
+    wrote within the last REPLICA_PIN_SECONDS read from the primary only.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if replica_alias() is None:
+            return self.get_response(request)
+
+        pinned = request.method not in ('GET', 'HEAD', 'OPTIONS') or PIN_COOKIE in request.COOKIES
+        token = _routing_state.set(RoutingState(pinned=pinned))
+        try:
+            response = self.get_response(request)
+            if _routing_state.get().wrote:
+                response.set_cookie(
+                    PIN_COOKIE, '1',
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                    secure=request.is_secure()
+                )
+            return response
+        finally:
+            _routing_state.reset(token)
+
@@ -0,0 +1,8 @@
+"""
+Signals for the common app
+"""
+from django.dispatch import Signal
+
+# Sent by QueryInstrumentationMiddleware when a view runs more queries than
+# its QUERY_BUDGETS entry. Arguments: request, view_name, budget, stats.
+query_budget_exceeded = Signal()
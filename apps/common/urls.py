@@ -4,9 +4,11 @@ URL configuration for common app
 """
 from django.urls import path
 from django.views.generic import TemplateView
+from apps.common import views
 
 app_name = 'common'
 
 urlpatterns = [
     path('', TemplateView.as_view(template_name='home.html'), name='home'),
+    path('system/db-stats/', views.db_pool_stats, name='db_pool_stats'),
 ]
@@ -69,6 +69,25 @@ def get_upload_path(instance, filename):
     return f'attachments/{now.year}/{now.month:02d}/{user_id}/{filename}'
 
 
+def get_blob_path(instance, filename):
+    """
+    Generate content-addressed path for attachment blobs
+    Format: attachments/blobs/ab/cd/<sha256><ext>
+    """
+    digest = instance.sha256
+    extension = os.path.splitext(sanitize_filename(filename))[1].lower()
+    return f'attachments/blobs/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def get_preview_path(instance, filename):
+    """
+    Generate path for a blob's preview image, keyed by content hash
+    Format: attachments/previews/ab/cd/<sha256>.jpg
+    """
+    digest = instance.sha256
+    return f'attachments/previews/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+
+
 def check_cutoff_deadline(cutoff_window, user_role):
     """
     Check if current time is within deadline for the given role
@@ -96,6 +115,15 @@ def check_cutoff_deadline(cutoff_window, user_role):
     return is_within, field_name
 
 
+def parse_positive_int(value):
+    """Parse an optional positive integer query parameter, ignoring bad input"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
 def get_client_ip(request):
     """
     Get client IP address from request
@@ -108,11 +136,15 @@ def get_client_ip(request):
     return ip
 
 
-def log_activity(actor, action, target, description, comment='', metadata=None, request=None):
+def log_activity(actor, action, target, description, comment='', metadata=None, request=None, critical=True):
     """
-    Helper function to create activity log entries
+    Helper function to create activity log entries.
+    Entries are buffered and written in batches once the surrounding
+    transaction commits (see apps.common.audit); non-critical entries may
+    be written by a background thread.
     """
     from apps.common.models import ActivityLog
+    from apps.common.audit import audit_writer
     
     log_data = {
         'actor': actor,
@@ -122,9 +154,12 @@ def log_activity(actor, action, target, description, comment='', metadata=None,
         'description': description,
         'comment': comment,
         'metadata': metadata or {},
+        'created_at': timezone.now(),
     }
     
     if request:
         log_data['ip_address'] = get_client_ip(request)
     
-    return ActivityLog.objects.create(**log_data)
+    entry = ActivityLog(**log_data)
+    audit_writer.record(entry, critical=critical)
+    return entry
@@ -0,0 +1,12 @@
+"""
+Views for common app
+"""
+from django.http import JsonResponse
+from apps.common.db import connection_stats
+from apps.common.decorators import admin_required
+
+
+@admin_required
+def db_pool_stats(request):
+    """Database connection settings and server connection counts (JSON)"""
+    return JsonResponse(connection_stats())
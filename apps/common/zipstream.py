@@ -0,0 +1,90 @@
+"""
+Streaming ZIP archives: build an archive as a generator of byte chunks
+"""
+import io
+import zipfile
+
+# Entries of these types are already compressed; deflating them costs CPU
+# and gains nothing
+STORED_TYPES = {
+    'image/jpeg', 'image/png', 'image/gif', 'image/webp', 'application/zip',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+}
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+class _StreamBuffer(io.RawIOBase):
+    """
+    Write-only, unseekable sink for ZipFile. Being unseekable makes ZipFile
+    write data descriptors after each entry instead of seeking back to
+    patch the local header, so written bytes can be handed out immediately.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        """Return and forget everything written since the last call"""
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class ZipEntry:
+    """A file to add to a streamed archive; chunks is an iterable of bytes"""
+
+    def __init__(self, name, chunks, modified=None, content_type=None):
+        self.name = name
+        self.chunks = chunks
+        self.modified = modified
+        self.content_type = content_type
+
+
+def iter_zip(entries):
+    """
+    Yield the bytes of a ZIP archive of `entries`, pulling each entry's
+    chunks only when they are written. Memory use is bounded by the chunk
+    size and the central directory, not by the size of the files.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', allowZip64=True) as archive:
+        for entry in entries:
+            info = zipfile.ZipInfo(entry.name, date_time=_zip_date_time(entry.modified))
+            info.external_attr = 0o644 << 16
+            info.compress_type = (
+                zipfile.ZIP_STORED if entry.content_type in STORED_TYPES else zipfile.ZIP_DEFLATED
+            )
+            # Entries are far below the 2 GiB limit; ZIP64 is only needed
+            # for the central directory of very large archives
+            with archive.open(info, 'w') as handle:
+                for chunk in entry.chunks:
+                    handle.write(chunk)
+                    yield from _drain(buffer)
+            yield from _drain(buffer)
+    yield from _drain(buffer)
+
+
+def _drain(buffer):
+    data = buffer.take()
+    if data:
+        yield data
+
+
+def _zip_date_time(modified):
+    if modified is None:
+        return ZIP_EPOCH
+    return max(modified.timetuple()[:6], ZIP_EPOCH)
@@ -2,20 +2,32 @@
 """
 Service layer for dashboard data aggregation and scoring
 """
-from django.db.models import Sum, Avg, Count, Q
-from apps.submissions.models import Submission
-from apps.common.constants import SubmissionStatus, RoleOwner
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Sum, Avg, Count, Max, Q, F, Func, IntegerField, Value, Window
+from django.db.models.functions import Cast, Floor, Greatest, Lag, Least, TruncMonth
+from apps.submissions.models import Submission, SubmissionFieldValue
+from apps.common.constants import SubmissionStatus, RoleOwner, FieldType
+from apps.common.utils import format_month_year
+from apps.common.routers import read_from_replica
 from apps.kpi.models import MainParameter, HodSubParamMapping
 from apps.departments.models import Department
+from apps.accounts.models import User
 from decimal import Decimal
+import hashlib
+import json
 
 
 class ScoringService:
     """
     Service for calculating scores and aggregating data for dashboards
+    
+    Read-only; queries go to the read replica when one is configured.
     """
     
     @staticmethod
+    @read_from_replica()
     def get_faculty_scores(faculty, month, year):
         """
         Calculate faculty scores by main parameter for a given window
@@ -62,6 +74,7 @@ class ScoringService:
         }
     
     @staticmethod
+    @read_from_replica()
     def get_hod_scores(hod, month, year):
         """
         Calculate HoD scores including team average for mapped parameters
@@ -134,13 +147,14 @@ class ScoringService:
         }
     
     @staticmethod
+    @read_from_replica()
     def get_department_average_for_subparam(department, sub_parameter, month, year):
         """
         Calculate average points for a sub-parameter across faculty in a department
         """
         avg = Submission.objects.filter(
-            user__department=department,
-            user__role=RoleOwner.FACULTY,
+            department=department,
+            owner_role=RoleOwner.FACULTY,
             sub_parameter=sub_parameter,
             month=month,
             year=year,
@@ -150,24 +164,39 @@ class ScoringService:
         return float(avg['avg_points'] or 0)
     
     @staticmethod
-    def get_department_comparison(month, year):
+    @read_from_replica()
+    def get_department_comparison(month, year, departments=None):
         """
         Get department-wise comparison of total scores
         """
-        departments = Department.objects.filter(is_active=True)
+        if departments is None:
+            departments = Department.objects.all()
+        departments = list(departments.filter(is_active=True))
+        dept_ids = [dept.id for dept in departments]
         comparison = []
         
+        # Faculty totals for every department in one grouped query
+        totals = dict(Submission.objects.filter(
+            department_id__in=dept_ids,
+            owner_role=RoleOwner.FACULTY,
+            month=month,
+            year=year,
+            status__in=[SubmissionStatus.HOD_APPROVED, SubmissionStatus.DEAN_APPROVED]
+        ).values('department_id').annotate(
+            total=Sum('awarded_points')
+        ).values_list('department_id', 'total'))
+        
+        faculty_counts = dict(User.objects.filter(
+            department_id__in=dept_ids,
+            role=RoleOwner.FACULTY,
+            is_active=True
+        ).values('department_id').annotate(
+            count=Count('id')
+        ).values_list('department_id', 'count'))
+        
         for dept in departments:
-            # Get all faculty submissions for this department
-            total_points = Submission.objects.filter(
-                user__department=dept,
-                user__role=RoleOwner.FACULTY,
-                month=month,
-                year=year,
-                status__in=[SubmissionStatus.HOD_APPROVED, SubmissionStatus.DEAN_APPROVED]
-            ).aggregate(total=Sum('awarded_points'))['total'] or 0
-            
-            faculty_count = dept.users.filter(role=RoleOwner.FACULTY, is_active=True).count()
+            total_points = totals.get(dept.id) or 0
+            faculty_count = faculty_counts.get(dept.id, 0)
             
             comparison.append({
                 'department': dept,
@@ -179,31 +208,40 @@ class ScoringService:
         return sorted(comparison, key=lambda x: x['total_points'], reverse=True)
     
     @staticmethod
-    def get_main_parameter_breakdown(department, month, year):
+    @read_from_replica()
+    def get_main_parameter_breakdown(department, month, year, departments=None):
         """
         Get breakdown by main parameter for a department
+        (or a set of departments, or all departments when both are None)
         """
         main_params = MainParameter.objects.filter(is_active=True)
         breakdown = []
         
+        queryset = Submission.objects.filter(
+            month=month,
+            year=year,
+            status__in=[SubmissionStatus.HOD_APPROVED, SubmissionStatus.DEAN_APPROVED]
+        )
+        if department:
+            queryset = queryset.filter(department=department)
+        elif departments is not None:
+            queryset = queryset.filter(department__in=departments)
+        
+        totals = dict(queryset.values('sub_parameter__main_parameter_id').annotate(
+            total=Sum('awarded_points')
+        ).values_list('sub_parameter__main_parameter_id', 'total'))
+        
         for param in main_params:
-            total_points = Submission.objects.filter(
-                user__department=department,
-                sub_parameter__main_parameter=param,
-                month=month,
-                year=year,
-                status__in=[SubmissionStatus.HOD_APPROVED, SubmissionStatus.DEAN_APPROVED]
-            ).aggregate(total=Sum('awarded_points'))['total'] or 0
-            
             breakdown.append({
                 'main_parameter': param,
-                'total_points': float(total_points)
+                'total_points': float(totals.get(param.id) or 0)
             })
         
         return breakdown
     
     @staticmethod
-    def get_submission_status_counts(user=None, department=None, month=None, year=None):
+    @read_from_replica()
+    def get_submission_status_counts(user=None, department=None, month=None, year=None, departments=None):
         """
         Get counts of submissions by status.
         Returns a SimpleNamespace object with status counts as attributes for template access.
@@ -215,7 +253,9 @@ class ScoringService:
         if user:
             queryset = queryset.filter(user=user)
         if department:
-            queryset = queryset.filter(user__department=department)
+            queryset = queryset.filter(department=department)
+        elif departments is not None:
+            queryset = queryset.filter(department__in=departments)
         if month:
             queryset = queryset.filter(month=month)
         if year:
@@ -240,17 +280,20 @@ class ScoringService:
         return SimpleNamespace(**normalized_counts)
     
     @staticmethod
-    def get_faculty_leaderboard(department=None, month=None, year=None, limit=10):
+    @read_from_replica()
+    def get_faculty_leaderboard(department=None, month=None, year=None, limit=10, departments=None):
         """
         Get top faculty by total points
         """
         queryset = Submission.objects.filter(
-            user__role=RoleOwner.FACULTY,
+            owner_role=RoleOwner.FACULTY,
             status__in=[SubmissionStatus.HOD_APPROVED, SubmissionStatus.DEAN_APPROVED]
         )
         
         if department:
-            queryset = queryset.filter(user__department=department)
+            queryset = queryset.filter(department=department)
+        elif departments is not None:
+            queryset = queryset.filter(department__in=departments)
         if month:
             queryset = queryset.filter(month=month)
         if year:
@@ -262,3 +305,339 @@ class ScoringService:
         ).order_by('-total_points')[:limit]
         
         return list(leaderboard)
+    
+    @staticmethod
+    @read_from_replica()
+    def get_data_watermark(*querysets):
+        """
+        Cheap "last change" marker for dashboard data.
+        Combines the latest updated_at and the row count of each queryset
+        (the count catches deletes, which do not move updated_at).
+        """
+        parts = []
+        for queryset in querysets:
+            marker = queryset.order_by().aggregate(latest=Max('updated_at'), count=Count('id'))
+            latest = marker['latest'].isoformat() if marker['latest'] else '-'
+            parts.append(f"{latest}:{marker['count']}")
+        return '|'.join(parts)
+
+
+class WindowSum(Func):
+    """
+    SUM() usable as a window over an already aggregated column.
+    Django's Sum aggregate refuses to wrap another aggregate.
+    """
+    function = 'SUM'
+    window_compatible = True
+
+
+class TrendService:
+    """
+    Service for multi-month score trends.
+    Each series is computed with one grouped query over the whole range,
+    using window functions for running totals and month-over-month deltas.
+    """
+    
+    APPROVED_STATUSES = [SubmissionStatus.HOD_APPROVED, SubmissionStatus.DEAN_APPROVED]
+    
+    @staticmethod
+    def period_index(month, year):
+        """
+        Convert (month, year) into a monotonically increasing month index
+        """
+        return year * 12 + month - 1
+    
+    @staticmethod
+    def get_periods(start, end):
+        """
+        List every (month, year) between start and end inclusive
+        """
+        first = TrendService.period_index(*start)
+        last = TrendService.period_index(*end)
+        return [(index % 12 + 1, index // 12) for index in range(first, last + 1)]
+    
+    @staticmethod
+    def get_default_range(month, year, months=12):
+        """
+        Get the (start, end) range covering the last N months up to month/year
+        """
+        last = TrendService.period_index(month, year)
+        first = last - months + 1
+        return (first % 12 + 1, first // 12), (month, year)
+    
+    @staticmethod
+    def _build_series(queryset, key_field, start, end, labels):
+        """
+        Group approved submissions by key and month in a single query and
+        expand the rows into dense monthly series (missing months are zero)
+        """
+        first = TrendService.period_index(*start)
+        last = TrendService.period_index(*end)
+        period = F('year') * 12 + F('month') - 1
+        partition = [F(key_field)]
+        ordering = [F('year').asc(), F('month').asc()]
+        
+        rows = queryset.filter(
+            status__in=TrendService.APPROVED_STATUSES,
+            year__gte=start[1],
+            year__lte=end[1],
+        ).annotate(
+            period=period
+        ).filter(
+            period__gte=first,
+            period__lte=last
+        ).values(key_field, 'year', 'month').annotate(
+            total_points=Sum('awarded_points'),
+            submission_count=Count('id')
+        ).annotate(
+            running_total=Window(WindowSum('total_points'), partition_by=partition, order_by=ordering),
+            previous_points=Window(Lag('total_points'), partition_by=partition, order_by=ordering),
+            previous_period=Window(Lag(period), partition_by=partition, order_by=ordering),
+        ).order_by(key_field, 'year', 'month')
+        
+        # Index rows by key and period
+        by_key = {}
+        for row in rows:
+            index = TrendService.period_index(row['month'], row['year'])
+            by_key.setdefault(row[key_field], {})[index] = row
+        
+        periods = TrendService.get_periods(start, end)
+        series = []
+        for key, label in labels.items():
+            key_rows = by_key.get(key, {})
+            points = []
+            running_total = 0.0
+            previous_total = 0.0
+            for month, year in periods:
+                row = key_rows.get(TrendService.period_index(month, year))
+                if row:
+                    total = float(row['total_points'] or 0)
+                    running_total = float(row['running_total'] or 0)
+                    # LAG returns the previous *present* month; a gap means
+                    # the calendar month before had no approved points
+                    if row['previous_period'] == TrendService.period_index(month, year) - 1:
+                        delta = total - float(row['previous_points'] or 0)
+                    else:
+                        delta = total
+                    count = row['submission_count']
+                else:
+                    total = 0.0
+                    delta = -previous_total
+                    count = 0
+                points.append({
+                    'month': month,
+                    'year': year,
+                    'label': format_month_year(month, year),
+                    'total_points': total,
+                    'running_total': running_total,
+                    'delta': delta,
+                    'submission_count': count,
+                })
+                previous_total = total
+            series.append({'key': key, 'label': label, 'points': points})
+        
+        return series
+    
+    @staticmethod
+    def get_user_trend(user, start, end):
+        """
+        Get the monthly series of approved points for a single user
+        """
+        queryset = Submission.objects.filter(user=user)
+        return TrendService._build_series(queryset, 'user_id', start, end, {user.id: user.full_name})
+    
+    @staticmethod
+    def get_department_trend(start, end, departments=None):
+        """
+        Get monthly faculty point series for each department
+        """
+        if departments is None:
+            departments = Department.objects.filter(is_active=True)
+        labels = {dept.id: dept.name for dept in departments}
+        
+        queryset = Submission.objects.filter(
+            department_id__in=list(labels),
+            owner_role=RoleOwner.FACULTY
+        )
+        return TrendService._build_series(queryset, 'department_id', start, end, labels)
+    
+    @staticmethod
+    def get_main_parameter_trend(start, end, departments=None):
+        """
+        Get monthly point series for each main parameter, optionally
+        restricted to a set of departments
+        """
+        labels = dict(MainParameter.objects.filter(is_active=True).values_list('id', 'name'))
+        
+        queryset = Submission.objects.filter(sub_parameter__main_parameter_id__in=list(labels))
+        if departments is not None:
+            queryset = queryset.filter(department__in=departments)
+        return TrendService._build_series(
+            queryset, 'sub_parameter__main_parameter_id', start, end, labels
+        )
+
+
+class FieldAnalyticsService:
+    """
+    Statistics of one dynamic field's values over a scope of submissions
+    (a year, optionally a month and a department, optionally approved
+    submissions only), computed in SQL over the typed value columns.
+    
+    Reports are cached per (field, scope, data watermark): any write to the
+    scope's values, or a review of its submissions, changes the watermark,
+    so a cached report is never stale.
+    """
+    
+    HISTOGRAM_BINS = 10
+    TOP_CHOICES = 10
+    APPROVED_STATUSES = [SubmissionStatus.HOD_APPROVED, SubmissionStatus.DEAN_APPROVED]
+    
+    @staticmethod
+    def scoped_values(field, year=None, month=None, department=None, approved_only=False):
+        """The field's values on submissions in scope"""
+        values = SubmissionFieldValue.objects.filter(field=field)
+        if year:
+            values = values.filter(submission__year=year)
+        if month:
+            values = values.filter(submission__month=month)
+        if department:
+            values = values.filter(submission__department=department)
+        if approved_only:
+            values = values.filter(submission__status__in=FieldAnalyticsService.APPROVED_STATUSES)
+        return values
+    
+    @staticmethod
+    def cache_key(field, scope, watermark):
+        digest = hashlib.sha256(
+            json.dumps([field.field_type, field.choices, scope, watermark], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return f'field-analytics:{field.pk}:{digest}'
+    
+    @staticmethod
+    @read_from_replica()
+    def get_report(field, year=None, month=None, department=None, approved_only=False):
+        """
+        Report of a field's values in scope: {'summary': field_stats(),
+        'histogram': [...], 'top_choices': [...], 'by_department': [...]}.
+        Histograms bucket number and percentage values into equal ranges and
+        date values by month; top choices are given for select and
+        multiselect fields.
+        """
+        scope = {
+            'year': year,
+            'month': month,
+            'department': department.pk if department else None,
+            'approved_only': approved_only,
+        }
+        values = FieldAnalyticsService.scoped_values(field, year, month, department, approved_only)
+        markers = [values]
+        if approved_only:
+            # Reviews move submissions in and out of scope without touching values
+            markers.append(Submission.objects.filter(pk__in=values.values('submission_id')))
+        watermark = ScoringService.get_data_watermark(*markers)
+        
+        key = FieldAnalyticsService.cache_key(field, scope, watermark)
+        report = cache.get(key)
+        if report is None:
+            report = FieldAnalyticsService.build_report(field, values)
+            cache.set(key, report, settings.FIELD_ANALYTICS_CACHE_TIMEOUT)
+        return report
+    
+    @staticmethod
+    def build_report(field, values):
+        summary = values.field_stats(field)
+        return {
+            'summary': summary,
+            'histogram': FieldAnalyticsService.get_histogram(field, values, summary),
+            'top_choices': FieldAnalyticsService.get_top_choices(field, values),
+            'by_department': FieldAnalyticsService.get_department_breakdown(field, values),
+        }
+    
+    @staticmethod
+    def get_histogram(field, values, summary):
+        """
+        [{'start', 'end', 'count'}] over equal ranges of number and
+        percentage values, or [{'month', 'count'}] for date values
+        """
+        if not summary['count']:
+            return []
+        column = SubmissionFieldValue.typed_column(field.field_type)
+        if column == 'value_date':
+            return list(
+                values.filter(value_date__isnull=False).annotate(
+                    month=TruncMonth('value_date')
+                ).values('month').annotate(count=Count('pk')).order_by('month')
+            )
+        if column != 'value_num':
+            return []
+        
+        bins = FieldAnalyticsService.HISTOGRAM_BINS
+        if field.field_type == FieldType.PERCENTAGE:
+            low, high = Decimal(0), Decimal(100)
+        else:
+            low, high = summary['min'], summary['max']
+        width = (high - low) / bins
+        if width <= 0:
+            return [{'start': low, 'end': high, 'count': summary['count']}]
+        
+        bucket = Greatest(
+            Least(
+                Cast(Floor((F('value_num') - Value(low)) / Value(width)), IntegerField()),
+                Value(bins - 1)
+            ),
+            Value(0)
+        )
+        counts = dict(
+            values.filter(value_num__isnull=False).annotate(bucket=bucket).values('bucket').annotate(
+                count=Count('pk')
+            ).values_list('bucket', 'count')
+        )
+        return [
+            {'start': low + width * i, 'end': low + width * (i + 1), 'count': counts.get(i, 0)}
+            for i in range(bins)
+        ]
+    
+    @staticmethod
+    def get_top_choices(field, values):
+        """[{'value', 'label', 'count'}] of the most chosen select or multiselect choices"""
+        limit = FieldAnalyticsService.TOP_CHOICES
+        if field.field_type == FieldType.SELECT:
+            rows = values.exclude(value='').values('value').annotate(
+                count=Count('pk')
+            ).order_by('-count', 'value').values_list('value', 'count')[:limit]
+        elif field.field_type == FieldType.MULTISELECT:
+            # Expand the choice arrays in the database rather than here
+            sql, params = values.filter(value_json__isnull=False).values('value_json').query.sql_with_params()
+            connection = connections[values.db]
+            if connection.vendor == 'postgresql':
+                expand = 'jsonb_array_elements_text(v.value_json) AS choice(value)'
+            else:
+                expand = 'json_each(v.value_json) AS choice'
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT choice.value, COUNT(*) FROM ({sql}) v CROSS JOIN {expand} '
+                    f'GROUP BY choice.value ORDER BY COUNT(*) DESC, choice.value LIMIT %s',
+                    (*params, limit)
+                )
+                rows = cursor.fetchall()
+        else:
+            return []
+        labels = dict(field.get_choices_list())
+        return [{'value': value, 'label': labels.get(value, value), 'count': count} for value, count in rows]
+    
+    @staticmethod
+    def get_department_breakdown(field, values):
+        """[{'department', 'count', ...}] per department, with sum and avg for numbers"""
+        column = SubmissionFieldValue.typed_column(field.field_type)
+        if column is None:
+            values = values.exclude(value='')
+        else:
+            values = values.filter(**{f'{column}__isnull': False})
+        aggregates = {'count': Count('pk')}
+        if column == 'value_num':
+            aggregates.update(sum=Sum('value_num'), avg=Avg('value_num'))
+        return list(
+            values.values(department=F('submission__department__name')).annotate(
+                **aggregates
+            ).order_by('department')
+        )
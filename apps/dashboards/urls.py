@@ -9,4 +9,10 @@ app_name = 'dashboards'
 
 urlpatterns = [
     path('', views.dashboard_redirect, name='dashboard'),
+    path('trends/', views.trend_data, name='trends'),
+    path('charts/department-comparison/', views.chart_department_comparison, name='chart_department_comparison'),
+    path('charts/parameter-breakdown/', views.chart_parameter_breakdown, name='chart_parameter_breakdown'),
+    path('charts/leaderboard/', views.chart_leaderboard, name='chart_leaderboard'),
+    path('charts/status-counts/', views.chart_status_counts, name='chart_status_counts'),
+    path('fields/', views.field_report, name='field_report'),
 ]
@@ -5,10 +5,21 @@ Views for dashboards app - Role-based dashboards with charts
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
-from apps.dashboards.services import ScoringService
-from apps.common.utils import get_current_month_year
+from django.conf import settings
+from django.core.exceptions import BadRequest, PermissionDenied
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from apps.dashboards.services import FieldAnalyticsService, ScoringService, TrendService
+from apps.common.constants import MONTHS
+from apps.common.decorators import admin_required
+from apps.common.utils import get_current_month_year, format_month_year, parse_positive_int
+from apps.common.routers import read_from_replica
 from apps.departments.models import Department
+from apps.forms_builder.models import DynamicField
 from apps.kpi.models import MainParameter
+from apps.submissions.models import Submission
+from django.contrib.auth import get_user_model
+import hashlib
 import json
 
 
@@ -100,6 +111,7 @@ def get_hod_dashboard_data(request):
     }
 
 
+@read_from_replica()
 def get_dean_dashboard_data(request):
     """Get data for Dean dashboard"""
     month = int(request.GET.get('month', get_current_month_year()[0]))
@@ -109,8 +121,10 @@ def get_dean_dashboard_data(request):
     dept_comparison = ScoringService.get_department_comparison(month, year)
     
     # Filter to only Dean's departments
-    dean_depts = request.user.dean_departments.all()
-    dept_comparison = [d for d in dept_comparison if d.get('department') in dean_depts]
+    dean_dept_ids = request.user.authz.dean_department_ids
+    dept_comparison = [
+        d for d in dept_comparison if d.get('department') and d['department'].pk in dean_dept_ids
+    ]
     
     # Get faculty leaderboard across all departments
     leaderboard = ScoringService.get_faculty_leaderboard(month=month, year=year, limit=20)
@@ -131,6 +145,7 @@ def get_dean_dashboard_data(request):
     }
 
 
+@read_from_replica()
 def get_admin_dashboard_data(request):
     """Get data for Admin dashboard"""
     month = int(request.GET.get('month', get_current_month_year()[0]))
@@ -153,23 +168,8 @@ def get_admin_dashboard_data(request):
         limit=20
     )
     
-    # Get main parameter breakdown
-    if dept_obj:
-        param_breakdown = ScoringService.get_main_parameter_breakdown(dept_obj, month, year)
-    else:
-        # Aggregate across all departments
-        param_breakdown = []
-        main_params = MainParameter.objects.filter(is_active=True)
-        for param in main_params:
-            total = sum(
-                ScoringService.get_main_parameter_breakdown(dept['department'], month, year)[0]['total_points']
-                for dept in dept_comparison
-                if dept['department']
-            )
-            param_breakdown.append({
-                'main_parameter': param,
-                'total_points': total
-            })
+    # Get main parameter breakdown (all departments when no filter)
+    param_breakdown = ScoringService.get_main_parameter_breakdown(dept_obj, month, year)
     
     # Prepare chart data
     dept_labels = [d['department'].name for d in dept_comparison]
@@ -190,3 +190,293 @@ def get_admin_dashboard_data(request):
         'param_labels': json.dumps(param_labels),
         'param_points': json.dumps(param_points),
     }
+
+
+def _parse_period(value):
+    """Parse a 'YYYY-MM' query parameter into a (month, year) tuple"""
+    year, month = value.split('-')
+    month, year = int(month), int(year)
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid month in period: {value}")
+    return month, year
+
+
+@login_required
+@read_from_replica()
+def trend_data(request):
+    """Monthly trend series (JSON) for the Dean and Admin dashboards"""
+    user = request.user
+    if not (user.is_admin or user.is_dean):
+        return JsonResponse({'error': 'You do not have permission to view trends.'}, status=403)
+    
+    scope = request.GET.get('scope', 'department')
+    month, year = get_current_month_year()
+    default_start, default_end = TrendService.get_default_range(month, year)
+    
+    try:
+        start = _parse_period(request.GET['start']) if request.GET.get('start') else default_start
+        end = _parse_period(request.GET['end']) if request.GET.get('end') else default_end
+    except ValueError:
+        return JsonResponse({'error': 'Periods must use the YYYY-MM format.'}, status=400)
+    
+    months = TrendService.period_index(*end) - TrendService.period_index(*start) + 1
+    if months < 1 or months > settings.TREND_MAX_MONTHS:
+        return JsonResponse(
+            {'error': f'Range must cover between 1 and {settings.TREND_MAX_MONTHS} months.'},
+            status=400
+        )
+    
+    # Deans only see their own departments
+    departments = None if user.is_admin else Department.objects.filter(pk__in=user.authz.dean_department_ids)
+    if request.GET.get('department'):
+        department_id = parse_positive_int(request.GET['department'])
+        if department_id is None:
+            return JsonResponse({'error': 'Department must be a positive integer id.'}, status=400)
+        departments = (departments if departments is not None else Department.objects.all()).filter(
+            id=department_id
+        )
+    
+    if scope == 'department':
+        series = TrendService.get_department_trend(start, end, departments)
+    elif scope == 'main_parameter':
+        series = TrendService.get_main_parameter_trend(start, end, departments)
+    elif scope == 'user':
+        from apps.accounts.models import User
+        user_id = parse_positive_int(request.GET.get('user'))
+        if user_id is None:
+            return JsonResponse({'error': 'User must be a positive integer id.'}, status=400)
+        faculty = User.objects.filter(id=user_id)
+        if departments is not None:
+            faculty = faculty.filter(department__in=departments)
+        faculty = faculty.first()
+        if faculty is None:
+            return JsonResponse({'error': 'User not found.'}, status=404)
+        series = TrendService.get_user_trend(faculty, start, end)
+    else:
+        return JsonResponse({'error': f'Unknown scope: {scope}'}, status=400)
+    
+    return JsonResponse({
+        'scope': scope,
+        'start': f'{start[1]}-{start[0]:02d}',
+        'end': f'{end[1]}-{end[0]:02d}',
+        'periods': [format_month_year(m, y) for m, y in TrendService.get_periods(start, end)],
+        'series': series,
+    })
+
+
+def _get_chart_scope(request):
+    """
+    Resolve month/year and the departments a chart request may see.
+    Cached on the request so the ETag function and the view share it.
+    """
+    if hasattr(request, '_chart_scope'):
+        return request._chart_scope
+    
+    user = request.user
+    current_month, current_year = get_current_month_year()
+    try:
+        month = int(request.GET.get('month', current_month))
+        year = int(request.GET.get('year', current_year))
+        department_id = int(request.GET['department']) if request.GET.get('department') else None
+    except ValueError:
+        raise BadRequest('month, year and department must be integers.')
+    
+    scope = {'month': month, 'year': year, 'department': None, 'departments': None, 'user': None}
+    
+    if user.is_admin:
+        if department_id:
+            scope['department'] = Department.objects.filter(id=department_id).first()
+    elif user.is_dean:
+        dean_dept_ids = user.authz.dean_department_ids
+        if department_id:
+            if department_id not in dean_dept_ids:
+                raise PermissionDenied
+            scope['department'] = Department.objects.filter(id=department_id).first()
+        else:
+            scope['departments'] = Department.objects.filter(pk__in=dean_dept_ids)
+    elif user.is_hod:
+        scope['department'] = user.department
+    else:
+        scope['user'] = user
+    
+    request._chart_scope = scope
+    return scope
+
+
+def _scoped_submissions(scope):
+    """Submissions visible in a chart scope"""
+    queryset = Submission.objects.filter(month=scope['month'], year=scope['year'])
+    if scope['user']:
+        queryset = queryset.filter(user=scope['user'])
+    elif scope['department']:
+        queryset = queryset.filter(department=scope['department'])
+    elif scope['departments'] is not None:
+        queryset = queryset.filter(department__in=scope['departments'])
+    return queryset
+
+
+def _chart_etag(chart, roles=None, extra_querysets=()):
+    """
+    Build an ETag function for a chart endpoint.
+    The tag is derived from the scope and the data watermark only,
+    so a matching If-None-Match returns 304 before any aggregation runs.
+    Runs before the view, so it also enforces the allowed roles.
+    """
+    def etag_func(request, *args, **kwargs):
+        if roles and not any(getattr(request.user, role) for role in roles):
+            raise PermissionDenied
+        scope = _get_chart_scope(request)
+        watermark = ScoringService.get_data_watermark(_scoped_submissions(scope), *extra_querysets)
+        key = '|'.join([
+            chart,
+            request.GET.urlencode(),
+            str(scope['month']),
+            str(scope['year']),
+            str(scope['department'].id if scope['department'] else ''),
+            ','.join(str(pk) for pk in scope['departments'].values_list('id', flat=True))
+            if scope['departments'] is not None else '',
+            str(scope['user'].id if scope['user'] else ''),
+            watermark,
+        ])
+        return hashlib.sha256(key.encode()).hexdigest()
+    return etag_func
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_chart_etag(
+    'department_comparison', ('is_admin', 'is_dean'),
+    [Department.objects.all(), get_user_model().objects.all()]
+))
+def chart_department_comparison(request):
+    """Department comparison chart data (JSON)"""
+    scope = _get_chart_scope(request)
+    
+    if scope['department']:
+        departments = Department.objects.filter(id=scope['department'].id)
+    else:
+        departments = scope['departments']
+    comparison = ScoringService.get_department_comparison(scope['month'], scope['year'], departments)
+    
+    return JsonResponse({
+        'month': scope['month'],
+        'year': scope['year'],
+        'labels': [item['department'].name for item in comparison],
+        'total_points': [item['total_points'] for item in comparison],
+        'average_points': [item['average_points'] for item in comparison],
+        'faculty_count': [item['faculty_count'] for item in comparison],
+    })
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_chart_etag(
+    'parameter_breakdown', ('is_admin', 'is_dean', 'is_hod'), [MainParameter.objects.all()]
+))
+def chart_parameter_breakdown(request):
+    """Main parameter breakdown chart data (JSON)"""
+    scope = _get_chart_scope(request)
+    
+    breakdown = ScoringService.get_main_parameter_breakdown(
+        scope['department'],
+        scope['month'],
+        scope['year'],
+        departments=scope['departments']
+    )
+    
+    return JsonResponse({
+        'month': scope['month'],
+        'year': scope['year'],
+        'labels': [item['main_parameter'].name for item in breakdown],
+        'total_points': [item['total_points'] for item in breakdown],
+    })
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_chart_etag(
+    'leaderboard', ('is_admin', 'is_dean', 'is_hod'), [get_user_model().objects.all()]
+))
+def chart_leaderboard(request):
+    """Faculty leaderboard data (JSON)"""
+    scope = _get_chart_scope(request)
+    try:
+        limit = min(int(request.GET.get('limit', 20)), 100)
+    except ValueError:
+        raise BadRequest('limit must be an integer.')
+    
+    leaderboard = ScoringService.get_faculty_leaderboard(
+        department=scope['department'],
+        month=scope['month'],
+        year=scope['year'],
+        limit=limit,
+        departments=scope['departments']
+    )
+    
+    return JsonResponse({
+        'month': scope['month'],
+        'year': scope['year'],
+        'entries': [
+            {
+                'user_id': entry['user__id'],
+                'full_name': entry['user__full_name'],
+                'department': entry['user__department__name'],
+                'total_points': float(entry['total_points'] or 0),
+                'submission_count': entry['submission_count'],
+            }
+            for entry in leaderboard
+        ],
+    })
+
+
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_chart_etag('status_counts'))
+def chart_status_counts(request):
+    """Submission status counts (JSON)"""
+    scope = _get_chart_scope(request)
+    
+    counts = ScoringService.get_submission_status_counts(
+        user=scope['user'],
+        department=scope['department'],
+        month=scope['month'],
+        year=scope['year'],
+        departments=scope['departments']
+    )
+    
+    return JsonResponse({
+        'month': scope['month'],
+        'year': scope['year'],
+        'counts': vars(counts),
+    })
+
+
+@admin_required
+def field_report(request):
+    """Statistics of one dynamic form field's values over a year, month and department (Admin only)"""
+    fields = DynamicField.objects.filter(is_active=True).select_related(
+        'template__sub_parameter__main_parameter'
+    ).order_by('template__sub_parameter__main_parameter__order', 'template__sub_parameter__order', 'order')
+    field_id = parse_positive_int(request.GET.get('field'))
+    field = next((field for field in fields if field.pk == field_id), None) if field_id else None
+    department_id = parse_positive_int(request.GET.get('department'))
+    department = Department.objects.filter(pk=department_id).first() if department_id else None
+    scope = {
+        'year': parse_positive_int(request.GET.get('year')) or get_current_month_year()[1],
+        'month': parse_positive_int(request.GET.get('month')),
+        'department': department,
+        'approved_only': request.GET.get('approved') == '1',
+    }
+    
+    report = FieldAnalyticsService.get_report(field, **scope) if field else None
+    
+    context = {
+        'fields': fields,
+        'field': field,
+        'scope': scope,
+        'report': report,
+        'histogram_max': max((row['count'] for row in report['histogram']), default=0) if report else 0,
+        'departments': Department.objects.filter(is_active=True).order_by('name'),
+        'months': MONTHS,
+    }
+    return render(request, 'dashboards/field_report.html', context)
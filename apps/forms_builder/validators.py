@@ -37,11 +37,31 @@ def validate_field_name(value):
         )
 
 
+# Leading bytes of each allowed file type. Types without an entry (added
+# through ALLOWED_FILE_TYPES) are only checked by extension.
+OLE_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+ZIP_SIGNATURES = (b'PK\x03\x04', b'PK\x05\x06')
+FILE_SIGNATURES = {
+    '.pdf': (b'%PDF-',),
+    '.png': (b'\x89PNG\r\n\x1a\n',),
+    '.jpg': (b'\xff\xd8\xff',),
+    '.jpeg': (b'\xff\xd8\xff',),
+    '.zip': ZIP_SIGNATURES,
+    '.docx': ZIP_SIGNATURES,
+    '.xlsx': ZIP_SIGNATURES,
+    '.doc': (OLE_SIGNATURE,),
+    '.xls': (OLE_SIGNATURE,),
+}
+SIGNATURE_LENGTH = max(len(signature) for signatures in FILE_SIGNATURES.values() for signature in signatures)
+
+
 def validate_file_size(file):
     """
     Validate uploaded file size
+    Accepts an uploaded file or a size in bytes (for streamed uploads)
     """
-    if file.size > settings.MAX_UPLOAD_SIZE:
+    size = getattr(file, 'size', file)
+    if size > settings.MAX_UPLOAD_SIZE:
         raise ValidationError(
             f"File size cannot exceed {settings.MAX_UPLOAD_SIZE / (1024*1024):.1f}MB"
         )
@@ -57,3 +77,14 @@ def validate_file_extension(filename):
         raise ValidationError(
             f"File type {ext} is not allowed. Allowed types: {', '.join(settings.ALLOWED_FILE_TYPES)}"
         )
+
+
+def validate_file_signature(filename, head):
+    """
+    Validate that a file's leading bytes match its extension
+    """
+    import os
+    ext = os.path.splitext(filename)[1].lower()
+    signatures = FILE_SIGNATURES.get(ext)
+    if signatures and not head.startswith(signatures):
+        raise ValidationError(f"File contents do not match the {ext} file type")
@@ -99,8 +99,8 @@ class NotificationService:
         )
         
         # Also notify HoD
-        if submission.user.department:
-            hod = submission.user.department.get_hod()
+        if submission.department:
+            hod = submission.department.get_hod()
             if hod:
                 NotificationService.create_notification(
                     recipient=hod,
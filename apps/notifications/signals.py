@@ -23,8 +23,8 @@ def create_submission_notifications(sender, instance, created, **kwargs):
     if instance.status == SubmissionStatus.SUBMITTED:
         if instance.sub_parameter.approval_routing == 'HOD':
             # Notify HoD of the department
-            if instance.user.department:
-                hod = instance.user.department.get_hod()
+            if instance.department:
+                hod = instance.department.get_hod()
                 if hod:
                     NotificationService.notify_submission_submitted(instance, hod)
         else:
@@ -47,8 +47,8 @@ def create_submission_notifications(sender, instance, created, **kwargs):
     # HOD_APPROVED - notify Dean
     elif instance.status == SubmissionStatus.HOD_APPROVED:
         # Notify all deans who manage this department
-        if instance.user.department:
-            deans = instance.user.department.deans.filter(is_active=True)
+        if instance.department:
+            deans = instance.department.deans.filter(is_active=True)
             for dean in deans:
                 NotificationService.notify_submission_hod_approved(instance, dean)
     
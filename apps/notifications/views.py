@@ -12,9 +12,8 @@ from apps.notifications.services import NotificationService
 @login_required
 def notification_list(request):
     """List user's notifications"""
-    notifications = Notification.objects.filter(
-        recipient=request.user
-    ).order_by('-created_at')[:50]
+    user_notifications = Notification.objects.filter(recipient=request.user)
+    notifications = user_notifications.order_by('-created_at')[:50]
     
     # Mark as read if requested
     if request.GET.get('mark_read') == 'all':
@@ -24,7 +23,7 @@ def notification_list(request):
     
     context = {
         'notifications': notifications,
-        'unread_count': notifications.filter(is_read=False).count()
+        'unread_count': user_notifications.filter(is_read=False).count()
     }
     return render(request, 'notifications/notification_list.html', context)
 
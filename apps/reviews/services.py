@@ -2,8 +2,12 @@
 """
 Service layer for review and approval workflow
 """
-from django.db import transaction
+from datetime import datetime
+from django.db import connection, transaction
+from django.db.models import Case, CharField, DecimalField, F, Q, TextField, Value, When
 from django.utils import timezone
+from apps.accounts.models import User
+from apps.common.models import ActivityLog
 from apps.submissions.models import Submission
 from apps.reviews.models import Review, DeanApproval
 from apps.common.constants import SubmissionStatus, ActivityAction, ApprovalRouting
@@ -31,15 +35,14 @@ class ReviewService:
         if reviewer.is_hod:
             # HoD sees submissions from their department with HOD routing
             queryset = queryset.filter(
-                user__department=reviewer.department,
+                department=reviewer.department,
                 sub_parameter__approval_routing=ApprovalRouting.HOD
             )
         elif reviewer.is_dean:
             # Dean sees HOD-approved submissions from their departments
-            dean_depts = reviewer.dean_departments.all()
             queryset = Submission.objects.filter(
                 status=SubmissionStatus.HOD_APPROVED,
-                user__department__in=dean_depts
+                department_id__in=reviewer.authz.dean_department_ids
             ).select_related(
                 'user', 'sub_parameter', 'sub_parameter__main_parameter'
             ).order_by('-reviewed_at')
@@ -71,7 +74,7 @@ class ReviewService:
         cutoff_window = CutoffWindow.get_active_window(
             submission.month,
             submission.year,
-            submission.user.department
+            submission.department
         )
         
         if cutoff_window and not reviewer.can_override_deadlines:
@@ -215,11 +218,14 @@ class ReviewService:
         )
         
         # Update all submissions to DEAN_APPROVED
+        # (queryset updates skip auto_now, so bump updated_at explicitly)
+        now = timezone.now()
         submissions.update(
             status=SubmissionStatus.DEAN_APPROVED,
             dean_approved=True,
             dean_approver=dean,
-            dean_approved_at=timezone.now()
+            dean_approved_at=now,
+            updated_at=now
         )
         
         log_activity(
@@ -232,3 +238,158 @@ class ReviewService:
         )
         
         return dean_approval
+
+
+class TimelineService:
+    """
+    Merged, newest-first history of a submission or user built from
+    ActivityLog, Review and DeanApproval rows in one UNION query.
+    
+    Pages are keyset paginated on (timestamp desc, kind, id desc): the cursor
+    of the last event on a page is passed back as `before` to fetch the next
+    one, so every page is an index range scan whatever its depth.
+    """
+    
+    KIND_ACTIVITY = 'activity'
+    KIND_APPROVAL = 'approval'
+    KIND_REVIEW = 'review'
+    
+    # Reviews carry points and status changes, so the matching activity log
+    # entries would only duplicate them in a submission timeline
+    REVIEW_ACTIONS = [ActivityAction.APPROVED, ActivityAction.REJECTED, ActivityAction.NEEDS_REVISION]
+    
+    DEFAULT_PAGE_SIZE = 20
+    
+    @staticmethod
+    def encode_cursor(event):
+        return f"{event['at'].isoformat()}~{event['kind']}~{event['id']}"
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """Parse a cursor string, returning None when it is malformed"""
+        try:
+            timestamp, kind, pk = cursor.split('~')
+            return datetime.fromisoformat(timestamp), kind, int(pk)
+        except (AttributeError, ValueError):
+            return None
+    
+    @staticmethod
+    def _events(queryset, kind, at, actor, action, description, points):
+        """Project a queryset onto the common timeline columns (same order for every branch)"""
+        return queryset.annotate(
+            event_kind=Value(kind, output_field=CharField()),
+            event_id=F('pk'),
+            event_at=at,
+            event_actor=actor,
+            event_action=action,
+            event_description=description,
+            event_comment=F('comment'),
+            event_points=points,
+        ).values(
+            'event_kind', 'event_id', 'event_at', 'event_actor', 'event_action',
+            'event_description', 'event_comment', 'event_points'
+        )
+    
+    @staticmethod
+    def _before(queryset, kind, field, cursor):
+        """Keep rows that sort after the cursor in (timestamp desc, kind, id desc) order"""
+        if cursor is None:
+            return queryset
+        timestamp, cursor_kind, pk = cursor
+        if kind < cursor_kind:
+            return queryset.filter(**{f'{field}__lt': timestamp})
+        if kind > cursor_kind:
+            return queryset.filter(**{f'{field}__lte': timestamp})
+        return queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'pk__lt': pk}))
+    
+    @staticmethod
+    def _branches(submission=None, user=None):
+        """(kind, timestamp field, queryset, annotations) for each event source"""
+        no_points = Value(None, output_field=DecimalField(max_digits=10, decimal_places=2))
+        no_text = Value('', output_field=TextField())
+        approval_action = Case(
+            When(is_approved=True, then=Value(ActivityAction.APPROVED)),
+            default=Value(ActivityAction.REJECTED),
+            output_field=CharField(),
+        )
+        
+        if submission is not None:
+            # Nothing about a submission is logged before it exists, which
+            # also lets PostgreSQL skip older activity log partitions
+            logs = ActivityLog.objects.in_period(start=submission.created_at).filter(
+                target_model='Submission', target_id=submission.pk
+            ).exclude(action__in=TimelineService.REVIEW_ACTIONS)
+            reviews = Review.objects.filter(submission=submission)
+            approvals = DeanApproval.objects.filter(
+                faculty_id=submission.user_id, month=submission.month, year=submission.year
+            )
+        else:
+            logs = ActivityLog.objects.filter(target_model='User', target_id=user.pk)
+            reviews = Review.objects.filter(submission__user=user)
+            approvals = DeanApproval.objects.filter(faculty=user)
+        
+        return [
+            (TimelineService.KIND_ACTIVITY, 'created_at', logs, {
+                'actor': F('actor_id'), 'action': F('action'), 'description': F('description'),
+                'points': no_points,
+            }),
+            (TimelineService.KIND_APPROVAL, 'updated_at', approvals, {
+                'actor': F('dean_id'), 'action': approval_action, 'description': no_text,
+                'points': F('total_points'),
+            }),
+            (TimelineService.KIND_REVIEW, 'created_at', reviews, {
+                'actor': F('reviewer_id'), 'action': F('action'), 'description': F('new_status'),
+                'points': F('awarded_points'),
+            }),
+        ]
+    
+    @staticmethod
+    def get_timeline(submission=None, user=None, before=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        One page of events for a submission or a user.
+        Returns {'events': [...], 'next_cursor': str or None}; each event is a
+        dict with kind, id, at, actor, action, action_display, description,
+        comment and points.
+        """
+        if (submission is None) == (user is None):
+            raise ValueError("Pass exactly one of submission or user")
+        
+        cursor = TimelineService.decode_cursor(before) if before else None
+        ordering = ('-event_at', 'event_kind', '-event_id')
+        per_branch = connection.features.supports_slicing_ordering_in_compound
+        
+        queries = []
+        for kind, field, queryset, columns in TimelineService._branches(submission, user):
+            queryset = TimelineService._before(queryset, kind, field, cursor)
+            events = TimelineService._events(queryset, kind, at=F(field), **columns)
+            if per_branch:
+                # Each branch stops after one page instead of sorting its whole history
+                events = events.order_by(*ordering)[:limit + 1]
+            else:
+                events = events.order_by()
+            queries.append(events)
+        
+        rows = list(queries[0].union(*queries[1:], all=True).order_by(*ordering)[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        actors = User.objects.in_bulk({row['event_actor'] for row in rows if row['event_actor']})
+        action_labels = dict(ActivityAction.CHOICES)
+        events = [
+            {
+                'kind': row['event_kind'],
+                'id': row['event_id'],
+                'at': row['event_at'],
+                'actor': actors.get(row['event_actor']),
+                'action': row['event_action'],
+                'action_display': action_labels.get(row['event_action'], row['event_action']),
+                'description': row['event_description'],
+                'comment': row['event_comment'],
+                'points': row['event_points'],
+            }
+            for row in rows
+        ]
+        return {
+            'events': events,
+            'next_cursor': TimelineService.encode_cursor(events[-1]) if has_more else None,
+        }
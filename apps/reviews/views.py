@@ -5,9 +5,10 @@ Views for reviews app - Approval workflow
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from apps.submissions.duplicates import DuplicateIndexService
 from apps.submissions.models import Submission
 from apps.reviews.forms import ReviewApproveForm, ReviewRejectForm, DeanApprovalForm
-from apps.reviews.services import ReviewService
+from apps.reviews.services import ReviewService, TimelineService
 from apps.common.decorators import hod_or_dean_required, dean_required
 from apps.common.constants import SubmissionStatus
 
@@ -25,7 +26,7 @@ def review_list(request):
     if status:
         pending_reviews = pending_reviews.filter(status=status)
     if department:
-        pending_reviews = pending_reviews.filter(user__department_id=department)
+        pending_reviews = pending_reviews.filter(department_id=department)
     
     context = {
         'pending_reviews': pending_reviews,
@@ -38,15 +39,18 @@ def review_list(request):
 @hod_or_dean_required
 def review_detail(request, pk):
     """Review submission detail with action forms"""
-    submission = get_object_or_404(Submission, pk=pk)
+    submission = get_object_or_404(
+        Submission.objects.select_related('user', 'sub_parameter', 'sub_parameter__form_template'),
+        pk=pk
+    )
     
     # Check permissions
     if request.user.is_hod:
-        if submission.user.department != request.user.department:
+        if submission.department_id != request.user.department_id:
             messages.error(request, 'You cannot review this submission.')
             return redirect('reviews:review_list')
     elif request.user.is_dean:
-        if submission.user.department not in request.user.dean_departments.all():
+        if submission.department_id not in request.user.authz.dean_department_ids:
             messages.error(request, 'You cannot review this submission.')
             return redirect('reviews:review_list')
     
@@ -55,7 +59,7 @@ def review_detail(request, pk):
     field_values = []
     if hasattr(submission.sub_parameter, 'form_template'):
         template = submission.sub_parameter.form_template
-        for field_value in submission.field_values.all():
+        for field_value in submission.field_values.select_related('field'):
             display_value = DynamicFormRenderer.get_field_value_display(
                 field_value.field,
                 field_value.value
@@ -68,8 +72,9 @@ def review_detail(request, pk):
     context = {
         'submission': submission,
         'field_values': field_values,
-        'attachments': submission.attachments.all(),
-        'reviews': submission.reviews.all()
+        'attachments': submission.attachments.select_related('blob'),
+        'timeline': TimelineService.get_timeline(submission=submission, before=request.GET.get('before')),
+        'duplicates': DuplicateIndexService.find_duplicates(submission, request.user),
     }
     return render(request, 'reviews/review_detail.html', context)
 
@@ -173,9 +178,8 @@ def dean_review_list(request):
     from apps.common.constants import UserRole
     
     # Get faculty from Dean's departments
-    dean_depts = request.user.dean_departments.all()
     faculty_list = User.objects.filter(
-        department__in=dean_depts,
+        department_id__in=request.user.authz.dean_department_ids,
         role=UserRole.FACULTY,
         is_active=True
     ).select_related('department').order_by('full_name')
@@ -193,23 +197,25 @@ def dean_review_list(request):
         month = int(month)
         year = int(year)
     
-    # Get submissions for each faculty
+    # Get HoD-approved submissions for all listed faculty in one query
+    submissions_by_faculty = {}
+    for submission in Submission.objects.filter(
+        user__in=faculty_list,
+        month=month,
+        year=year,
+        status=SubmissionStatus.HOD_APPROVED
+    ):
+        submissions_by_faculty.setdefault(submission.user_id, []).append(submission)
+    
     faculty_data = []
     for faculty in faculty_list:
-        submissions = Submission.objects.filter(
-            user=faculty,
-            month=month,
-            year=year,
-            status=SubmissionStatus.HOD_APPROVED
-        )
-        
-        if submissions.exists():
-            total_points = sum(s.awarded_points for s in submissions)
+        submissions = submissions_by_faculty.get(faculty.id)
+        if submissions:
             faculty_data.append({
                 'faculty': faculty,
                 'submissions': submissions,
-                'total_points': total_points,
-                'submission_count': submissions.count()
+                'total_points': sum(s.awarded_points for s in submissions),
+                'submission_count': len(submissions)
             })
     
     context = {
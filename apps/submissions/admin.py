@@ -3,33 +3,34 @@
 Admin configuration for submissions app
 """
 from django.contrib import admin
-from apps.submissions.models import Submission, SubmissionFieldValue, Attachment
+from apps.submissions.models import Submission, SubmissionFieldValue, Attachment, AttachmentBlob
 
 
 class SubmissionFieldValueInline(admin.TabularInline):
     model = SubmissionFieldValue
     extra = 0
-    readonly_fields = ('field', 'field_name', 'value')
+    readonly_fields = ('field', 'field_name', 'value', 'value_num', 'value_date', 'value_json')
     can_delete = False
 
 
 class AttachmentInline(admin.TabularInline):
     model = Attachment
     extra = 0
-    readonly_fields = ('file', 'original_name', 'file_size', 'content_type', 'created_at')
+    readonly_fields = ('file', 'blob', 'original_name', 'file_size', 'content_type', 'created_at')
     can_delete = False
 
 
 @admin.register(Submission)
 class SubmissionAdmin(admin.ModelAdmin):
-    list_display = ('user', 'sub_parameter', 'month', 'year', 'status', 'awarded_points', 'submitted_at', 'created_at')
-    list_filter = ('status', 'month', 'year', 'sub_parameter__main_parameter')
+    list_display = ('user', 'department', 'sub_parameter', 'month', 'year', 'status', 'awarded_points', 'submitted_at', 'created_at')
+    list_filter = ('status', 'department', 'month', 'year', 'sub_parameter__main_parameter')
     search_fields = ('user__full_name', 'user__email', 'sub_parameter__name')
     ordering = ('-created_at',)
     inlines = [SubmissionFieldValueInline, AttachmentInline]
     
     fieldsets = (
         ('Submission Info', {'fields': ('user', 'sub_parameter', 'month', 'year', 'status')}),
+        ('Attribution', {'fields': ('department', 'owner_role')}),
         ('Review Info', {'fields': ('reviewer', 'awarded_points', 'review_comment', 'reviewed_at')}),
         ('Dean Approval', {'fields': ('dean_approved', 'dean_approver', 'dean_approved_at')}),
         ('Timestamps', {'fields': ('submitted_at', 'created_at', 'updated_at')}),
@@ -44,4 +45,14 @@ class AttachmentAdmin(admin.ModelAdmin):
     list_filter = ('content_type', 'created_at')
     search_fields = ('submission__user__full_name', 'original_name')
     ordering = ('-created_at',)
-    readonly_fields = ('created_at', 'updated_at')
+    list_select_related = ('submission__user', 'submission__sub_parameter')
+    readonly_fields = ('blob', 'created_at', 'updated_at')
+
+
+@admin.register(AttachmentBlob)
+class AttachmentBlobAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'size', 'content_type', 'ref_count', 'created_at')
+    list_filter = ('content_type',)
+    search_fields = ('sha256',)
+    ordering = ('-created_at',)
+    readonly_fields = ('sha256', 'file', 'size', 'content_type', 'ref_count', 'created_at', 'updated_at')
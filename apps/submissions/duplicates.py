@@ -0,0 +1,145 @@
+"""
+Duplicate evidence detection across submissions
+
+Submissions keep the fingerprints of apps.submissions.fingerprints in the
+SubmissionFingerprint table, rebuilt when their field values or
+attachments change. Finding the likely duplicates of a submission is two
+index lookups on the fingerprint keys, whatever the number of
+submissions; title matches are then confirmed by comparing the titles,
+and only confirmed duplicates are loaded.
+"""
+from collections import defaultdict
+
+from django.db import router, transaction
+from django.db.models import Q
+
+from apps.common.constants import FingerprintKind
+from apps.submissions.fingerprints import fingerprint_submission, similarity
+from apps.submissions.models import Attachment, Submission, SubmissionFieldValue, SubmissionFingerprint
+from apps.submissions.search import schedule_reindex
+
+
+class DuplicateIndexService:
+    """
+    Maintain submission fingerprints and look up likely duplicates
+    """
+
+    BATCH_SIZE = 500
+    # Title band matches below this Jaccard similarity are coincidences
+    TITLE_SIMILARITY = 0.7
+    # Fingerprint rows read per lookup; a link pasted into every submission
+    # (a profile page, say) must not make review pages slow
+    MAX_MATCHES = 200
+
+    # Indexing
+
+    @staticmethod
+    def schedule_reindex(submission_id):
+        """Rebuild the submission's fingerprints after the current transaction commits"""
+        schedule_reindex(
+            DuplicateIndexService.index_submissions, submission_id, router.db_for_write(SubmissionFingerprint)
+        )
+
+    @staticmethod
+    def collect(submission_ids):
+        """
+        {submission id: (values, attachments)} inputs of fingerprint_submission
+        for the existing submissions among submission_ids
+        """
+        inputs = {pk: ([], []) for pk in Submission.objects.filter(pk__in=submission_ids).values_list('pk', flat=True)}
+        values = SubmissionFieldValue.objects.filter(
+            submission_id__in=inputs
+        ).order_by('submission_id', 'field__order', 'field_id').values_list(
+            'submission_id', 'field__field_type', 'value'
+        )
+        for submission_id, field_type, value in values:
+            inputs[submission_id][0].append((field_type, value))
+        attachments = Attachment.objects.filter(
+            submission_id__in=inputs, blob__isnull=False
+        ).order_by('submission_id', 'pk').values_list('submission_id', 'blob__sha256', 'original_name')
+        for submission_id, sha256, name in attachments:
+            inputs[submission_id][1].append((sha256, name))
+        return inputs
+
+    @staticmethod
+    def store(fingerprints):
+        """Replace the fingerprints of submissions with {submission id: fingerprint_submission() result}"""
+        with transaction.atomic():
+            SubmissionFingerprint.objects.filter(submission_id__in=list(fingerprints)).delete()
+            SubmissionFingerprint.objects.bulk_create(
+                [
+                    SubmissionFingerprint(submission_id=pk, kind=kind, key=key, label=label)
+                    for pk, rows in fingerprints.items()
+                    for kind, key, label in rows
+                ],
+                batch_size=2000
+            )
+
+    @staticmethod
+    def index_submissions(submission_ids):
+        """Rebuild the fingerprints of the given submissions in this process"""
+        submission_ids = sorted(set(submission_ids))
+        for start in range(0, len(submission_ids), DuplicateIndexService.BATCH_SIZE):
+            batch = submission_ids[start:start + DuplicateIndexService.BATCH_SIZE]
+            inputs = DuplicateIndexService.collect(batch)
+            DuplicateIndexService.store({
+                pk: fingerprint_submission(values, attachments) for pk, (values, attachments) in inputs.items()
+            })
+
+    # Lookups
+
+    @staticmethod
+    def find_duplicates(submission, user):
+        """
+        Other submissions visible to user that share evidence with
+        submission, most matches first. Returns a list of {'submission',
+        'matches'} dicts; matches are {'kind', 'label', 'other_label',
+        'similarity'} dicts, one per shared link, similar title or file.
+        """
+        own = {
+            key: (kind, label)
+            for key, kind, label in submission.fingerprints.values_list('key', 'kind', 'label')
+        }
+        if not own:
+            return []
+        rows = SubmissionFingerprint.objects.filter(
+            key__in=list(own)
+        ).exclude(
+            submission_id=submission.pk
+        )
+        managed = user.authz.managed_department_ids()
+        if managed is not None:
+            # Filter before the limit, so evidence shared across departments
+            # the user cannot see does not crowd out visible matches
+            rows = rows.filter(Q(submission__user=user) | Q(submission__department_id__in=managed))
+        rows = rows.order_by('-submission_id').values_list(
+            'submission_id', 'key', 'label'
+        )[:DuplicateIndexService.MAX_MATCHES]
+
+        matches = defaultdict(dict)
+        checked = set()
+        for other_pk, key, other_label in rows:
+            kind, label = own[key]
+            # Similar titles share several bands; compare each pair once
+            match_key = (other_pk, kind, label, other_label)
+            if match_key in checked:
+                continue
+            checked.add(match_key)
+            score = 1.0
+            if kind == FingerprintKind.TITLE:
+                score = similarity(label, other_label)
+                if score < DuplicateIndexService.TITLE_SIMILARITY:
+                    continue
+            matches[other_pk][match_key] = {
+                'kind': kind, 'label': label, 'other_label': other_label, 'similarity': score,
+            }
+        if not matches:
+            return []
+
+        # Only confirmed duplicates are loaded as objects
+        found = Submission.objects.select_related('user', 'sub_parameter').in_bulk(list(matches))
+        duplicates = [
+            {'submission': found[pk], 'matches': list(matches[pk].values())} for pk in matches if pk in found
+        ]
+        duplicates.sort(key=lambda duplicate: (-len(duplicate['matches']), -duplicate['submission'].pk))
+        return duplicates
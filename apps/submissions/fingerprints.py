@@ -0,0 +1,167 @@
+"""
+Fingerprints of submission evidence for duplicate detection
+
+A submission's fingerprints are keys shared by submissions that claim the
+same evidence:
+
+- url: canonical form of every URL or DOI in its text values, so
+  http/https, www., tracking parameters, fragments and trailing slashes do
+  not hide a repeated link
+- title: MinHash locality-sensitive hashing bands of its text values, so
+  titles with similar character 5-grams share at least one band key
+- file: SHA-256 of its attachment contents
+
+The rebuild_duplicate_index command computes fingerprints in a pool of
+spawned processes, so this module must not import Django.
+"""
+import hashlib
+import random
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from apps.common.constants import FieldType, FingerprintKind
+
+URL_PATTERN = re.compile(r'https?://[^\s<>"\'\]]+', re.IGNORECASE)
+DOI_PATTERN = re.compile(r'\b10\.\d{4,9}/[^\s<>"\'\]]+', re.IGNORECASE)
+TRAILING_PUNCTUATION = '.,;:!?)}\''
+TRACKING_PARAMETERS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'share', 'source'}
+HOST_PREFIXES = ('www.', 'm.')
+
+# Text values shorter than this, once normalized, are too generic to compare
+MIN_TITLE_CHARS = 20
+# Titles are compared on their first characters only
+MAX_TITLE_CHARS = 255
+SHINGLE_SIZE = 5
+# 16 bands of 4 rows: titles with Jaccard similarity 0.7 share a band with
+# probability 0.99, titles at 0.3 with probability 0.12
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+_PRIME = (1 << 61) - 1
+# Fixed seed: band keys must be identical in every process and release
+_seeded = random.Random(0x5EED)
+PERMUTATIONS = [
+    (_seeded.randrange(1, _PRIME), _seeded.randrange(0, _PRIME)) for _ in range(MINHASH_PERMUTATIONS)
+]
+NON_WORD = re.compile(r'[\W_]+')
+
+
+def fingerprint_key(kind, value):
+    """Fixed-width index key of a normalized value"""
+    return hashlib.blake2b(f'{kind}:{value}'.encode(), digest_size=16).hexdigest()
+
+
+def canonical_doi(doi):
+    return 'doi:' + doi.rstrip(TRAILING_PUNCTUATION).lower()
+
+
+def canonical_url(url):
+    """
+    Scheme-less canonical form of url: lowercase host without www./m. and
+    default ports, no fragment, tracking parameters or trailing slash, and
+    sorted query parameters. None when url has no host.
+    """
+    url = url.rstrip(TRAILING_PUNCTUATION)
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or '').rstrip('.')
+        port = parts.port
+    except ValueError:
+        return None
+    if not host:
+        return None
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if port and port not in (80, 443):
+        host = f'{host}:{port}'
+    path = re.sub(r'/{2,}', '/', parts.path).rstrip('/')
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMETERS and not name.lower().startswith('utm_')
+    ))
+    return f'{host}{path}?{query}' if query else f'{host}{path}'
+
+
+def url_fingerprints(text):
+    """Canonical URLs and DOIs found in text"""
+    found = {canonical_doi(doi) for doi in DOI_PATTERN.findall(text)}
+    for url in URL_PATTERN.findall(text):
+        # doi.org links are covered by their DOI
+        if not DOI_PATTERN.search(url):
+            canonical = canonical_url(url)
+            if canonical:
+                found.add(canonical)
+    return found
+
+
+def normalize_title(text):
+    """Lowercase words of text without URLs, punctuation or extra spaces"""
+    text = URL_PATTERN.sub(' ', text)
+    return ' '.join(NON_WORD.sub(' ', text.lower()).split())[:MAX_TITLE_CHARS]
+
+
+def shingles(title):
+    """Character shingles of a normalized title"""
+    if len(title) <= SHINGLE_SIZE:
+        return {title}
+    return {title[i:i + SHINGLE_SIZE] for i in range(len(title) - SHINGLE_SIZE + 1)}
+
+
+def similarity(first, second):
+    """Jaccard similarity of the shingles of two titles"""
+    first, second = shingles(normalize_title(first)), shingles(normalize_title(second))
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def minhash(shingle_set):
+    """MinHash signature of a set of shingles"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for shingle in shingle_set
+    ]
+    return [min((a * value + b) % _PRIME for value in hashes) for a, b in PERMUTATIONS]
+
+
+def band_keys(title):
+    """LSH band keys of a normalized title"""
+    signature = minhash(shingles(title))
+    return [
+        fingerprint_key(FingerprintKind.TITLE, f'{band}:' + ','.join(
+            map(str, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+        ))
+        for band in range(LSH_BANDS)
+    ]
+
+
+def fingerprint_submission(values, attachments):
+    """
+    Fingerprints of one submission as (kind, key, label) tuples. values are
+    (field type, stored value) pairs and attachments (sha256, file name)
+    pairs; labels are what reviewers are shown for a match.
+    """
+    fingerprints = {}
+    for field_type, value in values:
+        if not value or field_type not in (FieldType.TEXT, FieldType.TEXTAREA, FieldType.URL):
+            continue
+        for canonical in url_fingerprints(value):
+            key = fingerprint_key(FingerprintKind.URL, canonical)
+            fingerprints[key] = (FingerprintKind.URL, key, canonical[:MAX_TITLE_CHARS])
+        if field_type == FieldType.TEXT:
+            title = normalize_title(value)
+            if len(title) >= MIN_TITLE_CHARS:
+                for key in band_keys(title):
+                    fingerprints[key] = (FingerprintKind.TITLE, key, value[:MAX_TITLE_CHARS])
+    for sha256, name in attachments:
+        key = fingerprint_key(FingerprintKind.FILE, sha256)
+        fingerprints[key] = (FingerprintKind.FILE, key, name[:MAX_TITLE_CHARS])
+    return list(fingerprints.values())
+
+
+def fingerprint_item(item):
+    """fingerprint_submission of a (submission id, (values, attachments)) item, keeping the id"""
+    pk, (values, attachments) = item
+    return pk, fingerprint_submission(values, attachments)
@@ -0,0 +1,56 @@
+"""
+Backfill the department/role snapshot on submissions
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min, OuterRef, Q, Subquery
+from django.utils import timezone
+from apps.accounts.models import User
+from apps.accounts.signals import IN_FLIGHT_STATUSES
+from apps.submissions.models import Submission
+
+
+class Command(BaseCommand):
+    help = "Copy owners' department and role onto submissions in primary key batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Number of primary keys covered by each UPDATE (default: 5000)'
+        )
+        parser.add_argument(
+            '--resync', action='store_true',
+            help='Also re-derive in-flight submissions (draft, submitted, needs revision) '
+                 'from the current owner'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            self.stderr.write('--batch-size must be positive')
+            return
+
+        condition = Q(owner_role='')
+        if options['resync']:
+            condition |= Q(status__in=IN_FLIGHT_STATUSES)
+
+        bounds = Submission.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write('No submissions to backfill.')
+            return
+
+        owner = User.objects.filter(pk=OuterRef('user_id'))
+        updated = 0
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            with transaction.atomic():
+                updated += Submission.objects.filter(
+                    condition,
+                    id__gte=start,
+                    id__lt=start + batch_size
+                ).update(
+                    department_id=Subquery(owner.values('department_id')[:1]),
+                    owner_role=Subquery(owner.values('role')[:1]),
+                    updated_at=timezone.now()
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {updated} submission(s).'))
@@ -0,0 +1,48 @@
+"""
+Backfill the typed columns of submission field values
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from apps.submissions.models import SubmissionFieldValue
+
+
+class Command(BaseCommand):
+    help = ('Parse number, percentage, date and multiselect field values into their typed columns in '
+            'primary key batches, e.g. for values written before the columns existed or by bulk loads')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Number of primary keys covered by each batch (default: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            self.stderr.write('--batch-size must be positive')
+            return
+
+        values = SubmissionFieldValue.objects.filter(
+            field__field_type__in=list(SubmissionFieldValue.TYPED_COLUMNS)
+        )
+        bounds = values.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write('No typed field values to backfill.')
+            return
+
+        updated = 0
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            rows = []
+            batch = values.filter(id__gte=start, id__lt=start + batch_size).values_list(
+                'id', 'field__field_type', 'value'
+            )
+            for pk, field_type, value in batch:
+                row = SubmissionFieldValue(pk=pk, value=value)
+                row.set_typed_values(field_type)
+                rows.append(row)
+            with transaction.atomic():
+                SubmissionFieldValue.objects.bulk_update(rows, ['value_num', 'value_date', 'value_json'])
+            updated += len(rows)
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {updated} field value(s).'))
@@ -0,0 +1,43 @@
+"""
+Move legacy attachments onto content-addressed blobs
+"""
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.submissions.models import Attachment
+from apps.submissions.services import AttachmentService
+
+
+class Command(BaseCommand):
+    help = 'Hash attachments stored before deduplication and point them at shared blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Count legacy attachments without changes')
+
+    def handle(self, *args, **options):
+        legacy = Attachment.objects.filter(blob__isnull=True).order_by('id')
+        if options['dry_run']:
+            self.stdout.write(f'{legacy.count()} attachment(s) without a blob.')
+            return
+
+        moved = missing = 0
+        for attachment in legacy.iterator():
+            storage, old_name = attachment.file.storage, attachment.file.name
+            if not old_name or not storage.exists(old_name):
+                missing += 1
+                self.stderr.write(f'Attachment {attachment.pk}: file {old_name!r} is missing, skipped')
+                continue
+
+            with transaction.atomic():
+                with storage.open(old_name, 'rb') as handle:
+                    upload = File(handle, name=attachment.original_name)
+                    upload.content_type = attachment.content_type
+                    blob = AttachmentService.store(upload)
+                attachment.blob = blob
+                attachment.file.name = blob.file.name
+                attachment.save(update_fields=['blob', 'file', 'updated_at'])
+                if old_name != blob.file.name:
+                    transaction.on_commit(lambda name=old_name: storage.delete(name))
+            moved += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Moved {moved} attachment(s) onto blobs, {missing} missing.'))
@@ -0,0 +1,152 @@
+"""
+Render attachment previews in a bounded process pool
+"""
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from apps.common.constants import PreviewStatus
+from apps.common.utils import get_preview_path
+from apps.submissions.models import AttachmentBlob
+from apps.submissions.previews import preview_kind, render_preview
+
+logger = logging.getLogger('apps.submissions.previews')
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails and first-page previews for attachment blobs (runs until stopped)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.ATTACHMENT_PREVIEW_WORKERS,
+            help='Renderer processes'
+        )
+        parser.add_argument('--batch-size', type=int, default=50, help='Blobs claimed per batch (default: 50)')
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Seconds to wait when nothing is pending (default: 5)'
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=3600,
+            help='Seconds after which blobs claimed by a stopped worker are queued again (default: 3600)'
+        )
+        parser.add_argument('--once', action='store_true', help='Exit once nothing is pending')
+        parser.add_argument('--retry-failed', action='store_true', help='Queue failed and unsupported blobs again')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        if options['retry_failed']:
+            requeued = AttachmentBlob.objects.filter(
+                preview_status__in=[PreviewStatus.FAILED, PreviewStatus.UNSUPPORTED]
+            ).update(preview_status=PreviewStatus.PENDING)
+            self.stdout.write(f'Queued {requeued} blob(s) again.')
+
+        self.workers = options['workers']
+        self.stale_after = timedelta(seconds=options['stale_after'])
+        self.pool = None
+        self.restart_pool()
+        try:
+            while True:
+                processed = self.generate_pending(options['batch_size'])
+                if processed:
+                    self.stdout.write(f'Processed {processed} blob(s).')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['interval'])
+                    # Drop a connection the database closed while we were idle
+                    close_old_connections()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+    def restart_pool(self):
+        """Replace the renderer pool, e.g. after a renderer process died"""
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+        # Spawned (not forked) processes never inherit database connections
+        context = multiprocessing.get_context('spawn')
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    def claim(self, limit):
+        """
+        Move up to `limit` pending blobs to PROCESSING and return them. Rows
+        locked by another worker's claim are skipped, so concurrent workers
+        never render the same blob; claims of a worker that stopped are
+        queued again after --stale-after.
+        """
+        AttachmentBlob.objects.filter(
+            preview_status=PreviewStatus.PROCESSING, updated_at__lt=timezone.now() - self.stale_after
+        ).update(preview_status=PreviewStatus.PENDING)
+        with transaction.atomic():
+            blobs = list(
+                AttachmentBlob.objects.select_for_update(skip_locked=True).filter(
+                    preview_status=PreviewStatus.PENDING
+                ).order_by('id')[:limit]
+            )
+            AttachmentBlob.objects.filter(pk__in=[blob.pk for blob in blobs]).update(
+                preview_status=PreviewStatus.PROCESSING,
+                updated_at=timezone.now()
+            )
+        return blobs
+
+    def generate_pending(self, limit):
+        """Render previews for up to `limit` pending blobs; returns how many were handled"""
+        blobs = self.claim(limit)
+        unfinished = self.render(blobs)
+        if unfinished:
+            # A renderer process died (segfault, OOM kill) and took the pool
+            # with it. Retry the blobs it left one at a time, so the one that
+            # kills the renderer is found and the others still get previews.
+            logger.error('Preview renderer crashed, retrying %d blob(s) one at a time', len(unfinished))
+            self.restart_pool()
+            for blob in unfinished:
+                if self.render([blob]):
+                    logger.error('Preview renderer crashed on blob %s', blob.sha256)
+                    self.finish(blob, PreviewStatus.FAILED)
+                    self.restart_pool()
+        return len(blobs)
+
+    def render(self, blobs):
+        """Render previews of blobs in the pool; returns the blobs left unfinished by a crashed pool"""
+        size = settings.ATTACHMENT_PREVIEW_SIZE
+        futures = {}
+        unfinished = []
+        for blob in blobs:
+            kind = preview_kind(blob.content_type)
+            if kind is None:
+                self.finish(blob, PreviewStatus.UNSUPPORTED)
+                continue
+            name = get_preview_path(blob, blob.file.name)
+            try:
+                future = self.pool.submit(render_preview, kind, blob.file.path, blob.preview.storage.path(name), size)
+            except BrokenProcessPool:
+                unfinished.append(blob)
+                continue
+            futures[future] = (blob, name)
+
+        for future in as_completed(futures):
+            blob, name = futures[future]
+            try:
+                future.result()
+            except BrokenProcessPool:
+                unfinished.append(blob)
+            except Exception:
+                logger.exception('Preview generation failed for blob %s', blob.sha256)
+                self.finish(blob, PreviewStatus.FAILED)
+            else:
+                self.finish(blob, PreviewStatus.READY, name)
+        return unfinished
+
+    def finish(self, blob, status, name=''):
+        AttachmentBlob.objects.filter(pk=blob.pk).update(
+            preview=name,
+            preview_status=status,
+            updated_at=timezone.now()
+        )
@@ -0,0 +1,57 @@
+"""
+Rebuild the duplicate-evidence fingerprints of submissions in a process pool
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from apps.submissions.duplicates import DuplicateIndexService
+from apps.submissions.fingerprints import fingerprint_item
+from apps.submissions.models import Submission
+
+
+class Command(BaseCommand):
+    help = ('Rebuild submission fingerprints for duplicate detection, e.g. after bulk loads that skip '
+            'signals or a change of fingerprinting rules')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Fingerprinting processes (default: CPU count)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000, help='Submissions per batch (default: 2000)'
+        )
+        parser.add_argument(
+            '--missing', action='store_true', help='Only index submissions that have no fingerprints'
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        submissions = Submission.objects.order_by('pk')
+        if options['missing']:
+            submissions = submissions.exclude(fingerprints__isnull=False)
+
+        # Spawned (not forked) processes never inherit database connections;
+        # they only hash the values read here
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=options['workers'], mp_context=context) as pool:
+            indexed = 0
+            last_pk = 0
+            while True:
+                batch = list(submissions.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+                if not batch:
+                    break
+                inputs = DuplicateIndexService.collect(batch)
+                chunksize = max(1, len(inputs) // (options['workers'] * 4))
+                DuplicateIndexService.store(dict(pool.map(fingerprint_item, inputs.items(), chunksize=chunksize)))
+                indexed += len(batch)
+                last_pk = batch[-1]
+                self.stdout.write(f'Indexed {indexed} submission(s)...')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt fingerprints of {indexed} submission(s).'))
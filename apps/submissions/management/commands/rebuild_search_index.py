@@ -0,0 +1,41 @@
+"""
+Rebuild the full-text search documents of submissions
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.submissions.models import Submission
+from apps.submissions.search import SubmissionSearchService
+
+
+class Command(BaseCommand):
+    help = ('Rebuild submission search documents, e.g. after bulk loads that skip signals or a change of '
+            'SUBMISSION_SEARCH_CONFIG')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=2000, help='Submissions per batch (default: 2000)'
+        )
+        parser.add_argument(
+            '--missing', action='store_true', help='Only index submissions that have no search document'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        submissions = Submission.objects.order_by('pk')
+        if options['missing']:
+            submissions = submissions.filter(search_document__isnull=True)
+
+        indexed = 0
+        last_pk = 0
+        while True:
+            batch = list(submissions.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            SubmissionSearchService.index_submissions(batch)
+            indexed += len(batch)
+            last_pk = batch[-1]
+            self.stdout.write(f'Indexed {indexed} submission(s)...')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search documents of {indexed} submission(s).'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.0 on 2026-10-19 09:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kpi', '0001_initial'),
+        ('submissions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='submission',
+            name='submissions_status_dcc854_idx',
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('status__in', ['HOD_APPROVED', 'DEAN_APPROVED'])), fields=['user', 'year', 'month'], include=('awarded_points', 'sub_parameter'), name='submissions_approved_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('status__in', ['HOD_APPROVED', 'DEAN_APPROVED'])), fields=['year', 'month'], include=('user', 'awarded_points', 'sub_parameter'), name='submissions_approved_per_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('status', 'SUBMITTED')), fields=['user', '-submitted_at'], include=('sub_parameter',), name='submissions_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('status', 'HOD_APPROVED')), fields=['user', '-reviewed_at'], include=('sub_parameter',), name='submissions_dean_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0 on 2026-10-19 09:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def snapshot_owner_attribution(apps, schema_editor):
+    """Copy each owner's current department and role onto existing submissions"""
+    Submission = apps.get_model('submissions', 'Submission')
+    User = apps.get_model('accounts', 'User')
+    owner = User.objects.filter(pk=models.OuterRef('user_id'))
+    Submission.objects.filter(owner_role='').update(
+        department_id=models.Subquery(owner.values('department_id')[:1]),
+        owner_role=models.Subquery(owner.values('role')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_department_role_index'),
+        ('departments', '0001_initial'),
+        ('kpi', '0001_initial'),
+        ('submissions', '0002_submission_covering_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='submission',
+            name='submissions_queue_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='submission',
+            name='submissions_dean_queue_idx',
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='department',
+            field=models.ForeignKey(blank=True, help_text="Owner's department when the submission was made", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='submissions', to='departments.department'),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='owner_role',
+            field=models.CharField(blank=True, choices=[('ADMIN', 'Administrator'), ('FACULTY', 'Faculty'), ('HOD', 'Head of Department'), ('DEAN', 'Dean')], help_text="Owner's role when the submission was made", max_length=20),
+        ),
+        migrations.RunPython(snapshot_owner_attribution, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('status__in', ['HOD_APPROVED', 'DEAN_APPROVED'])), fields=['department', 'year', 'month'], include=('owner_role', 'awarded_points', 'sub_parameter'), name='submissions_dept_approved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('status', 'SUBMITTED')), fields=['department', '-submitted_at'], include=('sub_parameter',), name='submissions_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(condition=models.Q(('status', 'HOD_APPROVED')), fields=['department', '-reviewed_at'], include=('sub_parameter',), name='submissions_dean_queue_idx'),
+        ),
+    ]
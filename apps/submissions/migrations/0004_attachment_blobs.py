@@ -0,0 +1,43 @@
+# Generated by Django 5.0 on 2026-10-19 09:56
+
+import apps.common.utils
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0003_submission_department_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttachmentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sha256', models.CharField(help_text='SHA-256 hex digest of the file contents', max_length=64, unique=True)),
+                ('file', models.FileField(help_text='Stored file', max_length=255, upload_to=apps.common.utils.get_blob_path)),
+                ('size', models.PositiveBigIntegerField(help_text='File size in bytes')),
+                ('content_type', models.CharField(help_text='MIME type of the first upload of this content', max_length=100)),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text='Number of attachments referencing this blob')),
+            ],
+            options={
+                'verbose_name': 'Attachment Blob',
+                'verbose_name_plural': 'Attachment Blobs',
+                'db_table': 'attachment_blobs',
+            },
+        ),
+        migrations.AlterField(
+            model_name='attachment',
+            name='file',
+            field=models.FileField(help_text='Uploaded file', max_length=255, upload_to=apps.common.utils.get_upload_path),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='blob',
+            field=models.ForeignKey(blank=True, help_text='Shared content-addressed file', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='attachments', to='submissions.attachmentblob'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-19 10:08
+
+import apps.common.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0004_attachment_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachmentblob',
+            name='preview',
+            field=models.FileField(blank=True, help_text='Thumbnail or first-page preview (see generate_previews)', max_length=255, upload_to=apps.common.utils.get_preview_path),
+        ),
+        migrations.AddField(
+            model_name='attachmentblob',
+            name='preview_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('UNSUPPORTED', 'Unsupported'), ('FAILED', 'Failed')], default='PENDING', help_text='State of preview generation', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='attachmentblob',
+            index=models.Index(condition=models.Q(('preview_status', 'PENDING')), fields=['id'], name='attachment_blobs_preview_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0 on 2026-10-19 10:51
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+INDEX_NAME = 'submission_search_vector_idx'
+
+
+def create_search_index(apps, schema_editor):
+    # GIN indexes are PostgreSQL only; other databases use the in-process
+    # inverted index of apps.submissions.search
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX {INDEX_NAME} ON submission_search_documents USING gin (search_vector)'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0005_attachment_previews'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionSearchDocument',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('submission', models.OneToOneField(help_text='Submission this document indexes', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='submissions.submission')),
+                ('content', models.TextField(blank=True, help_text='Text field values of the submission, one per line')),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(help_text='Lexemes of content (PostgreSQL only, GIN indexed)', null=True)),
+            ],
+            options={
+                'verbose_name': 'Submission Search Document',
+                'verbose_name_plural': 'Submission Search Documents',
+                'db_table': 'submission_search_documents',
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
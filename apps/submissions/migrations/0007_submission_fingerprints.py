@@ -0,0 +1,30 @@
+# Generated by Django 5.0 on 2026-10-19 11:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0006_submission_search_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('url', 'Same link'), ('title', 'Similar title'), ('file', 'Same file')], help_text='What the key was derived from', max_length=10)),
+                ('key', models.CharField(help_text='Hash of the normalized evidence', max_length=32)),
+                ('label', models.CharField(help_text='Evidence shown to reviewers: the canonical link, title or file name', max_length=255)),
+                ('submission', models.ForeignKey(help_text='Submission whose evidence this key describes', on_delete=django.db.models.deletion.CASCADE, related_name='fingerprints', to='submissions.submission')),
+            ],
+            options={
+                'verbose_name': 'Submission Fingerprint',
+                'verbose_name_plural': 'Submission Fingerprints',
+                'db_table': 'submission_fingerprints',
+                'indexes': [models.Index(fields=['key', 'submission'], name='submission_fp_key_idx'), models.Index(fields=['submission'], name='submission_fp_submission_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.0 on 2026-10-19 11:12
+
+from django.db import migrations, models
+
+JSON_INDEX_NAME = 'field_values_json_gin_idx'
+
+
+def create_json_index(apps, schema_editor):
+    # Serves containment filters on multiselect choices (value_json @> '["x"]');
+    # GIN indexes are PostgreSQL only
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX {JSON_INDEX_NAME} ON submission_field_values '
+            f'USING gin (value_json jsonb_path_ops) WHERE value_json IS NOT NULL'
+        )
+
+
+def drop_json_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {JSON_INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forms_builder', '0001_initial'),
+        ('submissions', '0007_submission_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submissionfieldvalue',
+            name='value_date',
+            field=models.DateField(blank=True, help_text='Parsed value of date fields', null=True),
+        ),
+        migrations.AddField(
+            model_name='submissionfieldvalue',
+            name='value_json',
+            field=models.JSONField(blank=True, help_text='Parsed list of selected choices of multiselect fields', null=True),
+        ),
+        migrations.AddField(
+            model_name='submissionfieldvalue',
+            name='value_num',
+            field=models.DecimalField(blank=True, decimal_places=6, help_text='Parsed value of number and percentage fields', max_digits=20, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='submissionfieldvalue',
+            index=models.Index(condition=models.Q(('value_num__isnull', False)), fields=['field', 'value_num'], name='field_values_num_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='submissionfieldvalue',
+            index=models.Index(condition=models.Q(('value_date__isnull', False)), fields=['field', 'value_date'], name='field_values_date_idx'),
+        ),
+        migrations.RunPython(create_json_index, drop_json_index),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0 on 2026-10-19 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('submissions', '0008_field_value_typed_columns'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attachmentblob',
+            name='attachment_blobs_preview_idx',
+        ),
+        migrations.AlterField(
+            model_name='attachmentblob',
+            name='preview_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSING', 'Processing'), ('READY', 'Ready'), ('UNSUPPORTED', 'Unsupported'), ('FAILED', 'Failed')], default='PENDING', help_text='State of preview generation', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='attachmentblob',
+            index=models.Index(condition=models.Q(('preview_status__in', ['PENDING', 'PROCESSING'])), fields=['id'], name='attachment_blobs_preview_idx'),
+        ),
+    ]
@@ -4,11 +4,18 @@ Submission models - Submissions, field values, and attachments
 """
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from apps.common.models import TimeStampedModel
-from apps.common.constants import SubmissionStatus, MONTHS
-from apps.common.utils import get_upload_path
+from apps.common.constants import SubmissionStatus, UserRole, PreviewStatus, FingerprintKind, FieldType, MONTHS
+from apps.common.utils import get_blob_path, get_preview_path, get_upload_path
+import json
 import os
+from datetime import date
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+
+# Statuses that count towards scores
+APPROVED_STATUSES = [SubmissionStatus.HOD_APPROVED, SubmissionStatus.DEAN_APPROVED]
 
 
 class Submission(TimeStampedModel):
@@ -27,6 +34,21 @@ class Submission(TimeStampedModel):
         related_name='submissions',
         help_text="Sub-parameter this submission is for"
     )
+    # Owner attribution snapshot (avoids joining users for rollups)
+    department = models.ForeignKey(
+        'departments.Department',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='submissions',
+        help_text="Owner's department when the submission was made"
+    )
+    owner_role = models.CharField(
+        max_length=20,
+        choices=UserRole.CHOICES,
+        blank=True,
+        help_text="Owner's role when the submission was made"
+    )
     month = models.IntegerField(
         choices=MONTHS,
         help_text="Month of submission"
@@ -95,9 +117,42 @@ class Submission(TimeStampedModel):
         indexes = [
             models.Index(fields=['user', '-created_at']),
             models.Index(fields=['sub_parameter', 'month', 'year']),
-            models.Index(fields=['status']),
             models.Index(fields=['month', 'year']),
             models.Index(fields=['-created_at']),
+            # Scoring: approved points per user/window
+            models.Index(
+                fields=['user', 'year', 'month'],
+                name='submissions_approved_user_idx',
+                condition=models.Q(status__in=APPROVED_STATUSES),
+                include=['awarded_points', 'sub_parameter'],
+            ),
+            # Leaderboards and trends: approved points per window
+            models.Index(
+                fields=['year', 'month'],
+                name='submissions_approved_per_idx',
+                condition=models.Q(status__in=APPROVED_STATUSES),
+                include=['user', 'awarded_points', 'sub_parameter'],
+            ),
+            # Department rollups: approved points per department/window
+            models.Index(
+                fields=['department', 'year', 'month'],
+                name='submissions_dept_approved_idx',
+                condition=models.Q(status__in=APPROVED_STATUSES),
+                include=['owner_role', 'awarded_points', 'sub_parameter'],
+            ),
+            # Review queues: HoD queue and Dean queue
+            models.Index(
+                fields=['department', '-submitted_at'],
+                name='submissions_queue_idx',
+                condition=models.Q(status=SubmissionStatus.SUBMITTED),
+                include=['sub_parameter'],
+            ),
+            models.Index(
+                fields=['department', '-reviewed_at'],
+                name='submissions_dean_queue_idx',
+                condition=models.Q(status=SubmissionStatus.HOD_APPROVED),
+                include=['sub_parameter'],
+            ),
         ]
         verbose_name = 'Submission'
         verbose_name_plural = 'Submissions'
@@ -107,6 +162,13 @@ class Submission(TimeStampedModel):
         from apps.common.utils import format_month_year
         return f"{self.user.full_name} - {self.sub_parameter.name} - {format_month_year(self.month, self.year)}"
     
+    def save(self, *args, **kwargs):
+        # Snapshot the owner's department and role on creation
+        if self._state.adding and not self.owner_role:
+            self.department_id = self.user.department_id
+            self.owner_role = self.user.role
+        super().save(*args, **kwargs)
+    
     def can_edit(self):
         """Check if submission can be edited"""
         return self.status in [SubmissionStatus.DRAFT, SubmissionStatus.NEEDS_REVISION]
@@ -124,14 +186,52 @@ class Submission(TimeStampedModel):
         return self.sub_parameter.main_parameter
     
     def get_department(self):
-        """Get the user's department"""
-        return self.user.department
+        """Get the department this submission is attributed to"""
+        return self.department
+
+
+class SubmissionFieldValueQuerySet(models.QuerySet):
+    """
+    Per-field statistics computed in SQL over the typed columns, e.g.
+    SubmissionFieldValue.objects.filter(submission__year=2025).field_stats(field)
+    """
+    
+    def field_stats(self, field):
+        """
+        Aggregates of one field's values in this queryset: count for every
+        field type; sum, avg, min and max of number and percentage fields;
+        min and max of date fields. Values that do not parse as the field's
+        type are not counted.
+        """
+        values = self.filter(field=field)
+        column = SubmissionFieldValue.typed_column(field.field_type)
+        if column is None:
+            return values.exclude(value='').aggregate(count=models.Count('pk'))
+        aggregates = {'count': models.Count(column)}
+        if column == 'value_num':
+            aggregates.update(sum=models.Sum(column), avg=models.Avg(column))
+        if column != 'value_json':
+            aggregates.update(min=models.Min(column), max=models.Max(column))
+        return values.aggregate(**aggregates)
 
 
 class SubmissionFieldValue(TimeStampedModel):
     """
-    Store values for dynamic form fields
+    Store values for dynamic form fields.
+    `value` holds every type as text; number, percentage, date and
+    multiselect values are also parsed into a typed column on save, so
+    they can be filtered and aggregated in SQL.
     """
+    # Typed column of each field type that has one
+    TYPED_COLUMNS = {
+        FieldType.NUMBER: 'value_num',
+        FieldType.PERCENTAGE: 'value_num',
+        FieldType.DATE: 'value_date',
+        FieldType.MULTISELECT: 'value_json',
+    }
+    NUMBER_QUANTUM = Decimal('0.000001')
+    NUMBER_LIMIT = Decimal(10) ** 14
+    
     submission = models.ForeignKey(
         Submission,
         on_delete=models.CASCADE,
@@ -152,6 +252,25 @@ class SubmissionFieldValue(TimeStampedModel):
         blank=True,
         help_text="Field value (JSON for complex types)"
     )
+    value_num = models.DecimalField(
+        max_digits=20,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        help_text="Parsed value of number and percentage fields"
+    )
+    value_date = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Parsed value of date fields"
+    )
+    value_json = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Parsed list of selected choices of multiselect fields"
+    )
+    
+    objects = SubmissionFieldValueQuerySet.as_manager()
     
     class Meta:
         db_table = 'submission_field_values'
@@ -159,6 +278,17 @@ class SubmissionFieldValue(TimeStampedModel):
         indexes = [
             models.Index(fields=['submission']),
             models.Index(fields=['field']),
+            # Per-field aggregates and range filters read only parsed values
+            models.Index(
+                fields=['field', 'value_num'],
+                name='field_values_num_idx',
+                condition=models.Q(value_num__isnull=False)
+            ),
+            models.Index(
+                fields=['field', 'value_date'],
+                name='field_values_date_idx',
+                condition=models.Q(value_date__isnull=False)
+            ),
         ]
         verbose_name = 'Submission Field Value'
         verbose_name_plural = 'Submission Field Values'
@@ -171,12 +301,193 @@ class SubmissionFieldValue(TimeStampedModel):
         # Cache field name
         if self.field:
             self.field_name = self.field.name
+            self.set_typed_values(self.field.field_type)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'value' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'value_num', 'value_date', 'value_json'}
         super().save(*args, **kwargs)
+    
+    @classmethod
+    def typed_column(cls, field_type):
+        """Name of the typed column of a field type, or None"""
+        return cls.TYPED_COLUMNS.get(field_type)
+    
+    @classmethod
+    def parse_value(cls, field_type, value):
+        """Typed form of a stored value, or None when it does not parse"""
+        column = cls.typed_column(field_type)
+        if column is None or value in (None, ''):
+            return None
+        if column == 'value_json':
+            if isinstance(value, list):
+                return [str(item) for item in value]
+            try:
+                parsed = json.loads(value)
+            except (TypeError, ValueError):
+                return None
+            return [str(item) for item in parsed] if isinstance(parsed, list) else None
+        if column == 'value_date':
+            if isinstance(value, date):
+                return value
+            try:
+                return date.fromisoformat(str(value).strip()[:10])
+            except ValueError:
+                return None
+        try:
+            number = Decimal(str(value).strip())
+        except InvalidOperation:
+            return None
+        if not number.is_finite() or abs(number) >= cls.NUMBER_LIMIT:
+            return None
+        # Rounding can carry a value just below the limit up to it
+        number = number.quantize(cls.NUMBER_QUANTUM, rounding=ROUND_HALF_EVEN)
+        return number if abs(number) < cls.NUMBER_LIMIT else None
+    
+    def set_typed_values(self, field_type):
+        """Fill the typed columns from value for a field of field_type"""
+        self.value_num = self.value_date = self.value_json = None
+        column = self.typed_column(field_type)
+        if column is not None:
+            setattr(self, column, self.parse_value(field_type, self.value))
+
+
+class SubmissionSearchDocument(TimeStampedModel):
+    """
+    Searchable text of a submission's field values, maintained by
+    apps.submissions.search when field values change
+    """
+    submission = models.OneToOneField(
+        Submission,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+        help_text="Submission this document indexes"
+    )
+    content = models.TextField(
+        blank=True,
+        help_text="Text field values of the submission, one per line"
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        help_text="Lexemes of content (PostgreSQL only, GIN indexed)"
+    )
+    
+    class Meta:
+        db_table = 'submission_search_documents'
+        verbose_name = 'Submission Search Document'
+        verbose_name_plural = 'Submission Search Documents'
+    
+    def __str__(self):
+        return f"Search document of {self.submission_id}"
+
+
+class SubmissionFingerprint(models.Model):
+    """
+    Duplicate-detection key of a submission's evidence (a canonical link, a
+    title similarity band or an attachment hash), maintained by
+    apps.submissions.duplicates. Submissions sharing a key may claim the
+    same evidence.
+    """
+    submission = models.ForeignKey(
+        Submission,
+        on_delete=models.CASCADE,
+        related_name='fingerprints',
+        help_text="Submission whose evidence this key describes"
+    )
+    kind = models.CharField(
+        max_length=10,
+        choices=FingerprintKind.CHOICES,
+        help_text="What the key was derived from"
+    )
+    key = models.CharField(
+        max_length=32,
+        help_text="Hash of the normalized evidence"
+    )
+    label = models.CharField(
+        max_length=255,
+        help_text="Evidence shown to reviewers: the canonical link, title or file name"
+    )
+    
+    class Meta:
+        db_table = 'submission_fingerprints'
+        indexes = [
+            # Duplicate lookups: submissions sharing a key
+            models.Index(fields=['key', 'submission'], name='submission_fp_key_idx'),
+            models.Index(fields=['submission'], name='submission_fp_submission_idx'),
+        ]
+        verbose_name = 'Submission Fingerprint'
+        verbose_name_plural = 'Submission Fingerprints'
+    
+    def __str__(self):
+        return f"{self.kind} {self.key[:12]} of {self.submission_id}"
+
+
+class AttachmentBlob(TimeStampedModel):
+    """
+    Content-addressed file shared by every attachment with the same bytes.
+    Stored once under its SHA-256 and deleted with its last reference.
+    """
+    sha256 = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="SHA-256 hex digest of the file contents"
+    )
+    file = models.FileField(
+        upload_to=get_blob_path,
+        max_length=255,
+        help_text="Stored file"
+    )
+    size = models.PositiveBigIntegerField(
+        help_text="File size in bytes"
+    )
+    content_type = models.CharField(
+        max_length=100,
+        help_text="MIME type of the first upload of this content"
+    )
+    ref_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of attachments referencing this blob"
+    )
+    preview = models.FileField(
+        upload_to=get_preview_path,
+        max_length=255,
+        blank=True,
+        help_text="Thumbnail or first-page preview (see generate_previews)"
+    )
+    preview_status = models.CharField(
+        max_length=20,
+        choices=PreviewStatus.CHOICES,
+        default=PreviewStatus.PENDING,
+        help_text="State of preview generation"
+    )
+    
+    class Meta:
+        db_table = 'attachment_blobs'
+        indexes = [
+            # Work queue of the preview worker, and blobs it has claimed
+            models.Index(
+                fields=['id'],
+                name='attachment_blobs_preview_idx',
+                condition=models.Q(preview_status__in=[PreviewStatus.PENDING, PreviewStatus.PROCESSING])
+            ),
+        ]
+        verbose_name = 'Attachment Blob'
+        verbose_name_plural = 'Attachment Blobs'
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
+    
+    @property
+    def has_preview(self):
+        return self.preview_status == PreviewStatus.READY
 
 
 class Attachment(TimeStampedModel):
     """
     File attachments for submissions
+    Files uploaded through AttachmentService share a content-addressed
+    AttachmentBlob and `file` points at the blob's file; attachments
+    without a blob predate deduplication and own their file.
     """
     submission = models.ForeignKey(
         Submission,
@@ -192,8 +503,17 @@ class Attachment(TimeStampedModel):
         related_name='attachments',
         help_text="Dynamic field this attachment is for"
     )
+    blob = models.ForeignKey(
+        AttachmentBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='attachments',
+        help_text="Shared content-addressed file"
+    )
     file = models.FileField(
         upload_to=get_upload_path,
+        max_length=255,
         help_text="Uploaded file"
     )
     original_name = models.CharField(
@@ -228,10 +548,3 @@ class Attachment(TimeStampedModel):
     def get_file_size_mb(self):
         """Get file size in MB"""
         return self.file_size / (1024 * 1024)
-    
-    def delete(self, *args, **kwargs):
-        """Delete file from storage when attachment is deleted"""
-        if self.file:
-            if os.path.isfile(self.file.path):
-                os.remove(self.file.path)
-        super().delete(*args, **kwargs)
@@ -0,0 +1,62 @@
+"""
+Preview rendering for attachment blobs
+
+Previews are JPEG thumbnails of images and of the first page of PDFs (when
+poppler's pdftoppm is installed). The generate_previews worker renders them
+in a bounded pool of spawned processes, so this module must not import
+Django: pool processes only receive file paths.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+from PIL import Image, ImageOps
+
+IMAGE_TYPES = {'image/jpeg', 'image/png', 'image/gif', 'image/webp', 'image/bmp'}
+PDF_TYPES = {'application/pdf'}
+PDF_RENDER_TIMEOUT = 30
+
+
+def pdf_renderer():
+    """Path of the local PDF renderer, or None when it is not installed"""
+    return shutil.which('pdftoppm')
+
+
+def preview_kind(content_type):
+    """'image', 'pdf' or None when the content type cannot be previewed"""
+    if content_type in IMAGE_TYPES:
+        return 'image'
+    if content_type in PDF_TYPES and pdf_renderer():
+        return 'pdf'
+    return None
+
+
+def render_preview(kind, source_path, target_path, size):
+    """
+    Render a JPEG preview of at most size x size pixels to target_path,
+    replacing it atomically
+    """
+    directory = os.path.dirname(target_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        if kind == 'pdf':
+            prefix = temp_path[:-len('.tmp')]
+            subprocess.run(
+                [pdf_renderer(), '-f', '1', '-l', '1', '-singlefile', '-jpeg',
+                 '-scale-to', str(size), source_path, prefix],
+                check=True, capture_output=True, timeout=PDF_RENDER_TIMEOUT
+            )
+            os.replace(f'{prefix}.jpg', temp_path)
+        else:
+            with Image.open(source_path) as image:
+                # Let JPEG decode at a reduced scale instead of full size
+                image.draft('RGB', (size, size))
+                preview = ImageOps.exif_transpose(image)
+                preview.thumbnail((size, size))
+                preview.convert('RGB').save(temp_path, 'JPEG', quality=80, optimize=True)
+        os.replace(temp_path, target_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
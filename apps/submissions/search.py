@@ -0,0 +1,312 @@
+"""
+Full-text search over submission field values
+
+Every submission has a SubmissionSearchDocument holding the text of its
+field values. Field value writes schedule a rebuild of their submission's
+document when the transaction commits (once per submission, however many
+values were written). On PostgreSQL documents carry a GIN-indexed tsvector
+searched with websearch syntax, ranked with ts_rank and highlighted with
+ts_headline. Other databases (the SQLite test setup) search an in-process
+inverted index built from the documents.
+"""
+import json
+import math
+import re
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connections, router, transaction
+from django.db.models import F, Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from apps.common.constants import FieldType
+from apps.common.routers import read_from_replica
+from apps.submissions.models import Submission, SubmissionFieldValue, SubmissionSearchDocument
+
+# Field types whose values are not prose
+UNINDEXED_TYPES = [FieldType.NUMBER, FieldType.PERCENTAGE, FieldType.DATE, FieldType.FILE, FieldType.MULTIFILE]
+# Highlight markers. They are stripped from indexed content, so they can be
+# found again after the headline text has been HTML-escaped.
+MARK_START = '\x02'
+MARK_STOP = '\x03'
+STRIP_MARKS = {ord(MARK_START): None, ord(MARK_STOP): None}
+WORD = re.compile(r'\w+')
+# Words PostgreSQL's english configuration ignores most often
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from has in is it its of on or that the to was were will with'.split()
+)
+
+
+def search_terms(text):
+    """Lowercased words of text, without stop words"""
+    return [word for word in WORD.findall(text.lower()) if word not in STOP_WORDS]
+
+
+def value_text(field_type, value):
+    """Searchable text of one stored field value"""
+    if field_type == FieldType.MULTISELECT and value.startswith('['):
+        try:
+            return ' '.join(str(item) for item in json.loads(value))
+        except ValueError:
+            pass
+    return value
+
+
+def render_headline(text):
+    """Escape a headline and turn its markers into <mark> elements"""
+    html = escape(' '.join(text.split()))
+    return mark_safe(html.replace(MARK_START, '<mark>').replace(MARK_STOP, '</mark>'))
+
+
+class InvertedIndex:
+    """
+    Term -> {submission id: term frequency} postings of search documents.
+    Queries match documents containing every term, ranked by tf-idf.
+    """
+
+    def __init__(self, documents):
+        self.postings = defaultdict(dict)
+        self.size = 0
+        for pk, content in documents:
+            self.size += 1
+            for term in search_terms(content):
+                postings = self.postings[term]
+                postings[pk] = postings.get(pk, 0) + 1
+
+    @classmethod
+    def build(cls):
+        return cls(SubmissionSearchDocument.objects.values_list('pk', 'content').order_by().iterator(chunk_size=2000))
+
+    def search(self, query):
+        """{submission id: score} of documents matching every term of query"""
+        terms = set(search_terms(query))
+        if not terms:
+            return {}
+        postings = sorted((self.postings.get(term, {}) for term in terms), key=len)
+        ids = set(postings[0]).intersection(*postings[1:])
+        return {
+            pk: sum(posting[pk] * math.log(1 + self.size / len(posting)) for posting in postings)
+            for pk in ids
+        }
+
+    @staticmethod
+    def headline(content, query, max_words=30):
+        """Fragment of content around the first match, with matches marked"""
+        terms = set(search_terms(query))
+        words = list(WORD.finditer(content))
+        first = next((i for i, word in enumerate(words) if word.group().lower() in terms), 0)
+        start = max(0, first - 5)
+        window = words[start:start + max_words]
+        if not window:
+            return ''
+        parts = []
+        position = window[0].start()
+        for word in window:
+            parts.append(content[position:word.start()])
+            if word.group().lower() in terms:
+                parts.append(f'{MARK_START}{word.group()}{MARK_STOP}')
+            else:
+                parts.append(word.group())
+            position = word.end()
+        prefix = '… ' if window[0] is not words[0] else ''
+        suffix = ' …' if window[-1] is not words[-1] else ''
+        return prefix + ''.join(parts) + suffix
+
+
+class _PendingReindex:
+    """
+    on_commit callback collecting the submissions whose derived index (the
+    search documents, or the duplicate fingerprints) needs a rebuild.
+    Django discards it when a savepoint it was registered in rolls back;
+    writes in savepoints entered later share it, since rebuilding entries of
+    values that rolled back is harmless.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.submission_ids = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        self.index(self.submission_ids)
+
+
+def schedule_reindex(index, submission_id, using):
+    """
+    Call index (a function taking submission ids) for the submission after
+    the current transaction on database `using` commits, once per index
+    however many writes scheduled it
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        index([submission_id])
+        return
+
+    # update_or_create() runs in a savepoint of its own, so one form save
+    # spans many savepoint scopes; any pending rebuild can take the id
+    for _, func, _ in connection.run_on_commit:
+        if isinstance(func, _PendingReindex) and func.index == index and not func.done:
+            func.submission_ids.add(submission_id)
+            return
+    pending = _PendingReindex(index)
+    pending.submission_ids.add(submission_id)
+    transaction.on_commit(pending, using=using, robust=True)
+
+
+class SubmissionSearchService:
+    """
+    Maintain search documents and run ranked, filtered searches over them
+    """
+
+    BATCH_SIZE = 500
+    PAGE_SIZE = 20
+    # Rebuild the in-process inverted index at least this often, to pick up
+    # documents written by other processes
+    INVERTED_INDEX_MAX_AGE = 60
+
+    _inverted_index = None
+    _inverted_index_built_at = 0
+
+    @staticmethod
+    def uses_full_text_index(using=None):
+        using = using or router.db_for_read(SubmissionSearchDocument)
+        return connections[using].vendor == 'postgresql'
+
+    # Indexing
+
+    @staticmethod
+    def schedule_reindex(submission_id):
+        """Rebuild the submission's document after the current transaction commits"""
+        schedule_reindex(
+            SubmissionSearchService.index_submissions, submission_id, router.db_for_write(SubmissionSearchDocument)
+        )
+
+    @staticmethod
+    def index_submissions(submission_ids):
+        """Rebuild the search documents of the given submissions"""
+        submission_ids = sorted(set(submission_ids))
+        full_text = SubmissionSearchService.uses_full_text_index(router.db_for_write(SubmissionSearchDocument))
+        for start in range(0, len(submission_ids), SubmissionSearchService.BATCH_SIZE):
+            batch = submission_ids[start:start + SubmissionSearchService.BATCH_SIZE]
+            with transaction.atomic():
+                # Submissions deleted since the write have no document to keep
+                existing = list(Submission.objects.filter(pk__in=batch).values_list('pk', flat=True))
+                texts = defaultdict(list)
+                values = SubmissionFieldValue.objects.filter(
+                    submission_id__in=existing
+                ).exclude(
+                    field__field_type__in=UNINDEXED_TYPES
+                ).order_by('submission_id', 'field__order', 'field_id').values_list(
+                    'submission_id', 'field__field_type', 'value'
+                )
+                for submission_id, field_type, value in values:
+                    if value:
+                        texts[submission_id].append(value_text(field_type, value).translate(STRIP_MARKS))
+
+                SubmissionSearchDocument.objects.bulk_create(
+                    [SubmissionSearchDocument(submission_id=pk, content='\n'.join(texts[pk])) for pk in existing],
+                    update_conflicts=True,
+                    unique_fields=['submission'],
+                    update_fields=['content', 'updated_at']
+                )
+                if full_text:
+                    SubmissionSearchDocument.objects.filter(pk__in=existing).update(
+                        search_vector=SearchVector('content', config=settings.SUBMISSION_SEARCH_CONFIG)
+                    )
+        SubmissionSearchService._inverted_index = None
+
+    @staticmethod
+    def get_inverted_index():
+        index = SubmissionSearchService._inverted_index
+        age = time.monotonic() - SubmissionSearchService._inverted_index_built_at
+        if index is None or age > SubmissionSearchService.INVERTED_INDEX_MAX_AGE:
+            index = InvertedIndex.build()
+            SubmissionSearchService._inverted_index = index
+            SubmissionSearchService._inverted_index_built_at = time.monotonic()
+        return index
+
+    # Searching
+
+    @staticmethod
+    def visible_submissions(user):
+        """The user's own submissions and those of the departments they manage"""
+        managed = user.authz.managed_department_ids()
+        if managed is None:
+            return Submission.objects.all()
+        return Submission.objects.filter(Q(user=user) | Q(department_id__in=managed))
+
+    @staticmethod
+    @read_from_replica()
+    def search(user, query, department=None, month=None, year=None, main_parameter=None, page=1):
+        """
+        One page of submissions visible to user whose field values match
+        query, best match first. Returns {'results': [...], 'page': int,
+        'has_next': bool}; each result is a dict with submission, rank and
+        headline (safe HTML with matches in <mark>).
+        """
+        page_size = SubmissionSearchService.PAGE_SIZE
+        offset = (page - 1) * page_size
+        query = (query or '').strip()
+        empty = {'results': [], 'page': page, 'has_next': False}
+        if not query:
+            return empty
+
+        submissions = SubmissionSearchService.visible_submissions(user)
+        if department:
+            submissions = submissions.filter(department_id=department)
+        if month:
+            submissions = submissions.filter(month=month)
+        if year:
+            submissions = submissions.filter(year=year)
+        if main_parameter:
+            submissions = submissions.filter(sub_parameter__main_parameter_id=main_parameter)
+        submissions = submissions.select_related('user', 'department', 'sub_parameter__main_parameter')
+
+        if SubmissionSearchService.uses_full_text_index(submissions.db):
+            config = settings.SUBMISSION_SEARCH_CONFIG
+            search_query = SearchQuery(query, search_type='websearch', config=config)
+            rows = list(
+                submissions.filter(search_document__search_vector=search_query).annotate(
+                    rank=SearchRank(F('search_document__search_vector'), search_query)
+                ).order_by('-rank', '-pk')[offset:offset + page_size + 1]
+            )
+            ranks = {submission.pk: submission.rank for submission in rows}
+            # Headlines are costly, so only the page's documents get one
+            headlines = dict(
+                SubmissionSearchDocument.objects.filter(pk__in=ranks).annotate(
+                    headline=SearchHeadline(
+                        'content', search_query, config=config,
+                        start_sel=MARK_START, stop_sel=MARK_STOP,
+                        max_words=30, min_words=10, max_fragments=2, fragment_delimiter=' … '
+                    )
+                ).values_list('pk', 'headline')
+            )
+        else:
+            scores = SubmissionSearchService.get_inverted_index().search(query)
+            if not scores:
+                return empty
+            ids = sorted(
+                submissions.filter(pk__in=scores).values_list('pk', flat=True),
+                key=lambda pk: (-scores[pk], -pk)
+            )[offset:offset + page_size + 1]
+            found = submissions.in_bulk(ids)
+            rows = [found[pk] for pk in ids]
+            ranks = {pk: scores[pk] for pk in ids}
+            headlines = {
+                pk: InvertedIndex.headline(content, query)
+                for pk, content in SubmissionSearchDocument.objects.filter(pk__in=ids).values_list('pk', 'content')
+            }
+
+        results = [
+            {
+                'submission': submission,
+                'rank': ranks[submission.pk],
+                'headline': render_headline(headlines.get(submission.pk, '')),
+            }
+            for submission in rows[:page_size]
+        ]
+        return {'results': results, 'page': page, 'has_next': len(rows) > page_size}
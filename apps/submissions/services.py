@@ -2,12 +2,22 @@
 """
 Service layer for submission management
 """
-from django.db import transaction
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
 from django.utils import timezone
-from apps.submissions.models import Submission, SubmissionFieldValue, Attachment
-from apps.common.constants import SubmissionStatus, ActivityAction
-from apps.common.utils import log_activity, check_cutoff_deadline
+from django.utils.text import get_valid_filename, slugify
+from apps.submissions.models import Submission, SubmissionFieldValue, Attachment, AttachmentBlob
+from apps.common.constants import SubmissionStatus, ActivityAction, ApprovalRouting
+from apps.common.utils import log_activity, check_cutoff_deadline, get_blob_path
+from apps.common.zipstream import ZipEntry, iter_zip
 from apps.kpi.models import CutoffWindow
+from apps.forms_builder.validators import (
+    SIGNATURE_LENGTH, validate_file_extension, validate_file_signature, validate_file_size
+)
+import csv
+import hashlib
+import io
 import json
 
 
@@ -82,14 +92,8 @@ class SubmissionService:
                     
                     for uploaded_file in uploaded_files:
                         if uploaded_file:
-                            Attachment.objects.create(
-                                submission=submission,
-                                field=field,
-                                file=uploaded_file,
-                                original_name=uploaded_file.name,
-                                file_size=uploaded_file.size,
-                                content_type=uploaded_file.content_type
-                            )
+                            AttachmentService.validate(uploaded_file)
+                            AttachmentService.attach(submission, field, uploaded_file)
         
         # Update submission timestamp
         submission.updated_at = timezone.now()
@@ -100,7 +104,8 @@ class SubmissionService:
             action=ActivityAction.UPDATED,
             target=submission,
             description="Updated submission data",
-            request=request
+            request=request,
+            critical=False
         )
         
         return submission
@@ -118,7 +123,7 @@ class SubmissionService:
         cutoff_window = CutoffWindow.get_active_window(
             submission.month,
             submission.year,
-            submission.user.department
+            submission.department
         )
         
         if cutoff_window and not submission.user.can_override_deadlines:
@@ -141,6 +146,26 @@ class SubmissionService:
         
         return submission
     
+    @staticmethod
+    def can_view_submission(submission, user):
+        """
+        Check if user can view this submission and download its attachments:
+        the owner, admins and staff, the HoD of its department, a dean
+        managing its department, or the designated approver of its
+        sub-parameter
+        """
+        if submission.user_id == user.pk or user.is_staff or user.is_admin:
+            return True
+        if user.is_hod:
+            return submission.department_id == user.department_id
+        if user.is_dean:
+            return submission.department_id in user.authz.dean_department_ids
+        sub_parameter = submission.sub_parameter
+        return (
+            sub_parameter.approval_routing == ApprovalRouting.OTHER
+            and sub_parameter.other_approver_email == user.email
+        )
+    
     @staticmethod
     def can_edit_submission(submission, user):
         """
@@ -176,3 +201,273 @@ class SubmissionService:
                 queryset = queryset.filter(sub_parameter__main_parameter=filters['main_parameter'])
         
         return queryset
+
+
+class AttachmentService:
+    """
+    Content-addressed attachment storage
+    
+    Files are stored once per SHA-256 as an AttachmentBlob. Uploading bytes
+    that already exist only takes another reference, and the file is removed
+    when the last attachment referencing it is deleted.
+    """
+    
+    CHUNK_SIZE = 64 * 1024
+    
+    @staticmethod
+    def validate(uploaded_file):
+        """
+        Check size, extension and leading bytes of an upload. Files received
+        through ValidatingUploadHandler already passed these checks while
+        streaming; this covers every other way a file can arrive.
+        """
+        try:
+            validate_file_size(uploaded_file)
+            validate_file_extension(uploaded_file.name)
+            head = uploaded_file.read(SIGNATURE_LENGTH)
+            uploaded_file.seek(0)
+            validate_file_signature(uploaded_file.name, head)
+        except ValidationError as e:
+            raise ValueError(f"{uploaded_file.name}: {e.messages[0]}")
+    
+    @staticmethod
+    def hash_file(uploaded_file):
+        """
+        SHA-256 hex digest of an uploaded file, read in chunks.
+        Upload handlers that hash while receiving the file set `sha256`
+        on it, which is used instead of reading the file again.
+        """
+        digest = getattr(uploaded_file, 'sha256', None)
+        if digest:
+            return digest
+        hasher = hashlib.sha256()
+        for chunk in uploaded_file.chunks(AttachmentService.CHUNK_SIZE):
+            hasher.update(chunk)
+        uploaded_file.seek(0)
+        return hasher.hexdigest()
+    
+    @staticmethod
+    def lock_digest(digest):
+        """
+        Hold a lock on one content digest until the current transaction ends,
+        so store() and the file deletion of release() never interleave. Only
+        PostgreSQL needs it: SQLite already runs one write transaction at a
+        time.
+        """
+        connection = connections[router.db_for_write(AttachmentBlob)]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # Advisory lock keys are signed 64-bit integers
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [int(digest[:16], 16) - (1 << 63)])
+    
+    @staticmethod
+    @transaction.atomic
+    def store(uploaded_file):
+        """
+        Get the blob for the file's contents, writing the file only if the
+        contents are new, and take a reference to it
+        """
+        digest = AttachmentService.hash_file(uploaded_file)
+        AttachmentService.lock_digest(digest)
+        blob = AttachmentBlob.objects.select_for_update().filter(sha256=digest).first()
+        
+        if blob is None:
+            blob = AttachmentBlob(
+                sha256=digest,
+                size=uploaded_file.size,
+                content_type=uploaded_file.content_type or 'application/octet-stream',
+                ref_count=1
+            )
+            storage = blob.file.storage
+            name = get_blob_path(blob, uploaded_file.name)
+            # A file left by a rolled-back upload already has these exact bytes
+            if not storage.exists(name):
+                name = storage.save(name, uploaded_file)
+            blob.file.name = name
+            try:
+                with transaction.atomic():
+                    blob.save()
+                return blob
+            except IntegrityError:
+                # A concurrent upload of the same contents created it first
+                blob = AttachmentBlob.objects.select_for_update().get(sha256=digest)
+        
+        AttachmentBlob.objects.filter(pk=blob.pk).update(
+            ref_count=F('ref_count') + 1,
+            updated_at=timezone.now()
+        )
+        blob.ref_count += 1
+        return blob
+    
+    @staticmethod
+    @transaction.atomic
+    def attach(submission, field, uploaded_file):
+        """
+        Store an uploaded file and attach it to a submission
+        """
+        blob = AttachmentService.store(uploaded_file)
+        return Attachment.objects.create(
+            submission=submission,
+            field=field,
+            blob=blob,
+            file=blob.file.name,
+            original_name=uploaded_file.name,
+            file_size=blob.size,
+            content_type=uploaded_file.content_type or blob.content_type
+        )
+    
+    @staticmethod
+    @transaction.atomic
+    def release(attachment):
+        """
+        Drop a deleted attachment's reference to its file, deleting the file
+        after commit when nothing references it any more
+        """
+        if attachment.blob_id is None:
+            if attachment.file:
+                storage, name = attachment.file.storage, attachment.file.name
+                transaction.on_commit(lambda: storage.delete(name))
+            return
+        
+        blob = AttachmentBlob.objects.select_for_update().filter(pk=attachment.blob_id).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            AttachmentBlob.objects.filter(pk=blob.pk).update(
+                ref_count=F('ref_count') - 1,
+                updated_at=timezone.now()
+            )
+            return
+        
+        storage, digest = blob.file.storage, blob.sha256
+        names = [name for name in (blob.file.name, blob.preview.name) if name]
+        blob.delete()
+        
+        def delete_file():
+            # The same contents may have been uploaded again since the commit,
+            # or be in the middle of it: store() holds the digest lock until
+            # its new blob row is committed
+            with transaction.atomic(using=router.db_for_write(AttachmentBlob)):
+                AttachmentService.lock_digest(digest)
+                if not AttachmentBlob.objects.filter(sha256=digest).exists():
+                    for name in names:
+                        storage.delete(name)
+        
+        transaction.on_commit(delete_file)
+
+
+class EvidenceExportService:
+    """
+    Evidence bundles: every attachment of a department for one month,
+    streamed as a ZIP archive with a manifest.csv describing each file
+    """
+    
+    CHUNK_SIZE = 200
+    MANIFEST_HEADER = [
+        'Path', 'Faculty Name', 'Email', 'Main Parameter', 'Sub Parameter', 'Field',
+        'Status', 'Awarded Points', 'Original Name', 'Size', 'SHA-256', 'Uploaded At', 'Note'
+    ]
+    
+    @staticmethod
+    def can_export(user, department):
+        """
+        Admins and staff can export any department, a HoD their own
+        department and a dean the departments they manage
+        """
+        return user.is_staff or user.authz.manages_department(department.pk)
+    
+    @staticmethod
+    def get_attachments(department, month, year):
+        """
+        Attachments of the department's submissions for the month, fetched
+        CHUNK_SIZE rows at a time by primary key
+        """
+        queryset = Attachment.objects.filter(
+            submission__department=department,
+            submission__month=month,
+            submission__year=year
+        ).select_related(
+            'submission__user',
+            'submission__sub_parameter__main_parameter',
+            'field',
+            'blob'
+        ).order_by('pk')
+        
+        last_pk = 0
+        while True:
+            chunk = list(queryset.filter(pk__gt=last_pk)[:EvidenceExportService.CHUNK_SIZE])
+            if not chunk:
+                return
+            yield from chunk
+            last_pk = chunk[-1].pk
+    
+    @staticmethod
+    def archive_name(department, month, year):
+        return f'evidence-{slugify(department.code)}-{year}-{month:02d}.zip'
+    
+    @staticmethod
+    def archive_path(attachment):
+        """Path inside the archive: <faculty>/<sub-parameter>/<id>-<file name>"""
+        submission = attachment.submission
+        faculty = slugify(submission.user.full_name) or f'user-{submission.user_id}'
+        sub_parameter = slugify(submission.sub_parameter.name) or f'parameter-{submission.sub_parameter_id}'
+        return f'{faculty}/{sub_parameter}/{attachment.pk}-{get_valid_filename(attachment.original_name)}'
+    
+    @staticmethod
+    def iter_archive(department, month, year):
+        """
+        Yield the bytes of the evidence ZIP. Files are read in chunks as the
+        archive is sent, so memory use does not grow with the bundle size.
+        """
+        return iter_zip(EvidenceExportService._entries(department, month, year))
+    
+    @staticmethod
+    def _entries(department, month, year):
+        manifest = io.StringIO()
+        writer = csv.writer(manifest)
+        writer.writerow(EvidenceExportService.MANIFEST_HEADER)
+        
+        for attachment in EvidenceExportService.get_attachments(department, month, year):
+            submission = attachment.submission
+            path = EvidenceExportService.archive_path(attachment)
+            storage, name = attachment.file.storage, attachment.file.name
+            missing = not name or not storage.exists(name)
+            writer.writerow([
+                '' if missing else path,
+                submission.user.full_name,
+                submission.user.email,
+                submission.sub_parameter.main_parameter.name,
+                submission.sub_parameter.name,
+                attachment.field.label if attachment.field else '',
+                submission.get_status_display(),
+                submission.awarded_points if submission.awarded_points is not None else '',
+                attachment.original_name,
+                attachment.file_size,
+                attachment.blob.sha256 if attachment.blob else '',
+                timezone.localtime(attachment.created_at).isoformat(),
+                'File missing from storage' if missing else ''
+            ])
+            if missing:
+                continue
+            yield ZipEntry(
+                path,
+                EvidenceExportService._read(storage, name),
+                modified=timezone.localtime(attachment.created_at),
+                content_type=attachment.content_type
+            )
+        
+        yield ZipEntry(
+            'manifest.csv',
+            [manifest.getvalue().encode('utf-8-sig')],
+            modified=timezone.localtime(),
+            content_type='text/csv'
+        )
+    
+    @staticmethod
+    def _read(storage, name):
+        with storage.open(name, 'rb') as handle:
+            while True:
+                chunk = handle.read(AttachmentService.CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
@@ -0,0 +1,43 @@
+"""
+Signals for the submissions app
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.submissions.models import Attachment, SubmissionFieldValue
+
+
+@receiver(post_delete, sender=Attachment)
+def release_attachment_file(sender, instance, **kwargs):
+    """
+    Release the attachment's file whether it was deleted directly or by
+    cascade from its submission
+    """
+    from apps.submissions.services import AttachmentService
+    from apps.submissions.duplicates import DuplicateIndexService
+    AttachmentService.release(instance)
+    DuplicateIndexService.schedule_reindex(instance.submission_id)
+
+
+@receiver(post_save, sender=Attachment)
+def fingerprint_attachment(sender, instance, created, **kwargs):
+    """Add a new attachment's content hash to its submission's fingerprints"""
+    if created and not kwargs.get('raw'):
+        from apps.submissions.duplicates import DuplicateIndexService
+        DuplicateIndexService.schedule_reindex(instance.submission_id)
+
+
+@receiver(post_save, sender=SubmissionFieldValue)
+def reindex_submission(sender, instance, **kwargs):
+    """
+    Rebuild the search document and duplicate fingerprints of the value's
+    submission once the transaction commits. There is deliberately no delete
+    receiver: it would stop Django from fast-deleting field values when
+    submissions are deleted, and a submission's index entries are deleted
+    with it.
+    """
+    if kwargs.get('raw'):
+        return
+    from apps.submissions.search import SubmissionSearchService
+    from apps.submissions.duplicates import DuplicateIndexService
+    SubmissionSearchService.schedule_reindex(instance.submission_id)
+    DuplicateIndexService.schedule_reindex(instance.submission_id)
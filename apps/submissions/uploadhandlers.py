@@ -0,0 +1,139 @@
+"""
+Upload handler that validates attachments while they stream in
+"""
+import hashlib
+import mimetypes
+import os
+import uuid
+from functools import wraps
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from apps.forms_builder.validators import (
+    SIGNATURE_LENGTH, validate_file_extension, validate_file_signature, validate_file_size
+)
+
+# Uploads are written here (inside MEDIA_ROOT, so moving them into place
+# is a rename) until they are stored as attachment blobs
+STAGING_DIR = 'attachments/incoming'
+
+
+class StagedUploadedFile(UploadedFile):
+    """
+    A validated upload in the staging directory, with its SHA-256.
+    FileSystemStorage moves it into place via temporary_file_path() instead
+    of copying it; a file that was never moved is removed on close.
+    """
+
+    def __init__(self, path, name, content_type, size, charset, sha256, content_type_extra=None):
+        super().__init__(open(path, 'rb'), name, content_type, size, charset, content_type_extra)
+        self.path = path
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.path
+
+    def close(self):
+        try:
+            return self.file.close()
+        finally:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class ValidatingUploadHandler(FileUploadHandler):
+    """
+    Writes each uploaded file straight to the staging directory while
+    hashing it, and skips it as soon as it breaks a rule: a disallowed
+    extension (before any data is read), leading bytes that do not match
+    the extension (first chunk), or more than MAX_UPLOAD_SIZE bytes.
+    Nothing is buffered in memory and rejected files leave nothing on disk.
+
+    Rejections are collected in request.upload_errors as
+    {field name: [messages]}. Requires filesystem-backed default storage.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.errors = {}
+        if request is not None:
+            request.upload_errors = self.errors
+
+    def reject(self, message):
+        self.discard()
+        self.errors.setdefault(self.field_name, []).append(f"{self.file_name}: {message}")
+        raise SkipFile()
+
+    def discard(self):
+        """Close and remove the staging file of the current upload"""
+        # MultiPartParser closes `handler.file` when a file is skipped, so
+        # the attribute only exists while a staging file is open
+        file = self.__dict__.pop('file', None)
+        if file is not None:
+            file.close()
+            if os.path.exists(file.name):
+                os.remove(file.name)
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        try:
+            validate_file_extension(file_name)
+            if content_length is not None:
+                validate_file_size(content_length)
+        except ValidationError as e:
+            self.reject(e.messages[0])
+
+        path = default_storage.path(f'{STAGING_DIR}/{uuid.uuid4().hex}')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file = open(path, 'xb')
+
+    def receive_data_chunk(self, raw_data, start):
+        try:
+            if start == 0:
+                validate_file_signature(self.file_name, raw_data[:SIGNATURE_LENGTH])
+            validate_file_size(start + len(raw_data))
+        except ValidationError as e:
+            self.reject(e.messages[0])
+        self.hasher.update(raw_data)
+        self.size += len(raw_data)
+        self.file.write(raw_data)
+        # Later handlers never see the data; this one owns the file
+        return None
+
+    def file_complete(self, file_size):
+        file = self.__dict__.pop('file')
+        file.close()
+        path = file.name
+        if self.size == 0:
+            os.remove(path)
+            self.errors.setdefault(self.field_name, []).append(f"{self.file_name}: The submitted file is empty.")
+            return None
+        content_type = mimetypes.guess_type(self.file_name)[0] or self.content_type
+        return StagedUploadedFile(
+            path, self.file_name, content_type, self.size, self.charset,
+            self.hasher.hexdigest(), self.content_type_extra
+        )
+
+    def upload_interrupted(self):
+        self.discard()
+
+
+def validate_uploads(view_func):
+    """
+    Stream the view's file uploads through ValidatingUploadHandler.
+    The handler has to be installed before anything reads request.POST,
+    including CSRF verification, so the CSRF check runs inside this wrapper.
+    """
+    protected_view = csrf_protect(view_func)
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [ValidatingUploadHandler(request)]
+        return protected_view(request, *args, **kwargs)
+    return csrf_exempt(wrapper)
@@ -10,8 +10,12 @@ app_name = 'submissions'
 urlpatterns = [
     path('', views.submission_list, name='submission_list'),
     path('create/', views.submission_create, name='submission_create'),
+    path('search/', views.submission_search, name='submission_search'),
     path('<int:pk>/', views.submission_detail, name='submission_detail'),
     path('<int:pk>/edit/', views.submission_edit, name='submission_edit'),
     path('<int:pk>/delete/', views.submission_delete, name='submission_delete'),
+    path('attachments/<int:pk>/download/', views.attachment_download, name='attachment_download'),
+    path('attachments/<int:pk>/preview/', views.attachment_preview, name='attachment_preview'),
     path('export/csv/', views.export_submissions_csv, name='export_submissions_csv'),
+    path('export/evidence/', views.export_evidence_zip, name='export_evidence_zip'),
 ]
@@ -6,16 +6,25 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q
-from apps.submissions.models import Submission
+from apps.submissions.models import Attachment, Submission
 from apps.submissions.forms import SubmissionCreateForm
-from apps.submissions.services import SubmissionService
-from apps.kpi.models import SubParameter
+from apps.submissions.services import SubmissionService, EvidenceExportService
+from apps.submissions.search import SubmissionSearchService
+from apps.submissions.uploadhandlers import validate_uploads
+from apps.reviews.services import TimelineService
+from apps.kpi.models import MainParameter, SubParameter
 from apps.kpi.services import KPIService
+from apps.departments.models import Department
 from apps.forms_builder.renderers import DynamicFormRenderer
 from apps.common.decorators import role_required
-from apps.common.constants import SubmissionStatus
+from apps.common.constants import MONTHS, SubmissionStatus
+from apps.common.http import serve_file
+from apps.common.routers import read_from_replica, replica_iterator
+from apps.common.utils import get_current_month_year, parse_positive_int
 import csv
-from django.http import HttpResponse
+import os
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
 
 
 @login_required
@@ -68,6 +77,7 @@ def submission_create(request):
 
 @login_required
 @role_required('FACULTY', 'HOD')
+@validate_uploads
 def submission_edit(request, pk):
     """Edit submission - Step 2: Fill dynamic form"""
     submission = get_object_or_404(Submission, pk=pk)
@@ -87,14 +97,21 @@ def submission_edit(request, pk):
     
     if request.method == 'POST':
         form = DynamicForm(request.POST, request.FILES)
+        # Files rejected while streaming never reach request.FILES
+        for field_name, errors in getattr(request, 'upload_errors', {}).items():
+            form.add_error(field_name if field_name in form.fields else None, errors)
         if form.is_valid():
             # Save submission data
-            SubmissionService.save_submission_data(
-                submission=submission,
-                form_data=form.cleaned_data,
-                files=request.FILES,
-                request=request
-            )
+            try:
+                SubmissionService.save_submission_data(
+                    submission=submission,
+                    form_data=form.cleaned_data,
+                    files=request.FILES,
+                    request=request
+                )
+            except ValueError as e:
+                messages.error(request, str(e))
+                return redirect('submissions:submission_edit', pk=submission.id)
             
             # Check if submitting or saving draft
             if 'submit' in request.POST:
@@ -111,7 +128,7 @@ def submission_edit(request, pk):
     else:
         # Pre-populate form with existing values
         initial_data = {}
-        for field_value in submission.field_values.all():
+        for field_value in submission.field_values.select_related('field'):
             initial_data[field_value.field_name] = field_value.value
         form = DynamicForm(initial=initial_data)
     
@@ -119,7 +136,7 @@ def submission_edit(request, pk):
         'form': form,
         'submission': submission,
         'template': template,
-        'attachments': submission.attachments.all()
+        'attachments': submission.attachments.select_related('blob')
     }
     return render(request, 'submissions/submission_edit.html', context)
 
@@ -127,19 +144,23 @@ def submission_edit(request, pk):
 @login_required
 def submission_detail(request, pk):
     """View submission details"""
-    submission = get_object_or_404(Submission, pk=pk)
+    submission = get_object_or_404(
+        Submission.objects.select_related(
+            'user__department', 'sub_parameter__main_parameter', 'sub_parameter__form_template'
+        ),
+        pk=pk
+    )
     
     # Check permissions
-    if request.user != submission.user and not request.user.is_staff:
-        if request.user.is_hod and submission.user.department != request.user.department:
-            messages.error(request, 'You do not have permission to view this submission.')
-            return redirect('submissions:submission_list')
+    if not SubmissionService.can_view_submission(submission, request.user):
+        messages.error(request, 'You do not have permission to view this submission.')
+        return redirect('submissions:submission_list')
     
     # Get field values with display
     field_values = []
     if hasattr(submission.sub_parameter, 'form_template'):
         template = submission.sub_parameter.form_template
-        for field_value in submission.field_values.all():
+        for field_value in submission.field_values.select_related('field'):
             display_value = DynamicFormRenderer.get_field_value_display(
                 field_value.field,
                 field_value.value
@@ -152,12 +173,59 @@ def submission_detail(request, pk):
     context = {
         'submission': submission,
         'field_values': field_values,
-        'attachments': submission.attachments.all(),
-        'reviews': submission.reviews.all()
+        'attachments': submission.attachments.select_related('blob'),
+        'timeline': TimelineService.get_timeline(submission=submission, before=request.GET.get('before')),
     }
     return render(request, 'submissions/submission_detail.html', context)
 
 
+@login_required
+def attachment_download(request, pk):
+    """Download an attachment of a submission the user can view"""
+    attachment = get_object_or_404(
+        Attachment.objects.select_related('submission__sub_parameter', 'blob'),
+        pk=pk
+    )
+    if not SubmissionService.can_view_submission(attachment.submission, request.user):
+        # Do not reveal that the attachment exists
+        raise Http404('Attachment not found')
+    
+    return serve_file(
+        request,
+        attachment.file,
+        filename=attachment.original_name,
+        content_type=attachment.content_type or 'application/octet-stream',
+        size=attachment.file_size,
+        etag=attachment.blob.sha256 if attachment.blob else None,
+        last_modified=attachment.created_at
+    )
+
+
+@login_required
+def attachment_preview(request, pk):
+    """Inline preview image of an attachment of a submission the user can view"""
+    attachment = get_object_or_404(
+        Attachment.objects.select_related('submission__sub_parameter', 'blob'),
+        pk=pk
+    )
+    blob = attachment.blob
+    if not blob or not blob.has_preview or \
+            not SubmissionService.can_view_submission(attachment.submission, request.user):
+        raise Http404('Preview not found')
+    
+    name = os.path.splitext(attachment.original_name)[0]
+    return serve_file(
+        request,
+        blob.preview,
+        filename=f'{name}-preview.jpg',
+        content_type='image/jpeg',
+        size=blob.preview.size,
+        etag=f'{blob.sha256}-preview',
+        last_modified=blob.updated_at,
+        as_attachment=False
+    )
+
+
 @login_required
 @role_required('FACULTY', 'HOD')
 def submission_delete(request, pk):
@@ -182,6 +250,37 @@ def submission_delete(request, pk):
 
 
 @login_required
+def submission_search(request):
+    """Full-text search over the field values of submissions visible to the user"""
+    query = request.GET.get('q', '').strip()
+    filters = {
+        'department': parse_positive_int(request.GET.get('department')),
+        'month': parse_positive_int(request.GET.get('month')),
+        'year': parse_positive_int(request.GET.get('year')),
+        'main_parameter': parse_positive_int(request.GET.get('main_parameter')),
+    }
+    page = parse_positive_int(request.GET.get('page')) or 1
+    results = SubmissionSearchService.search(request.user, query, page=page, **filters)
+    
+    managed = request.user.authz.managed_department_ids()
+    departments = Department.objects.all() if managed is None else Department.objects.filter(pk__in=managed)
+    params = request.GET.copy()
+    params.pop('page', None)
+    
+    context = {
+        'query': query,
+        'filters': filters,
+        'results': results,
+        'departments': departments.order_by('name'),
+        'main_parameters': MainParameter.objects.filter(is_active=True).order_by('order', 'name'),
+        'months': MONTHS,
+        'page_query': params.urlencode(),
+    }
+    return render(request, 'submissions/submission_search.html', context)
+
+
+@login_required
+@read_from_replica()
 def export_submissions_csv(request):
     """Export submissions to CSV - Role-based filtering"""
     # Determine which submissions to export based on user role
@@ -191,12 +290,12 @@ def export_submissions_csv(request):
     elif request.user.is_hod:
         # HoD can export all submissions from their department
         submissions = Submission.objects.filter(
-            user__department=request.user.department
+            department=request.user.department
         )
     elif request.user.is_dean:
         # Dean can export submissions from all their departments
         submissions = Submission.objects.filter(
-            user__department__in=request.user.dean_departments.all()
+            department_id__in=request.user.authz.dean_department_ids
         )
     else:
         # Faculty can only export their own submissions
@@ -206,7 +305,7 @@ def export_submissions_csv(request):
         'sub_parameter',
         'sub_parameter__main_parameter',
         'user',
-        'user__department'
+        'department'
     )
     
     # Apply filters
@@ -259,7 +358,7 @@ def export_submissions_csv(request):
         if request.user.is_hod or request.user.is_admin or request.user.is_dean:
             writer.writerow([
                 submission.user.full_name,
-                submission.user.department.name,
+                submission.department.name if submission.department else '',
                 submission.month,
                 submission.year,
                 submission.sub_parameter.main_parameter.name,
@@ -282,3 +381,34 @@ def export_submissions_csv(request):
             ])
     
     return response
+
+
+@login_required
+def export_evidence_zip(request):
+    """
+    Stream every attachment of a department for one month as a ZIP with a
+    manifest. Defaults to the user's own department and the current month.
+    """
+    current_month, current_year = get_current_month_year()
+    try:
+        month = int(request.GET.get('month', current_month))
+        year = int(request.GET.get('year', current_year))
+        department_id = int(request.GET.get('department') or request.user.department_id or 0)
+    except ValueError:
+        raise Http404('Invalid export period')
+    if not 1 <= month <= 12:
+        raise Http404('Invalid export period')
+    
+    department = get_object_or_404(Department, pk=department_id)
+    if not EvidenceExportService.can_export(request.user, department):
+        raise Http404('Department not found')
+    
+    response = StreamingHttpResponse(
+        replica_iterator(EvidenceExportService.iter_archive(department, month, year)),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = content_disposition_header(
+        True, EvidenceExportService.archive_name(department, month, year)
+    )
+    response['Cache-Control'] = 'private, no-store'
+    return response
@@ -0,0 +1,4 @@
+"""
+Benchmark cases, grouped by the code path they exercise
+"""
+from benchmarks.cases import scoring, trends, queues, views, connections, sessions, auth, search, duplicates, analytics  # noqa: F401
@@ -0,0 +1,54 @@
+"""
+Per-field statistics and reports over dynamic form values, computed in SQL
+"""
+from django.core.cache import cache
+from django.urls import reverse
+from benchmarks.harness import case
+from apps.dashboards.services import FieldAnalyticsService
+from apps.forms_builder.models import DynamicField
+from apps.submissions.models import SubmissionFieldValue
+
+
+def first_field(ctx, name):
+    return DynamicField.objects.filter(template__sub_parameter=ctx.sub_parameter, name=name).first()
+
+
+@case('analytics')
+def number_field_stats(ctx):
+    SubmissionFieldValue.objects.field_stats(first_field(ctx, 'count'))
+
+
+@case('analytics')
+def number_field_stats_department_year(ctx):
+    SubmissionFieldValue.objects.filter(
+        submission__department=ctx.department, submission__year=ctx.year
+    ).field_stats(first_field(ctx, 'count'))
+
+
+@case('analytics')
+def date_field_stats(ctx):
+    SubmissionFieldValue.objects.field_stats(first_field(ctx, 'event_date'))
+
+
+@case('analytics')
+def number_field_report_uncached(ctx):
+    cache.clear()
+    FieldAnalyticsService.get_report(first_field(ctx, 'count'), year=ctx.year, department=ctx.department)
+
+
+@case('analytics')
+def number_field_report_cached(ctx):
+    FieldAnalyticsService.get_report(first_field(ctx, 'count'), year=ctx.year, department=ctx.department)
+
+
+@case('analytics')
+def multiselect_field_report_uncached(ctx):
+    cache.clear()
+    FieldAnalyticsService.get_report(first_field(ctx, 'indexing'), year=ctx.year)
+
+
+@case('analytics')
+def field_report_page(ctx):
+    ctx.get(ctx.admin, reverse('dashboards:field_report'), {
+        'field': first_field(ctx, 'count').pk, 'year': ctx.year, 'approved': '1',
+    })
@@ -0,0 +1,58 @@
+"""
+Login throughput per password hasher and cost, and bulk password hashing
+serially against the thread pool of hash_passwords
+
+The warm-up run of each login case rehashes the user's password with the
+case's hasher, so timed runs measure verification with that hasher only.
+"""
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from benchmarks.harness import case
+from apps.accounts.hashers import hash_passwords
+
+# generate_load_data's default --password
+PASSWORD = 'loadtest'
+BULK_SIZE = 16
+
+
+def _login(ctx):
+    response = Client().post(reverse('accounts:login'), {'email': ctx.faculty.email, 'password': PASSWORD})
+    if response.status_code != 302:
+        raise AssertionError(f'login returned {response.status_code}, expected 302')
+
+
+def _hashers(preferred):
+    return override_settings(PASSWORD_HASHERS=[
+        f'apps.accounts.hashers.Tuned{preferred}PasswordHasher',
+        'apps.accounts.hashers.TunedPBKDF2PasswordHasher',
+        'apps.accounts.hashers.TunedScryptPasswordHasher',
+    ])
+
+
+@case('auth')
+def login_pbkdf2_default(ctx):
+    with _hashers('PBKDF2'), override_settings(PASSWORD_PBKDF2_ITERATIONS=0):
+        _login(ctx)
+
+
+@case('auth')
+def login_pbkdf2_100k(ctx):
+    with _hashers('PBKDF2'), override_settings(PASSWORD_PBKDF2_ITERATIONS=100000):
+        _login(ctx)
+
+
+@case('auth')
+def login_scrypt_default(ctx):
+    with _hashers('Scrypt'):
+        _login(ctx)
+
+
+@case('auth', repeat=5)
+def bulk_hash_serial(ctx):
+    hash_passwords([PASSWORD] * BULK_SIZE, workers=1)
+
+
+@case('auth', repeat=5)
+def bulk_hash_threads(ctx):
+    hash_passwords([PASSWORD] * BULK_SIZE)
@@ -0,0 +1,30 @@
+"""
+Request latency with a new database connection per request against a
+persistent (or pooled) connection, as set by CONN_MAX_AGE / DB_POOL_MAX_SIZE
+"""
+from django.db import connection
+from django.urls import reverse
+from benchmarks.harness import case
+
+
+def _request(ctx):
+    ctx.get(ctx.faculty, reverse('notifications:notification_list'))
+
+
+@case('connections')
+def request_new_connection(ctx):
+    # CONN_MAX_AGE=0: every request pays the TCP and authentication handshake
+    connection.close()
+    _request(ctx)
+
+
+@case('connections')
+def request_persistent_connection(ctx):
+    _request(ctx)
+
+
+@case('connections')
+def request_persistent_health_checked(ctx):
+    # CONN_HEALTH_CHECKS: one ping before the first query of each request
+    connection.is_usable()
+    _request(ctx)
@@ -0,0 +1,24 @@
+"""
+Duplicate evidence lookups for a reviewer and fingerprint rebuilds of a
+batch of submissions
+"""
+from benchmarks.harness import case
+from apps.submissions.duplicates import DuplicateIndexService
+from apps.submissions.models import Submission
+
+
+@case('duplicates')
+def find_duplicates_hod(ctx):
+    DuplicateIndexService.find_duplicates(ctx.submission, ctx.hod)
+
+
+@case('duplicates')
+def find_duplicates_admin(ctx):
+    DuplicateIndexService.find_duplicates(ctx.submission, ctx.admin)
+
+
+@case('duplicates', repeat=3)
+def index_500_submissions(ctx):
+    DuplicateIndexService.index_submissions(
+        Submission.objects.filter(department=ctx.department).order_by('id').values_list('pk', flat=True)[:500]
+    )
@@ -0,0 +1,20 @@
+"""
+Review queues, evaluated to a list as the review pages do
+"""
+from apps.reviews.services import ReviewService
+from benchmarks.harness import case
+
+
+@case('queues')
+def hod_queue(ctx):
+    list(ReviewService.get_pending_reviews(ctx.hod))
+
+
+@case('queues')
+def dean_queue(ctx):
+    list(ReviewService.get_pending_reviews(ctx.dean))
+
+
+@case('queues')
+def other_approver_queue(ctx):
+    list(ReviewService.get_pending_reviews(ctx.approver))
@@ -0,0 +1,45 @@
+"""
+ScoringService paths behind the dashboards
+"""
+from apps.dashboards.services import ScoringService
+from benchmarks.harness import case
+
+
+@case('scoring')
+def faculty_scores(ctx):
+    ScoringService.get_faculty_scores(ctx.faculty, ctx.month, ctx.year)
+
+
+@case('scoring')
+def hod_scores(ctx):
+    ScoringService.get_hod_scores(ctx.hod, ctx.month, ctx.year)
+
+
+@case('scoring')
+def department_average_for_subparam(ctx):
+    ScoringService.get_department_average_for_subparam(ctx.department, ctx.sub_parameter, ctx.month, ctx.year)
+
+
+@case('scoring')
+def department_comparison(ctx):
+    ScoringService.get_department_comparison(ctx.month, ctx.year)
+
+
+@case('scoring')
+def main_parameter_breakdown(ctx):
+    ScoringService.get_main_parameter_breakdown(ctx.department, ctx.month, ctx.year)
+
+
+@case('scoring')
+def main_parameter_breakdown_all(ctx):
+    ScoringService.get_main_parameter_breakdown(None, ctx.month, ctx.year)
+
+
+@case('scoring')
+def submission_status_counts(ctx):
+    ScoringService.get_submission_status_counts(department=ctx.department, month=ctx.month, year=ctx.year)
+
+
+@case('scoring')
+def faculty_leaderboard(ctx):
+    ScoringService.get_faculty_leaderboard(month=ctx.month, year=ctx.year)
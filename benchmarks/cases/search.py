@@ -0,0 +1,27 @@
+"""
+Full-text search over submission field values, unfiltered and filtered by
+department and period, through the service and the search page
+"""
+from django.urls import reverse
+from benchmarks.harness import case
+from apps.submissions.search import SubmissionSearchService
+
+
+@case('search')
+def search_admin_phrase(ctx):
+    SubmissionSearchService.search(ctx.admin, '"machine learning"')
+
+
+@case('search')
+def search_admin_terms(ctx):
+    SubmissionSearchService.search(ctx.admin, 'survey blockchain security')
+
+
+@case('search')
+def search_hod_department_month(ctx):
+    SubmissionSearchService.search(ctx.hod, 'renewable energy', department=ctx.department.pk, **ctx.period)
+
+
+@case('search')
+def search_page_dean(ctx):
+    ctx.get(ctx.dean, reverse('submissions:submission_search'), {'q': 'image processing', 'page': 2})
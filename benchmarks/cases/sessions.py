@@ -0,0 +1,22 @@
+"""
+Session writes per request: saving on every request against the sliding
+refresh of SessionRefreshMiddleware (compare the query counts)
+"""
+from django.test.utils import override_settings
+from django.urls import reverse
+from benchmarks.harness import case
+
+
+def _request(ctx):
+    ctx.get(ctx.faculty, reverse('notifications:notification_list'))
+
+
+@case('sessions')
+def request_save_every_request(ctx):
+    with override_settings(SESSION_SAVE_EVERY_REQUEST=True):
+        _request(ctx)
+
+
+@case('sessions')
+def request_sliding_refresh(ctx):
+    _request(ctx)
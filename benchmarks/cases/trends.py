@@ -0,0 +1,42 @@
+"""
+Multi-month trends: TrendService against one ScoringService call per month
+"""
+from apps.dashboards.services import ScoringService, TrendService
+from benchmarks.harness import case
+
+
+def _range(ctx, months=12):
+    return TrendService.get_default_range(ctx.month, ctx.year, months)
+
+
+@case('trends')
+def department_trend(ctx):
+    TrendService.get_department_trend(*_range(ctx))
+
+
+@case('trends', repeat=1)
+def department_comparison_per_month(ctx):
+    for month, year in TrendService.get_periods(*_range(ctx)):
+        ScoringService.get_department_comparison(month, year)
+
+
+@case('trends')
+def main_parameter_trend(ctx):
+    TrendService.get_main_parameter_trend(*_range(ctx))
+
+
+@case('trends')
+def main_parameter_breakdown_per_month(ctx):
+    for month, year in TrendService.get_periods(*_range(ctx)):
+        ScoringService.get_main_parameter_breakdown(ctx.department, month, year)
+
+
+@case('trends')
+def user_trend(ctx):
+    TrendService.get_user_trend(ctx.faculty, *_range(ctx))
+
+
+@case('trends')
+def faculty_scores_per_month(ctx):
+    for month, year in TrendService.get_periods(*_range(ctx)):
+        ScoringService.get_faculty_scores(ctx.faculty, month, year)
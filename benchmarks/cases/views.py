@@ -0,0 +1,90 @@
+"""
+Full request/response cycles for dashboards, queues, detail pages and exports
+"""
+from django.urls import reverse
+from benchmarks.harness import case
+
+
+@case('views')
+def faculty_dashboard(ctx):
+    ctx.get(ctx.faculty, reverse('dashboards:dashboard'), ctx.period)
+
+
+@case('views')
+def hod_dashboard(ctx):
+    ctx.get(ctx.hod, reverse('dashboards:dashboard'), ctx.period)
+
+
+@case('views')
+def dean_dashboard(ctx):
+    ctx.get(ctx.dean, reverse('dashboards:dashboard'), ctx.period)
+
+
+@case('views')
+def admin_dashboard(ctx):
+    ctx.get(ctx.admin, reverse('dashboards:dashboard'), ctx.period)
+
+
+@case('views')
+def chart_department_comparison(ctx):
+    ctx.get(ctx.admin, reverse('dashboards:chart_department_comparison'), ctx.period)
+
+
+@case('views')
+def chart_leaderboard(ctx):
+    ctx.get(ctx.dean, reverse('dashboards:chart_leaderboard'), ctx.period)
+
+
+@case('views')
+def trends_json(ctx):
+    ctx.get(ctx.admin, reverse('dashboards:trends'))
+
+
+@case('views')
+def hod_review_list(ctx):
+    ctx.get(ctx.hod, reverse('reviews:review_list'))
+
+
+@case('views')
+def dean_review_list(ctx):
+    ctx.get(ctx.dean, reverse('reviews:dean_review_list'), ctx.period)
+
+
+@case('views')
+def review_detail(ctx):
+    ctx.get(ctx.hod, reverse('reviews:review_detail', args=[ctx.submission.pk]))
+
+
+@case('views')
+def submission_list(ctx):
+    ctx.get(ctx.faculty, reverse('submissions:submission_list'))
+
+
+@case('views')
+def submission_detail(ctx):
+    ctx.get(ctx.submission.user, reverse('submissions:submission_detail', args=[ctx.submission.pk]))
+
+
+@case('views')
+def notification_list(ctx):
+    ctx.get(ctx.faculty, reverse('notifications:notification_list'))
+
+
+@case('exports', repeat=3)
+def hod_export_csv(ctx):
+    ctx.get(ctx.hod, reverse('submissions:export_submissions_csv'), {'year': ctx.year})
+
+
+@case('exports', repeat=3)
+def admin_export_csv_month(ctx):
+    ctx.get(ctx.admin, reverse('submissions:export_submissions_csv'), ctx.period)
+
+
+@case('views')
+def admin_user_list(ctx):
+    ctx.get(ctx.admin, reverse('accounts:user_list'))
+
+
+@case('views')
+def admin_user_search(ctx):
+    ctx.get(ctx.admin, reverse('accounts:user_list'), {'search': ctx.faculty.full_name.split()[-1]})
@@ -0,0 +1,148 @@
+"""
+Benchmark registry, runner and JSON report helpers
+
+Cases register themselves with the @case decorator and receive a shared
+BenchmarkContext describing the seeded dataset. Each case is run once to
+warm up, then timed `repeat` times; queries are captured on the last run.
+"""
+import json
+import statistics
+import time
+from collections import Counter
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+CASES = []
+
+
+class Case:
+    """A registered benchmark"""
+
+    def __init__(self, group, name, func, repeat=None):
+        self.group = group
+        self.name = name
+        self.func = func
+        self.repeat = repeat
+
+    @property
+    def label(self):
+        return f'{self.group}.{self.name}'
+
+
+def case(group, name=None, repeat=None):
+    """Register a benchmark function taking a BenchmarkContext"""
+    def decorator(func):
+        CASES.append(Case(group, name or func.__name__, func, repeat))
+        return func
+    return decorator
+
+
+class BenchmarkContext:
+    """
+    Sample objects picked deterministically from the generated dataset
+    """
+
+    def __init__(self):
+        from apps.accounts.models import User
+        from apps.common.constants import SubmissionStatus, UserRole
+        from apps.common.management.commands.generate_load_data import EMAIL_DOMAIN
+        from apps.kpi.models import SubParameter
+        from apps.submissions.models import Submission
+
+        users = User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').order_by('id')
+        self.admin = users.filter(role=UserRole.ADMIN).first()
+        self.hod = users.filter(role=UserRole.HOD).first()
+        self.department = self.hod.department
+        self.dean = users.filter(role=UserRole.DEAN, dean_departments=self.department).first()
+        self.faculty = users.filter(role=UserRole.FACULTY, department=self.department).first()
+        self.approver = users.filter(role=UserRole.FACULTY, department__isnull=True).first()
+
+        latest = Submission.objects.filter(user=self.faculty).order_by('-year', '-month').first()
+        self.month, self.year = latest.month, latest.year
+        self.sub_parameter = SubParameter.objects.filter(
+            main_parameter__role_owner=UserRole.FACULTY
+        ).order_by('id').first()
+        self.submission = Submission.objects.filter(
+            department=self.department, status=SubmissionStatus.SUBMITTED
+        ).order_by('id').first()
+        self._clients = {}
+
+    @property
+    def period(self):
+        return {'month': self.month, 'year': self.year}
+
+    def client(self, user):
+        """A test client logged in as user (cached per user)"""
+        if user.pk not in self._clients:
+            client = Client()
+            client.force_login(user)
+            self._clients[user.pk] = client
+        return self._clients[user.pk]
+
+    def get(self, user, path, data=None, status=200):
+        """GET path as user, consuming streamed content, and check the status"""
+        response = self.client(user).get(path, data)
+        if response.status_code != status:
+            raise AssertionError(f'GET {path} returned {response.status_code}, expected {status}')
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response
+
+
+def run_case(bench, ctx, repeat):
+    """Time one case and return its result row"""
+    repeat = bench.repeat or repeat
+    bench.func(ctx)
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            bench.func(ctx)
+            timings.append((time.perf_counter() - started) * 1000)
+    statements = Counter(q['sql'] for q in captured.captured_queries)
+    return {
+        'group': bench.group,
+        'name': bench.name,
+        'runs': repeat,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': len(captured.captured_queries),
+        'duplicate_queries': sum(count - 1 for count in statements.values()),
+    }
+
+
+def select_cases(patterns=None):
+    """Registered cases whose label contains any of the patterns"""
+    if not patterns:
+        return list(CASES)
+    return [bench for bench in CASES if any(p in bench.label for p in patterns)]
+
+
+def format_row(result):
+    return (f"{result['group'] + '.' + result['name']:<56} "
+            f"{result['median_ms']:10.2f} ms {result['queries']:6d} q {result['duplicate_queries']:5d} dup")
+
+
+def write_report(path, meta, results):
+    with open(path, 'w') as handle:
+        json.dump({'meta': meta, 'results': results}, handle, indent=2)
+
+
+def compare_reports(baseline_path, results):
+    """Yield comparison lines of results against a previous report"""
+    with open(baseline_path) as handle:
+        baseline = {(r['group'], r['name']): r for r in json.load(handle)['results']}
+    for result in results:
+        before = baseline.get((result['group'], result['name']))
+        label = f"{result['group']}.{result['name']}"
+        if not before:
+            yield f'{label:<56} (new)'
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        yield (f"{label:<56} {before['median_ms']:9.2f} -> {result['median_ms']:9.2f} ms ({ratio:5.2f}x)  "
+               f"{before['queries']:5d} -> {result['queries']:5d} q")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Run the benchmark suite and write a JSON report
+Run with: python benchmarks/run.py [-k scoring] [--departments 20] [--users 1000] [--years 3]
+          [--repeat 5] [--output report.json] [--compare baseline.json] [--keepdb]
+
+Seeds a throwaway test database with generate_load_data (deterministic for a
+given seed and volume), so reports from different commits can be compared.
+With --keepdb the test database and its data are reused between runs.
+"""
+import argparse
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+import django
+
+# Setup Django
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'rtc_kpi.settings')
+django.setup()
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import setup_test_environment
+from apps.accounts.models import User
+from apps.common.management.commands.generate_load_data import EMAIL_DOMAIN
+from apps.submissions.models import Submission
+from benchmarks import cases  # noqa: F401 (registers cases)
+from benchmarks.harness import (
+    BenchmarkContext, compare_reports, format_row, run_case, select_cases, write_report
+)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='patterns', action='append', help='Only run cases whose label contains this')
+    parser.add_argument('--departments', type=int, default=20)
+    parser.add_argument('--users', type=int, default=1000, help='Faculty users')
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case')
+    parser.add_argument('--output', help='Report path (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='Previous report to compare against')
+    parser.add_argument('--keepdb', action='store_true', help='Reuse the test database and its data')
+    parser.add_argument('--list', action='store_true', help='List cases and exit')
+    args = parser.parse_args()
+
+    selected = select_cases(args.patterns)
+    if args.list:
+        for bench in selected:
+            print(bench.label)
+        return
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    try:
+        if not User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').exists():
+            print('Seeding...')
+            call_command(
+                'generate_load_data', departments=args.departments, users=args.users,
+                years=args.years, seed=args.seed, stdout=open(os.devnull, 'w')
+            )
+        ctx = BenchmarkContext()
+        meta = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'dataset': {
+                'departments': args.departments,
+                'users': args.users,
+                'years': args.years,
+                'seed': args.seed,
+                'submissions': Submission.objects.count(),
+            },
+            'period': ctx.period,
+            'repeat': args.repeat,
+        }
+        print(f"{meta['dataset']['submissions']} submissions, period {ctx.month}/{ctx.year}\n")
+
+        results = []
+        for bench in selected:
+            result = run_case(bench, ctx, args.repeat)
+            results.append(result)
+            print(format_row(result))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+    output = args.output or os.path.join(
+        BASE_DIR, 'benchmarks', 'results', datetime.now().strftime('%Y%m%d-%H%M%S') + '.json'
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    write_report(output, meta, results)
+    print(f'\nReport written to {output}')
+
+    if args.compare:
+        print(f'\nCompared with {args.compare}:')
+        for line in compare_reports(args.compare, results):
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+"""
+Root pytest configuration
+"""
+pytest_plugins = ['apps.common.pytest_plugin']
@@ -4,7 +4,10 @@ Django settings for RTC KPI System project.
 Production-ready configuration with environment variable support.
 """
 import os
+import sys
 from pathlib import Path
+import django
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -48,11 +51,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.common.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'apps.common.routers.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'apps.common.middleware.SessionRefreshMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.common.middleware.AuditBufferMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -79,6 +86,25 @@ TEMPLATES = [
 WSGI_APPLICATION = 'rtc_kpi.wsgi.application'
 
 # Database
+# Process role for database settings: 'web' for the app server (and
+# runserver), 'worker' for other management commands. Set DB_PROCESS_ROLE
+# to override, e.g. for a dedicated worker container.
+DB_PROCESS_ROLE = os.getenv('DB_PROCESS_ROLE') or (
+    'worker' if os.path.basename(sys.argv[0]) == 'manage.py' and len(sys.argv) > 1
+    and sys.argv[1] != 'runserver' else 'web'
+)
+
+# Statement timeout per process role in milliseconds (0: server default).
+# Requests are cut off early; migrations and batch commands may run long.
+DB_STATEMENT_TIMEOUTS = {
+    'web': int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000')),
+    'worker': int(os.getenv('DB_WORKER_STATEMENT_TIMEOUT_MS', '0')),
+}
+
+# Optional connection pool (psycopg 3 pool, Django 5.1+). 0 disables it;
+# persistent connections (DB_CONN_MAX_AGE) are used instead.
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '0'))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -87,12 +113,94 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', 'rtc_password_change_me'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        # Keep connections open across requests instead of reconnecting for
+        # each one, and ping a reused connection before its first query
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        # Required behind PgBouncer in transaction pooling mode
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', 'False') == 'True',
+        'OPTIONS': {
+            'application_name': f'rtc_kpi:{DB_PROCESS_ROLE}',
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+        },
     }
 }
 
+if DB_STATEMENT_TIMEOUTS.get(DB_PROCESS_ROLE):
+    # Startup parameter; PgBouncer rejects it, so set DB_STATEMENT_TIMEOUT_MS=0
+    # there and use ALTER ROLE ... SET statement_timeout instead
+    DATABASES['default']['OPTIONS']['options'] = (
+        f'-c statement_timeout={DB_STATEMENT_TIMEOUTS[DB_PROCESS_ROLE]}'
+    )
+
+if DB_POOL_MAX_SIZE:
+    if django.VERSION < (5, 1):
+        raise ImproperlyConfigured(
+            'DB_POOL_MAX_SIZE needs Django 5.1+ with psycopg 3; use persistent connections '
+            '(DB_CONN_MAX_AGE) or PgBouncer instead'
+        )
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        'max_size': DB_POOL_MAX_SIZE,
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    }
+    # Pooled connections are returned to the pool after each request
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# Read replica for dashboards and exports (apps.common.routers). Reads
+# opted in with read_from_replica() go here; writes always go to default.
+REPLICA_DATABASE = 'replica'
+REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', '5'))
+if os.getenv('DB_REPLICA_HOST'):
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.getenv('DB_REPLICA_HOST'),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': {**DATABASES['default']['OPTIONS'], 'application_name': f'rtc_kpi:{DB_PROCESS_ROLE}:replica'},
+        # Tests run against the primary only
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['apps.common.routers.ReplicaRouter']
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
+# Password hashing (apps.accounts.hashers). PASSWORD_HASHER picks the hasher
+# for new passwords: 'pbkdf2', 'scrypt' or 'argon2' (needs argon2-cffi). The
+# others stay listed so existing hashes verify; they are rehashed with the
+# preferred hasher and current costs on the user's next login.
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'apps.accounts.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'apps.accounts.hashers.TunedScryptPasswordHasher',
+    'argon2': 'apps.accounts.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+if PASSWORD_HASHER not in PASSWORD_HASHER_CLASSES:
+    raise ImproperlyConfigured(f'PASSWORD_HASHER must be one of {", ".join(PASSWORD_HASHER_CLASSES)}')
+if PASSWORD_HASHER == 'argon2':
+    try:
+        import argon2  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured('PASSWORD_HASHER=argon2 needs the argon2-cffi package')
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+# Hashing costs; 0 keeps Django's defaults. Lower them where login CPU
+# matters more than offline cracking cost (development, load tests).
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', '0'))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv('PASSWORD_SCRYPT_WORK_FACTOR', '0'))
+if PASSWORD_SCRYPT_WORK_FACTOR & (PASSWORD_SCRYPT_WORK_FACTOR - 1):
+    raise ImproperlyConfigured('PASSWORD_SCRYPT_WORK_FACTOR must be a power of 2')
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', '0'))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv('PASSWORD_ARGON2_MEMORY_COST', '0'))
+# Threads hashing passwords of bulk imports
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 1)))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -148,14 +256,104 @@ ALLOWED_FILE_TYPES = os.getenv(
     '.pdf,.doc,.docx,.xls,.xlsx,.jpg,.jpeg,.png,.zip'
 ).split(',')
 
+# Attachment downloads: '' streams them from Django; 'nginx' hands them to
+# nginx with X-Accel-Redirect under SENDFILE_URL (an internal location
+# aliased to MEDIA_ROOT), 'xsendfile' uses X-Sendfile (Apache, lighttpd)
+SENDFILE_BACKEND = os.getenv('SENDFILE_BACKEND', '')
+SENDFILE_URL = os.getenv('SENDFILE_URL', '/protected-media/')
+
+# Attachment previews (generate_previews worker)
+ATTACHMENT_PREVIEW_SIZE = int(os.getenv('ATTACHMENT_PREVIEW_SIZE', '480'))
+ATTACHMENT_PREVIEW_WORKERS = int(os.getenv('ATTACHMENT_PREVIEW_WORKERS', '2'))
+
+# Submission search (apps.submissions.search): PostgreSQL text search
+# configuration of the indexed field values. Run rebuild_search_index after
+# changing it.
+SUBMISSION_SEARCH_CONFIG = os.getenv('SUBMISSION_SEARCH_CONFIG', 'english')
+
+# Dashboard trends (maximum number of months per trend request)
+TREND_MAX_MONTHS = int(os.getenv('TREND_MAX_MONTHS', '60'))
+
+# Field analytics reports (cached per field, scope and data watermark), in seconds
+FIELD_ANALYTICS_CACHE_TIMEOUT = int(os.getenv('FIELD_ANALYTICS_CACHE_TIMEOUT', '3600'))
+
+# Query instrumentation (per-request query count, DB time, repeated SQL)
+QUERY_INSTRUMENTATION = os.getenv('QUERY_INSTRUMENTATION', str(DEBUG)) == 'True'
+
+# Maximum queries per request, keyed by URL name. Exceeding a budget logs a
+# warning and fails the test under the pytest plugin. Budgets must not
+# depend on the number of rows shown.
+QUERY_BUDGETS = {
+    'dashboards:dashboard': 20,
+    'submissions:submission_list': 10,
+    'submissions:submission_detail': 12,
+    'submissions:export_submissions_csv': 8,
+    'submissions:attachment_download': 6,
+    'reviews:review_list': 10,
+    'reviews:review_detail': 15,
+    'reviews:dean_review_list': 10,
+    'notifications:notification_list': 10,
+}
+
+# Activity log writer (apps.common.audit)
+AUDIT_BUFFER_SIZE = int(os.getenv('AUDIT_BUFFER_SIZE', '500'))
+AUDIT_QUEUE_ENABLED = os.getenv('AUDIT_QUEUE_ENABLED', 'False') == 'True'
+AUDIT_QUEUE_SIZE = int(os.getenv('AUDIT_QUEUE_SIZE', '10000'))
+AUDIT_QUEUE_TIMEOUT = float(os.getenv('AUDIT_QUEUE_TIMEOUT', '0.05'))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '1.0'))
+
+# Activity log retention (roll_activity_log command)
+ACTIVITY_LOG_RETENTION_MONTHS = int(os.getenv('ACTIVITY_LOG_RETENTION_MONTHS', '24'))
+ACTIVITY_LOG_PARTITIONS_AHEAD = int(os.getenv('ACTIVITY_LOG_PARTITIONS_AHEAD', '3'))
+ACTIVITY_LOG_ARCHIVE_DIR = os.getenv('ACTIVITY_LOG_ARCHIVE_DIR', str(BASE_DIR / 'archive' / 'activity_logs'))
+
+# Cached authorization snapshots (dean departments per user), in seconds
+AUTHZ_CACHE_TIMEOUT = int(os.getenv('AUTHZ_CACHE_TIMEOUT', '3600'))
+
 # Login/Logout URLs
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 
+# Cache: 'locmem' (per process), 'redis', 'memcached' or 'file', with
+# CACHE_LOCATION as the server URL(s) or directory
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f'CACHE_BACKEND must be one of {", ".join(CACHE_BACKENDS)}')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
 # Session Settings
+# SESSION_BACKEND: 'db', 'cached_db' (database with a cache in front),
+# 'cache' (cache only) or 'signed_cookies' (no server-side storage; logout
+# cannot revoke a copied cookie). Cache-backed sessions need a cache shared
+# by all workers, not 'locmem'.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'db')
+if SESSION_BACKEND not in SESSION_ENGINES:
+    raise ImproperlyConfigured(f'SESSION_BACKEND must be one of {", ".join(SESSION_ENGINES)}')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
 SESSION_COOKIE_AGE = 86400  # 24 hours
-SESSION_SAVE_EVERY_REQUEST = True
+# Sliding expiry without a write per request: SessionRefreshMiddleware saves
+# the session (renewing its expiry) only once less than this many seconds
+# of its lifetime remain
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_THRESHOLD = int(os.getenv('SESSION_REFRESH_THRESHOLD', str(SESSION_COOKIE_AGE // 2)))
 
 # Security Settings (Production)
 SECURE_SSL_REDIRECT = os.getenv('SECURE_SSL_REDIRECT', 'False') == 'True'
@@ -191,6 +389,11 @@ LOGGING = {
         'level': 'INFO',
     },
     'loggers': {
+        'apps.common.queries': {
+            'handlers': ['console'],
+            'level': os.getenv('QUERY_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
         'django': {
             'handlers': ['console'],
             'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
@@ -24,9 +24,9 @@ urlpatterns = [
     path('forms/', include('apps.forms_builder.urls')),
 ]
 
-# Serve media files in development
+# Serve static files in development (attachments are only served by
+# submissions:attachment_download, which checks permissions)
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 
 # Admin site customization
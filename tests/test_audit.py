@@ -0,0 +1,98 @@
+"""
+Tests for the buffered activity log writer
+"""
+import queue
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, transaction
+from django.contrib.auth import get_user_model
+from apps.common.audit import AuditWriter, audit_writer
+from apps.common.models import ActivityLog
+from apps.common.constants import UserRole, ActivityAction
+from apps.common.utils import log_activity
+
+User = get_user_model()
+
+
+def make_user():
+    return User.objects.create_user(
+        email='admin@rtc.edu', password='test123', full_name='Admin', role=UserRole.ADMIN
+    )
+
+
+def log(user, description, **kwargs):
+    log_activity(actor=user, action=ActivityAction.UPDATED, target=user, description=description, **kwargs)
+
+
+class TransactionBufferTest(TestCase):
+    """Test entries are written once the transaction commits"""
+    
+    def setUp(self):
+        self.user = make_user()
+    
+    def test_single_insert_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                for i in range(3):
+                    log(self.user, f'Entry {i}')
+                self.assertEqual(ActivityLog.objects.count(), 0)
+        with CaptureQueriesContext(connection) as ctx:
+            for callback in callbacks:
+                callback()
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ActivityLog.objects.count(), 3)
+    
+    def test_rolled_back_savepoint_is_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                log(self.user, 'Kept')
+                try:
+                    with transaction.atomic():
+                        log(self.user, 'Dropped')
+                        raise ValueError
+                except ValueError:
+                    pass
+        self.assertEqual(list(ActivityLog.objects.values_list('description', flat=True)), ['Kept'])
+    
+    @override_settings(AUDIT_BUFFER_SIZE=2)
+    def test_full_buffer_written_inside_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for i in range(5):
+                    log(self.user, f'Entry {i}')
+                self.assertEqual(ActivityLog.objects.count(), 4)
+        self.assertEqual(ActivityLog.objects.count(), 5)
+
+
+class RequestAndQueueTest(TransactionTestCase):
+    """Test buffering outside transactions and the background queue"""
+    
+    def setUp(self):
+        self.user = make_user()
+    
+    def test_request_scope_writes_once(self):
+        with CaptureQueriesContext(connection) as ctx:
+            with audit_writer.request_scope():
+                for i in range(3):
+                    log(self.user, f'Entry {i}')
+                self.assertEqual(ActivityLog.objects.count(), 0)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ActivityLog.objects.count(), 3)
+    
+    @override_settings(AUDIT_QUEUE_ENABLED=True, AUDIT_FLUSH_INTERVAL=0.01)
+    def test_non_critical_entries_written_by_background_thread(self):
+        log(self.user, 'Deferred', critical=False)
+        audit_writer.drain()
+        self.assertEqual(ActivityLog.objects.filter(description='Deferred').count(), 1)
+    
+    @override_settings(AUDIT_QUEUE_TIMEOUT=0)
+    def test_full_queue_writes_synchronously(self):
+        writer = AuditWriter()
+        full = queue.Queue(maxsize=1)
+        full.put(None)
+        writer._ensure_worker = lambda: full
+        writer.enqueue([ActivityLog(actor=self.user, action=ActivityAction.UPDATED, target_model='User',
+                                    target_id=self.user.id, description='Overflow')])
+        self.assertEqual(ActivityLog.objects.filter(description='Overflow').count(), 1)
@@ -0,0 +1,92 @@
+"""
+Tests for the orphaned media file cleanup command
+"""
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from apps.departments.models import Department
+from apps.kpi.models import MainParameter, SubParameter
+from apps.submissions.models import Submission
+from apps.submissions.services import AttachmentService
+from apps.common.constants import UserRole
+
+User = get_user_model()
+
+DAY = 24 * 3600
+
+
+class CleanupOrphanedFilesTest(TestCase):
+    """Test unreferenced files are removed and referenced ones kept"""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        dept = Department.objects.create(code='CSE', name='Computer Science')
+        faculty = User.objects.create_user(
+            email='faculty@rtc.edu', password='test123', full_name='Faculty',
+            role=UserRole.FACULTY, department=dept
+        )
+        main_param = MainParameter.objects.create(name='Research', weightage=25, role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Papers', max_points=50)
+        submission = Submission.objects.create(user=faculty, sub_parameter=sub_param, month=1, year=2025)
+        self.attachment = AttachmentService.attach(
+            submission, None, SimpleUploadedFile('paper.pdf', b'%PDF-1.4 kept', content_type='application/pdf')
+        )
+        self.kept = self.media_path(self.attachment.file.name)
+        self.age(self.kept)
+    
+    def media_path(self, name):
+        return os.path.join(self.media_root, *name.split('/'))
+    
+    def write(self, name, content=b'orphan', age=2 * DAY):
+        path = self.media_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as handle:
+            handle.write(content)
+        self.age(path, age)
+        return path
+    
+    def age(self, path, seconds=2 * DAY):
+        then = time.time() - seconds
+        os.utime(path, (then, then))
+    
+    def run_cleanup(self, **options):
+        out = StringIO()
+        call_command('cleanup_orphaned_files', stdout=out, **options)
+        return out.getvalue()
+    
+    def test_deletes_old_orphans_only(self):
+        orphan = self.write('attachments/blobs/aa/bb/gone.pdf', b'x' * 2048)
+        staged = self.write('attachments/incoming/abc123')
+        recent = self.write('attachments/blobs/cc/dd/new.pdf', age=60)
+        
+        output = self.run_cleanup(workers=2)
+        
+        self.assertFalse(os.path.exists(orphan))
+        self.assertFalse(os.path.exists(staged))
+        self.assertTrue(os.path.exists(recent))
+        self.assertTrue(os.path.exists(self.kept))
+        self.assertIn('Deleted 2 file(s), reclaimed 2.0\xa0KB', output)
+    
+    def test_dry_run_lists_without_deleting(self):
+        orphan = self.write('attachments/blobs/aa/bb/gone.pdf')
+        output = self.run_cleanup(dry_run=True)
+        self.assertTrue(os.path.exists(orphan))
+        self.assertIn('attachments/blobs/aa/bb/gone.pdf', output)
+    
+    def test_path_limits_scan(self):
+        inside = self.write('attachments/incoming/abc123')
+        outside = self.write('exports/old.zip')
+        self.run_cleanup(path='attachments')
+        self.assertFalse(os.path.exists(inside))
+        self.assertTrue(os.path.exists(outside))
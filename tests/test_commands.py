@@ -0,0 +1,185 @@
+"""
+Tests for management commands
+"""
+import shutil
+import tempfile
+from io import StringIO
+from datetime import timedelta
+from django.contrib.sessions.models import Session
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from apps.accounts.models import User
+from apps.submissions.models import Attachment, AttachmentBlob, Submission, SubmissionFieldValue
+from apps.kpi.models import MainParameter, SubParameter
+from apps.reviews.models import Review
+from apps.common.constants import UserRole
+
+
+class GenerateLoadDataTest(TestCase):
+    """Test the synthetic load data generator"""
+    
+    def generate(self, **options):
+        call_command(
+            'generate_load_data', departments=2, users=4, years=1, stdout=StringIO(), **options
+        )
+        return list(Submission.objects.order_by('id').values_list(
+            'user__email', 'sub_parameter__name', 'month', 'status', 'awarded_points'
+        ))
+    
+    def test_generates_consistent_data(self):
+        """Test volumes and the department snapshot of generated rows"""
+        self.generate()
+        self.assertEqual(User.objects.filter(role=UserRole.FACULTY, department__isnull=False).count(), 4)
+        self.assertEqual(Submission.objects.filter(owner_role=UserRole.FACULTY).count(), 4 * 12 * 2)
+        self.assertTrue(SubmissionFieldValue.objects.exists())
+        self.assertTrue(Review.objects.exists())
+        for submission in Submission.objects.select_related('user'):
+            self.assertEqual(submission.department_id, submission.user.department_id)
+    
+    def test_deterministic_for_seed(self):
+        """Test the same seed regenerates the same dataset"""
+        first = self.generate()
+        second = self.generate(clear=True)
+        self.assertEqual(first, second)
+    
+    def test_refuses_to_duplicate(self):
+        """Test a second run without --clear fails"""
+        self.generate()
+        with self.assertRaises(CommandError):
+            self.generate()
+
+
+class DedupeAttachmentsTest(TestCase):
+    """Test legacy attachments are moved onto shared blobs"""
+    
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        user = User.objects.create_user(
+            email='faculty@test.com', password='test123', full_name='Test Faculty', role=UserRole.FACULTY
+        )
+        main_param = MainParameter.objects.create(name='Research', weightage=25, role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Journal Papers', max_points=50)
+        self.submission = Submission.objects.create(user=user, sub_parameter=sub_param, month=1, year=2025)
+    
+    def legacy_attachment(self, name, content):
+        attachment = Attachment(
+            submission=self.submission, original_name=name, file_size=len(content),
+            content_type='application/pdf'
+        )
+        attachment.file.save(name, ContentFile(content), save=False)
+        attachment.save()
+        return attachment
+    
+    def test_duplicates_share_blob(self):
+        """Test identical legacy files end up as one blob"""
+        first = self.legacy_attachment('a.pdf', b'%PDF-1.4 same')
+        second = self.legacy_attachment('b.pdf', b'%PDF-1.4 same')
+        old_name = first.file.name
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('dedupe_attachments', stdout=StringIO())
+        
+        first.refresh_from_db()
+        second.refresh_from_db()
+        blob = AttachmentBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(first.blob, blob)
+        self.assertEqual(second.file.name, blob.file.name)
+        self.assertFalse(blob.file.storage.exists(old_name))
+        self.assertEqual(second.file.read(), b'%PDF-1.4 same')
+
+
+class PurgeExpiredSessionsTest(TestCase):
+    """Test expired sessions are deleted in batches"""
+    
+    def test_only_expired_deleted(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key=f'expired{i}', session_data='', expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key='active', session_data='', expire_date=now + timedelta(days=1))
+        
+        out = StringIO()
+        call_command('purge_expired_sessions', batch_size=2, stdout=out)
+        
+        self.assertIn('Deleted 5 expired session(s).', out.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['active'])
+    
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_cookie_sessions_have_nothing_to_purge(self):
+        out = StringIO()
+        call_command('purge_expired_sessions', stdout=out)
+        self.assertIn('nothing to purge', out.getvalue())
+
+
+class RebuildDuplicateIndexTest(TestCase):
+    """Test the pooled fingerprint rebuild"""
+    
+    def test_indexes_bulk_loaded_submissions(self):
+        """Test spawned workers fingerprint submissions written without signals"""
+        from apps.forms_builder.models import DynamicFormTemplate, DynamicField
+        from apps.submissions.duplicates import DuplicateIndexService
+        from apps.submissions.models import SubmissionFingerprint
+        
+        user = User.objects.create_user(email='faculty@test.com', password='test123', full_name='Faculty')
+        main_param = MainParameter.objects.create(name='Research', role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Papers', max_points=50)
+        template = DynamicFormTemplate.objects.create(sub_parameter=sub_param)
+        field = DynamicField.objects.create(template=template, name='link', label='Link', field_type='url')
+        submissions = Submission.objects.bulk_create([
+            Submission(user=user, sub_parameter=sub_param, month=month, year=2025) for month in (1, 2, 3)
+        ])
+        SubmissionFieldValue.objects.bulk_create([
+            SubmissionFieldValue(submission=submission, field=field, field_name='link', value='https://example.org/p')
+            for submission in submissions
+        ])
+        
+        out = StringIO()
+        call_command('rebuild_duplicate_index', workers=2, batch_size=2, stdout=out)
+        self.assertIn('Rebuilt fingerprints of 3 submission(s)', out.getvalue())
+        self.assertEqual(SubmissionFingerprint.objects.filter(kind='url').count(), 3)
+        duplicates = DuplicateIndexService.find_duplicates(submissions[0], user)
+        self.assertEqual([duplicate['submission'].pk for duplicate in duplicates], [submissions[2].pk, submissions[1].pk])
+        
+        call_command('rebuild_duplicate_index', missing=True, workers=1, stdout=out)
+        self.assertIn('Rebuilt fingerprints of 0 submission(s)', out.getvalue())
+
+
+class BackfillTypedValuesTest(TestCase):
+    """Test the typed column backfill"""
+    
+    def test_parses_bulk_loaded_values(self):
+        """Test values written without save() get their typed columns"""
+        from decimal import Decimal
+        from apps.forms_builder.models import DynamicFormTemplate, DynamicField
+        
+        user = User.objects.create_user(email='faculty@test.com', password='test123', full_name='Faculty')
+        main_param = MainParameter.objects.create(name='Research', role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Papers', max_points=50)
+        template = DynamicFormTemplate.objects.create(sub_parameter=sub_param)
+        number = DynamicField.objects.create(template=template, name='count', label='Count', field_type='number')
+        text = DynamicField.objects.create(template=template, name='title', label='Title', field_type='text')
+        submissions = Submission.objects.bulk_create([
+            Submission(user=user, sub_parameter=sub_param, month=month, year=2025) for month in (1, 2, 3)
+        ])
+        SubmissionFieldValue.objects.bulk_create([
+            SubmissionFieldValue(submission=submission, field=field, field_name=field.name, value=str(i))
+            for i, submission in enumerate(submissions)
+            for field in (number, text)
+        ])
+        
+        out = StringIO()
+        call_command('backfill_typed_values', batch_size=2, stdout=out)
+        self.assertIn('Backfilled 3 field value(s)', out.getvalue())
+        self.assertEqual(
+            list(SubmissionFieldValue.objects.filter(field=number).order_by('id').values_list('value_num', flat=True)),
+            [Decimal('0'), Decimal('1'), Decimal('2')]
+        )
+        self.assertFalse(SubmissionFieldValue.objects.filter(field=text, value_num__isnull=False).exists())
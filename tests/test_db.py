@@ -0,0 +1,133 @@
+"""
+Tests for database connection statistics
+"""
+import contextvars
+import json
+import unittest
+from io import StringIO
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.core.management import call_command
+from django.db import connection
+from django.contrib.auth import get_user_model
+from apps.common.constants import UserRole
+from apps.common.db import connection_stats
+from apps.common.routers import (
+    PIN_COOKIE, ReplicaPinningMiddleware, ReplicaRouter, read_from_replica, replica_iterator
+)
+from apps.submissions.models import Submission
+from django.contrib.sessions.models import Session
+
+User = get_user_model()
+
+
+class ConnectionStatsTest(TestCase):
+    """Test the db_pool_stats command and view"""
+    
+    def test_reports_connection_settings(self):
+        stats = connection_stats()
+        self.assertEqual(stats['vendor'], connection.vendor)
+        self.assertEqual(stats['conn_max_age'], connection.settings_dict['CONN_MAX_AGE'])
+        self.assertEqual(stats['process_role'], 'web')
+    
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'pg_stat_activity is PostgreSQL specific')
+    def test_counts_server_connections(self):
+        server = connection_stats()['server']
+        self.assertGreaterEqual(server['total'], 1)
+        self.assertIn('rtc_kpi:web', server['applications'])
+    
+    def test_command_json(self):
+        out = StringIO()
+        call_command('db_pool_stats', json=True, stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['alias'], 'default')
+    
+    def test_view_is_admin_only(self):
+        faculty = User.objects.create_user(
+            email='faculty@rtc.edu', password='test123', full_name='Faculty', role=UserRole.FACULTY
+        )
+        admin = User.objects.create_user(
+            email='admin@rtc.edu', password='test123', full_name='Admin', role=UserRole.ADMIN
+        )
+        url = reverse('common:db_pool_stats')
+        
+        self.client.force_login(faculty)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        
+        self.client.force_login(admin)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['vendor'], connection.vendor)
+
+
+@override_settings(
+    DATABASES={**settings.DATABASES, 'replica': dict(settings.DATABASES['default'])},
+    REPLICA_DATABASE='replica',
+    REPLICA_PIN_SECONDS=5
+)
+class ReplicaRouterTest(SimpleTestCase):
+    """Test opted-in reads go to the replica until something writes"""
+    
+    def setUp(self):
+        self.router = ReplicaRouter()
+    
+    def run_isolated(self, func, *args):
+        # Routing state lives in a context variable; keep it per test
+        return contextvars.copy_context().run(func, *args)
+    
+    def test_reads_opt_in(self):
+        def check():
+            self.assertEqual(self.router.db_for_read(Submission), 'default')
+            with read_from_replica():
+                self.assertEqual(self.router.db_for_read(Submission), 'replica')
+                self.assertEqual(Submission.objects.all().db, 'replica')
+                self.assertEqual(self.router.db_for_read(Session), 'default')
+        self.run_isolated(check)
+    
+    def test_write_pins_to_primary(self):
+        def check():
+            with read_from_replica():
+                self.assertEqual(self.router.db_for_write(Submission), 'default')
+                self.assertEqual(self.router.db_for_read(Submission), 'default')
+        self.run_isolated(check)
+    
+    def test_session_write_does_not_pin(self):
+        def check():
+            with read_from_replica():
+                self.router.db_for_write(Session)
+                self.assertEqual(self.router.db_for_read(Submission), 'replica')
+        self.run_isolated(check)
+    
+    def test_replica_iterator(self):
+        def reads():
+            for _ in range(2):
+                yield self.router.db_for_read(Submission)
+        self.assertEqual(self.run_isolated(lambda: list(replica_iterator(reads()))), ['replica', 'replica'])
+    
+    @override_settings(REPLICA_DATABASE=None)
+    def test_inactive_without_replica(self):
+        with read_from_replica():
+            self.assertIsNone(self.router.db_for_read(Submission))
+    
+    def test_middleware_pins_after_write(self):
+        def view(request):
+            with read_from_replica():
+                response = HttpResponse(self.router.db_for_read(Submission))
+            if request.method == 'POST':
+                self.router.db_for_write(Submission)
+            return response
+        middleware = ReplicaPinningMiddleware(view)
+        factory = RequestFactory()
+        
+        response = self.run_isolated(middleware, factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        
+        response = self.run_isolated(middleware, factory.post('/'))
+        self.assertEqual(response.content, b'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+        
+        request = factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.run_isolated(middleware, request).content, b'default')
@@ -0,0 +1,215 @@
+"""
+Tests for attachment downloads (authorization, Range, conditional GET)
+"""
+import csv
+import io
+import shutil
+import tempfile
+import zipfile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from apps.departments.models import Department
+from apps.kpi.models import MainParameter, SubParameter
+from apps.submissions.models import Submission
+from apps.submissions.services import AttachmentService
+from apps.common.constants import UserRole
+from apps.common.http import parse_range
+from apps.common.zipstream import ZipEntry, iter_zip
+
+User = get_user_model()
+
+CONTENT = b'%PDF-1.4 ' + bytes(range(256)) * 4
+
+
+class ParseRangeTest(TestCase):
+    """Test Range header parsing"""
+    
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-9', 100), (0, 9))
+        self.assertEqual(parse_range('bytes=90-', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=-10', 100), (90, 99))
+        self.assertEqual(parse_range('bytes=50-500', 100), (50, 99))
+    
+    def test_ignored_headers(self):
+        self.assertIsNone(parse_range(None, 100))
+        self.assertIsNone(parse_range('bytes=0-1,5-6', 100))
+        self.assertIsNone(parse_range('items=0-1', 100))
+    
+    def test_unsatisfiable(self):
+        with self.assertRaises(ValueError):
+            parse_range('bytes=100-', 100)
+        with self.assertRaises(ValueError):
+            parse_range('bytes=9-3', 100)
+
+
+class AttachmentTestCase(TestCase):
+    
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        dept = Department.objects.create(code='CSE', name='Computer Science')
+        other_dept = Department.objects.create(code='ECE', name='Electronics')
+        self.faculty = User.objects.create_user(
+            email='faculty@rtc.edu', password='test123', full_name='Faculty',
+            role=UserRole.FACULTY, department=dept
+        )
+        self.hod = User.objects.create_user(
+            email='hod@rtc.edu', password='test123', full_name='HoD', role=UserRole.HOD, department=dept
+        )
+        self.other_faculty = User.objects.create_user(
+            email='other@rtc.edu', password='test123', full_name='Other',
+            role=UserRole.FACULTY, department=dept
+        )
+        self.other_hod = User.objects.create_user(
+            email='otherhod@rtc.edu', password='test123', full_name='Other HoD',
+            role=UserRole.HOD, department=other_dept
+        )
+        main_param = MainParameter.objects.create(name='Research', weightage=25, role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Papers', max_points=50)
+        self.dept = dept
+        self.sub_param = sub_param
+        self.submission = Submission.objects.create(
+            user=self.faculty, sub_parameter=sub_param, month=1, year=2025
+        )
+        self.attachment = AttachmentService.attach(
+            self.submission, None, SimpleUploadedFile('My Paper.pdf', CONTENT, content_type='application/pdf')
+        )
+
+
+class AttachmentDownloadTest(AttachmentTestCase):
+    """Test the authorized attachment download view"""
+    
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('submissions:attachment_download', args=[self.attachment.pk])
+    
+    def get(self, user=None, **headers):
+        self.client.force_login(user or self.faculty)
+        return self.client.get(self.url, headers=headers)
+    
+    def test_full_download(self):
+        """Test the whole file is streamed with validators and range support"""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], f'"{self.attachment.blob.sha256}"')
+        self.assertIn('attachment; filename="My Paper.pdf"', response['Content-Disposition'])
+    
+    def test_partial_content(self):
+        """Test a byte range returns 206 with only those bytes"""
+        response = self.get(range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], '10')
+    
+    def test_suffix_range(self):
+        """Test a suffix range returns the final bytes"""
+        response = self.get(range='bytes=-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-5:])
+    
+    def test_unsatisfiable_range(self):
+        """Test a range past the end returns 416"""
+        response = self.get(range=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+    
+    def test_stale_if_range_returns_full_file(self):
+        """Test a mismatched If-Range validator ignores the range"""
+        response = self.get(range='bytes=0-9', if_range='"stale"')
+        self.assertEqual(response.status_code, 200)
+        
+        response = self.get(range='bytes=0-9', if_range=f'"{self.attachment.blob.sha256}"')
+        self.assertEqual(response.status_code, 206)
+    
+    def test_conditional_get(self):
+        """Test a matching If-None-Match returns 304 without a body"""
+        response = self.get(if_none_match=f'"{self.attachment.blob.sha256}"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+    
+    def test_permissions(self):
+        """Test the HoD of the department can download and others get 404"""
+        self.assertEqual(self.get(self.hod).status_code, 200)
+        self.assertEqual(self.get(self.other_faculty).status_code, 404)
+        self.assertEqual(self.get(self.other_hod).status_code, 404)
+    
+    @override_settings(SENDFILE_BACKEND='nginx', SENDFILE_URL='/protected-media/')
+    def test_x_accel_redirect(self):
+        """Test nginx offload returns an empty response with the internal path"""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.attachment.file.name}')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+
+class IterZipTest(TestCase):
+    """Test archives streamed from chunked entries"""
+    
+    def test_round_trip(self):
+        data = bytes(range(256)) * 1000
+        entries = [
+            ZipEntry('a/data.bin', (data[i:i + 4096] for i in range(0, len(data), 4096))),
+            ZipEntry('b/photo.jpg', [b'\xff\xd8\xff' + data[:100]], content_type='image/jpeg'),
+        ]
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(iter_zip(entries))))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.read('a/data.bin'), data)
+        self.assertEqual(archive.getinfo('a/data.bin').compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(archive.getinfo('b/photo.jpg').compress_type, zipfile.ZIP_STORED)
+
+
+class EvidenceExportTest(AttachmentTestCase):
+    """Test the streamed evidence ZIP for a department and month"""
+    
+    def export(self, user, **params):
+        self.client.force_login(user)
+        params = {'month': 1, 'year': 2025, **params}
+        return self.client.get(reverse('submissions:export_evidence_zip'), params)
+    
+    def test_hod_exports_department_month(self):
+        """Test the archive holds each attachment and a manifest row for it"""
+        other_month = Submission.objects.create(
+            user=self.faculty, sub_parameter=self.sub_param, month=2, year=2025
+        )
+        AttachmentService.attach(
+            other_month, None, SimpleUploadedFile('Later.pdf', b'%PDF-1.4 later', content_type='application/pdf')
+        )
+        
+        response = self.export(self.hod)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertIn('evidence-cse-2025-01.zip', response['Content-Disposition'])
+        
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        path = f'faculty/papers/{self.attachment.pk}-My_Paper.pdf'
+        self.assertEqual(archive.namelist(), [path, 'manifest.csv'])
+        self.assertEqual(archive.read(path), CONTENT)
+        
+        rows = list(csv.DictReader(io.StringIO(archive.read('manifest.csv').decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['Path'], path)
+        self.assertEqual(rows[0]['SHA-256'], self.attachment.blob.sha256)
+    
+    def test_missing_file_noted_in_manifest(self):
+        """Test a file missing from storage is listed but not archived"""
+        self.attachment.file.storage.delete(self.attachment.file.name)
+        response = self.export(self.hod)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), ['manifest.csv'])
+        self.assertIn('File missing from storage', archive.read('manifest.csv').decode('utf-8-sig'))
+    
+    def test_permissions(self):
+        """Test only managers of the department can export it"""
+        self.assertEqual(self.export(self.faculty).status_code, 404)
+        self.assertEqual(self.export(self.other_hod, department=self.dept.pk).status_code, 404)
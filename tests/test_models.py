@@ -4,6 +4,7 @@ Unit tests for models
 """
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
 from apps.departments.models import Department
 from apps.kpi.models import MainParameter, SubParameter
 from apps.submissions.models import Submission
@@ -43,6 +44,54 @@ class UserModelTest(TestCase):
         self.assertTrue(user.is_admin)
 
 
+class AuthzSnapshotTest(TestCase):
+    """Test the cached authorization snapshot"""
+    
+    def setUp(self):
+        self.cse = Department.objects.create(code='CSE', name='Computer Science')
+        self.ece = Department.objects.create(code='ECE', name='Electronics')
+        self.dean = User.objects.create_user(
+            email='dean@test.com', password='test123', full_name='Dean', role=UserRole.DEAN
+        )
+        self.dean.dean_departments.add(self.cse)
+    
+    def fresh_dean(self):
+        return User.objects.get(pk=self.dean.pk)
+    
+    def test_snapshot_cached_per_version(self):
+        """Test dean departments are read once, then served from the cache"""
+        self.assertEqual(self.fresh_dean().authz.dean_department_ids, {self.cse.pk})
+        dean = self.fresh_dean()
+        with self.assertNumQueries(0):
+            self.assertTrue(dean.can_view_department(self.cse))
+            self.assertFalse(dean.can_view_department(self.ece))
+    
+    def test_changes_invalidate_snapshot(self):
+        """Test adding departments from either side is seen immediately"""
+        self.fresh_dean().authz
+        self.dean.dean_departments.add(self.ece)
+        self.assertEqual(self.fresh_dean().authz.dean_department_ids, {self.cse.pk, self.ece.pk})
+        
+        self.cse.deans.clear()
+        self.assertEqual(self.fresh_dean().authz.dean_department_ids, {self.ece.pk})
+    
+    def test_save_after_change_keeps_version(self):
+        """Test saving a stale-looking instance does not restore the old version"""
+        self.dean.dean_departments.add(self.ece)
+        self.dean.full_name = 'Renamed Dean'
+        self.dean.save()
+        self.assertEqual(self.fresh_dean().authz.dean_department_ids, {self.cse.pk, self.ece.pk})
+    
+    def test_role_checks(self):
+        hod = User.objects.create_user(
+            email='hod@test.com', password='test123', full_name='HoD', role=UserRole.HOD, department=self.cse
+        )
+        self.assertTrue(hod.authz.manages_department(self.cse.pk))
+        self.assertFalse(hod.authz.manages_department(self.ece.pk))
+        self.assertEqual(list(hod.get_managed_departments()), [self.cse])
+        self.assertEqual(list(self.dean.get_managed_departments()), [self.cse])
+
+
 class MainParameterTest(TestCase):
     """Test MainParameter model"""
     
@@ -92,3 +141,131 @@ class SubmissionTest(TestCase):
         )
         self.assertEqual(submission.status, SubmissionStatus.DRAFT)
         self.assertTrue(submission.can_edit())
+    
+    def test_department_snapshot(self):
+        """Test the owner's department and role are copied on creation"""
+        submission = Submission.objects.create(
+            user=self.user,
+            sub_parameter=self.sub_param,
+            month=1,
+            year=2025
+        )
+        self.assertEqual(submission.department, self.dept)
+        self.assertEqual(submission.owner_role, UserRole.FACULTY)
+        self.assertEqual(submission.get_department(), self.dept)
+    
+    def test_department_change_moves_in_flight_submissions(self):
+        """Test only unreviewed submissions follow a department change"""
+        pending = Submission.objects.create(
+            user=self.user, sub_parameter=self.sub_param, month=1, year=2025,
+            status=SubmissionStatus.SUBMITTED
+        )
+        approved = Submission.objects.create(
+            user=self.user, sub_parameter=self.sub_param, month=2, year=2025,
+            status=SubmissionStatus.DEAN_APPROVED
+        )
+        new_dept = Department.objects.create(code='ECE', name='Electronics')
+        self.user.department = new_dept
+        self.user.save()
+        
+        pending.refresh_from_db()
+        approved.refresh_from_db()
+        self.assertEqual(pending.department, new_dept)
+        self.assertEqual(approved.department, self.dept)
+    
+    def test_partial_save_skips_attribution_lookup(self):
+        """Test saves that cannot change department or role do not re-read the user"""
+        with self.assertNumQueries(1):
+            update_last_login(None, self.user)
+        
+        new_dept = Department.objects.create(code='ECE', name='Electronics')
+        pending = Submission.objects.create(
+            user=self.user, sub_parameter=self.sub_param, month=1, year=2025
+        )
+        self.user.department = new_dept
+        self.user.save(update_fields=['department'])
+        pending.refresh_from_db()
+        self.assertEqual(pending.department, new_dept)
+
+
+class FieldValueTypedColumnsTest(TestCase):
+    """Test typed columns of field values and per-field statistics"""
+    
+    def setUp(self):
+        from apps.forms_builder.models import DynamicFormTemplate, DynamicField
+        
+        self.user = User.objects.create_user(
+            email='faculty@test.com', password='test123', full_name='Faculty', role=UserRole.FACULTY
+        )
+        main_param = MainParameter.objects.create(name='Research', role_owner=UserRole.FACULTY)
+        self.sub_param = SubParameter.objects.create(main_parameter=main_param, name='Papers', max_points=50)
+        template = DynamicFormTemplate.objects.create(sub_parameter=self.sub_param)
+        self.fields = {
+            name: DynamicField.objects.create(template=template, name=name, label=name, field_type=field_type)
+            for name, field_type in [
+                ('citations', 'number'), ('share', 'percentage'), ('held_on', 'date'),
+                ('tags', 'multiselect'), ('venue', 'text'),
+            ]
+        }
+    
+    def save_values(self, month, data):
+        from apps.submissions.services import SubmissionService
+        submission, _ = Submission.objects.get_or_create(
+            user=self.user, sub_parameter=self.sub_param, month=month, year=2025
+        )
+        SubmissionService.save_submission_data(submission, data)
+        return submission
+    
+    def test_values_are_parsed_on_save(self):
+        """Test each field type fills its typed column, including on update"""
+        from datetime import date
+        from decimal import Decimal
+        
+        submission = self.save_values(1, {
+            'citations': Decimal('12'), 'share': '33.3333333', 'held_on': date(2025, 1, 9),
+            'tags': ['ai', 'ml'], 'venue': 'IEEE',
+        })
+        values = {value.field_name: value for value in submission.field_values.all()}
+        self.assertEqual(values['citations'].value_num, Decimal('12'))
+        self.assertEqual(values['share'].value_num, Decimal('33.333333'))
+        self.assertEqual(values['held_on'].value_date, date(2025, 1, 9))
+        self.assertEqual(values['tags'].value_json, ['ai', 'ml'])
+        self.assertIsNone(values['venue'].value_num)
+        
+        self.save_values(1, {'citations': 'not a number', 'held_on': '2025-02-30', 'tags': []})
+        values = {value.field_name: value for value in submission.field_values.all()}
+        self.assertIsNone(values['citations'].value_num)
+        self.assertIsNone(values['held_on'].value_date)
+        self.assertEqual(values['tags'].value_json, [])
+    
+    def test_out_of_range_numbers_are_not_parsed(self):
+        """Test numbers that round up to the column limit are left unparsed instead of overflowing"""
+        from decimal import Decimal
+        from apps.submissions.models import SubmissionFieldValue
+        
+        submission = self.save_values(1, {'citations': Decimal('99999999999999.9999999')})
+        self.assertIsNone(submission.field_values.get(field_name='citations').value_num)
+        # Checked without a round trip: SQLite stores decimals as floats
+        self.assertEqual(
+            SubmissionFieldValue.parse_value('percentage', '-99999999999999.9999994'),
+            Decimal('-99999999999999.999999')
+        )
+    
+    def test_field_stats(self):
+        """Test per-field aggregates are computed over parsed values only"""
+        from datetime import date
+        from decimal import Decimal
+        from apps.submissions.models import SubmissionFieldValue
+        
+        for month, citations, held_on in [(1, '4', '2025-01-05'), (2, '10', '2025-02-01'), (3, 'NaN', '')]:
+            self.save_values(month, {'citations': citations, 'held_on': held_on, 'venue': 'IEEE'})
+        
+        stats = SubmissionFieldValue.objects.field_stats(self.fields['citations'])
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(stats['sum'], Decimal('14'))
+        self.assertEqual(stats['avg'], Decimal('7'))
+        self.assertEqual((stats['min'], stats['max']), (Decimal('4'), Decimal('10')))
+        
+        stats = SubmissionFieldValue.objects.filter(submission__month__gte=2).field_stats(self.fields['held_on'])
+        self.assertEqual(stats, {'count': 1, 'min': date(2025, 2, 1), 'max': date(2025, 2, 1)})
+        self.assertEqual(SubmissionFieldValue.objects.field_stats(self.fields['venue']), {'count': 3})
@@ -0,0 +1,127 @@
+"""
+Tests for activity log partitioning, retention and archival
+"""
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+from django.test import TestCase
+from django.core.management import call_command
+from django.db import connection, connections
+from django.contrib.auth import get_user_model
+from apps.common.models import ActivityLog
+from apps.common.constants import UserRole, ActivityAction
+from apps.common.partitions import (
+    add_months, create_partition, default_partition_name, drop_partition, is_partitioned, list_partitions,
+    partition_name
+)
+
+User = get_user_model()
+TABLE = ActivityLog._meta.db_table
+
+
+def at(year, month, day=15):
+    return datetime(year, month, day, 12, 0, tzinfo=dt_timezone.utc)
+
+
+class ActivityLogTestCase(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='admin@rtc.edu', password='test123', full_name='Admin', role=UserRole.ADMIN
+        )
+
+    def add_log(self, created_at, description='Entry'):
+        return ActivityLog.objects.create(
+            actor=self.user, action=ActivityAction.UPDATED, target_model='User',
+            target_id=self.user.pk, description=description, created_at=created_at
+        )
+
+
+class ActivityLogQuerySetTest(ActivityLogTestCase):
+    """Test the time-bounded queryset helpers"""
+
+    def test_for_month_bounds(self):
+        self.add_log(at(2024, 1, 31))
+        inside = self.add_log(at(2024, 2, 1))
+        self.add_log(at(2024, 3, 1))
+        self.assertEqual(list(ActivityLog.objects.for_month(2024, 2)), [inside])
+
+    def test_in_period_end_is_exclusive(self):
+        first = self.add_log(at(2024, 5, 1))
+        self.add_log(at(2024, 6, 1))
+        result = ActivityLog.objects.in_period(at(2024, 5, 1), at(2024, 6, 1))
+        self.assertEqual(list(result), [first])
+
+
+class RollActivityLogTest(ActivityLogTestCase):
+    """Test expired months are archived before they are removed"""
+
+    def test_expired_month_archived_and_removed(self):
+        today = date.today()
+        old_year, old_month = add_months(today.year, today.month, -30)
+        self.add_log(at(old_year, old_month), 'Expired')
+        kept = self.add_log(at(today.year, today.month, 1), 'Kept')
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command('roll_activity_log', retain_months=24, archive_dir=archive_dir, stdout=StringIO())
+            path = os.path.join(archive_dir, f'{partition_name(TABLE, old_year, old_month)}.jsonl.gz')
+            with gzip.open(path, 'rt', encoding='utf-8') as handle:
+                rows = [json.loads(line) for line in handle]
+
+        self.assertEqual([row['description'] for row in rows], ['Expired'])
+        self.assertEqual(list(ActivityLog.objects.all()), [kept])
+
+    def test_dry_run_changes_nothing(self):
+        self.add_log(at(2000, 1))
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command('roll_activity_log', dry_run=True, archive_dir=archive_dir, stdout=StringIO())
+            self.assertEqual(os.listdir(archive_dir), [])
+        self.assertEqual(ActivityLog.objects.count(), 1)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Table partitioning is PostgreSQL specific')
+class PartitionTest(ActivityLogTestCase):
+    """Test monthly partition management"""
+
+    def test_table_is_partitioned(self):
+        self.assertTrue(is_partitioned(TABLE))
+        today = date.today()
+        names = [name for name, _, _ in list_partitions(TABLE)]
+        self.assertIn(partition_name(TABLE, today.year, today.month), names)
+
+    def test_create_partition_moves_rows_from_default(self):
+        entry = self.add_log(at(2001, 6))
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {default_partition_name(TABLE)}')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+        self.assertTrue(create_partition(TABLE, 2001, 6))
+        self.assertFalse(create_partition(TABLE, 2001, 6))
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {default_partition_name(TABLE)}')
+            self.assertEqual(cursor.fetchone()[0], 0)
+            cursor.execute(f'SELECT id FROM {partition_name(TABLE, 2001, 6)}')
+            self.assertEqual(cursor.fetchall(), [(entry.pk,)])
+
+    def test_helpers_use_the_given_database(self):
+        """Test helpers run on the `using` alias and never on the default database"""
+        # 'archive' is the test connection under another alias; the helpers
+        # only see that alias, so touching the default database fails
+        setattr(connections._connections, 'archive', connection)
+        self.addCleanup(delattr, connections._connections, 'archive')
+        entry = self.add_log(at(2001, 7))
+
+        with mock.patch('apps.common.partitions.connections', {'archive': connection}):
+            self.assertTrue(is_partitioned(TABLE, using='archive'))
+            self.assertTrue(create_partition(TABLE, 2001, 7, using='archive'))
+            names = [name for name, _, _ in list_partitions(TABLE, using='archive')]
+            self.assertIn(partition_name(TABLE, 2001, 7), names)
+            self.assertEqual(ActivityLog.objects.get(), entry)
+            drop_partition(TABLE, partition_name(TABLE, 2001, 7), using='archive')
+            self.assertFalse(ActivityLog.objects.exists())
@@ -0,0 +1,170 @@
+"""
+Tests for attachment preview generation and the preview view
+"""
+import io
+import shutil
+import tempfile
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from PIL import Image
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from apps.departments.models import Department
+from apps.kpi.models import MainParameter, SubParameter
+from apps.submissions.models import AttachmentBlob, Submission
+from apps.submissions.services import AttachmentService
+from apps.common.constants import UserRole, PreviewStatus
+
+User = get_user_model()
+
+
+def png_upload(name='photo.png', size=(1200, 800)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class CrashingPool(Executor):
+    """
+    Inline stand-in for the renderer pool: rendering a path in crash_paths
+    breaks it the way a killed renderer process breaks a ProcessPoolExecutor
+    """
+    
+    crash_paths = set()
+    created = 0
+    
+    def __init__(self, *args, **kwargs):
+        CrashingPool.created += 1
+        self.broken = False
+    
+    def submit(self, fn, kind, source_path, *args):
+        if self.broken:
+            raise BrokenProcessPool('A child process terminated abruptly')
+        future = Future()
+        if source_path in self.crash_paths:
+            self.broken = True
+            future.set_exception(BrokenProcessPool('A child process terminated abruptly'))
+        else:
+            future.set_result(fn(kind, source_path, *args))
+        return future
+
+
+class AttachmentPreviewTest(TestCase):
+    """Test the generate_previews worker and the preview view"""
+    
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, ATTACHMENT_PREVIEW_SIZE=200)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        dept = Department.objects.create(code='CSE', name='Computer Science')
+        self.faculty = User.objects.create_user(
+            email='faculty@rtc.edu', password='test123', full_name='Faculty',
+            role=UserRole.FACULTY, department=dept
+        )
+        self.other_faculty = User.objects.create_user(
+            email='other@rtc.edu', password='test123', full_name='Other',
+            role=UserRole.FACULTY, department=dept
+        )
+        main_param = MainParameter.objects.create(name='Research', weightage=25, role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Papers', max_points=50)
+        self.submission = Submission.objects.create(
+            user=self.faculty, sub_parameter=sub_param, month=1, year=2025
+        )
+    
+    def generate(self):
+        call_command('generate_previews', once=True, workers=1, stdout=StringIO())
+    
+    def test_image_preview_generated_and_served(self):
+        attachment = AttachmentService.attach(self.submission, None, png_upload())
+        self.assertEqual(attachment.blob.preview_status, PreviewStatus.PENDING)
+        
+        self.generate()
+        
+        attachment.blob.refresh_from_db()
+        self.assertEqual(attachment.blob.preview_status, PreviewStatus.READY)
+        with attachment.blob.preview.open('rb') as handle:
+            with Image.open(handle) as preview:
+                self.assertEqual(preview.format, 'JPEG')
+                self.assertEqual(preview.size, (200, 133))
+        
+        self.client.force_login(self.faculty)
+        response = self.client.get(reverse('submissions:attachment_preview', args=[attachment.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertTrue(response['Content-Disposition'].startswith('inline'))
+    
+    def test_unsupported_type_has_no_preview(self):
+        attachment = AttachmentService.attach(
+            self.submission, None,
+            SimpleUploadedFile('notes.docx', b'PK\x03\x04docx', content_type='application/msword')
+        )
+        self.generate()
+        
+        attachment.blob.refresh_from_db()
+        self.assertEqual(attachment.blob.preview_status, PreviewStatus.UNSUPPORTED)
+        self.client.force_login(self.faculty)
+        response = self.client.get(reverse('submissions:attachment_preview', args=[attachment.pk]))
+        self.assertEqual(response.status_code, 404)
+    
+    def test_preview_hidden_from_other_users(self):
+        attachment = AttachmentService.attach(self.submission, None, png_upload())
+        self.generate()
+        
+        self.client.force_login(self.other_faculty)
+        response = self.client.get(reverse('submissions:attachment_preview', args=[attachment.pk]))
+        self.assertEqual(response.status_code, 404)
+    
+    def test_release_deletes_preview(self):
+        attachment = AttachmentService.attach(self.submission, None, png_upload())
+        self.generate()
+        attachment.blob.refresh_from_db()
+        storage, name = attachment.blob.preview.storage, attachment.blob.preview.name
+        self.assertTrue(storage.exists(name))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            attachment.delete()
+        self.assertFalse(storage.exists(name))
+    
+    def test_claimed_blobs_are_skipped_until_stale(self):
+        attachment = AttachmentService.attach(self.submission, None, png_upload())
+        blob = AttachmentBlob.objects.filter(pk=attachment.blob_id)
+        blob.update(preview_status=PreviewStatus.PROCESSING, updated_at=timezone.now())
+        
+        self.generate()
+        self.assertEqual(blob.get().preview_status, PreviewStatus.PROCESSING)
+        
+        blob.update(updated_at=timezone.now() - timedelta(hours=2))
+        self.generate()
+        self.assertEqual(blob.get().preview_status, PreviewStatus.READY)
+    
+    def test_renderer_crash_fails_only_the_crashing_blob(self):
+        first = AttachmentService.attach(self.submission, None, png_upload('first.png', (300, 200)))
+        crashing = AttachmentService.attach(self.submission, None, png_upload('crash.png', (301, 200)))
+        last = AttachmentService.attach(self.submission, None, png_upload('last.png', (302, 200)))
+        CrashingPool.created = 0
+        CrashingPool.crash_paths = {crashing.blob.file.path}
+        
+        with mock.patch(
+            'apps.submissions.management.commands.generate_previews.ProcessPoolExecutor', CrashingPool
+        ):
+            self.generate()
+        
+        statuses = {
+            attachment.pk: AttachmentBlob.objects.get(pk=attachment.blob_id).preview_status
+            for attachment in (first, crashing, last)
+        }
+        self.assertEqual(statuses, {
+            first.pk: PreviewStatus.READY, crashing.pk: PreviewStatus.FAILED, last.pk: PreviewStatus.READY,
+        })
+        # The crashed pool and the one that crashed again in isolation were replaced
+        self.assertEqual(CrashingPool.created, 3)
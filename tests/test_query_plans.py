@@ -0,0 +1,241 @@
+"""
+Query plan tests - assert that scoring and review queries are index-driven
+
+Runs every ScoringService / ReviewService query against a seeded dataset,
+EXPLAINs the captured SQL and checks that the submissions table is read
+through one of its indexes, and that the partial and covering indexes
+built for the query are among them. Sequential scans are disabled while
+explaining, so the check is "an index matches this filter", independent
+of table size.
+"""
+import json
+import unittest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, transaction
+from django.contrib.auth import get_user_model
+from apps.departments.models import Department
+from apps.kpi.models import MainParameter, SubParameter, HodSubParamMapping
+from apps.submissions.models import Submission
+from apps.dashboards.services import ScoringService, TrendService
+from apps.reviews.services import ReviewService
+from apps.accounts.services import UserSearchService
+from apps.common.constants import UserRole, SubmissionStatus, ApprovalRouting
+
+User = get_user_model()
+
+INDEX_SCANS = {'Index Scan', 'Index Only Scan', 'Bitmap Index Scan'}
+
+
+def explain(sql):
+    """Return the JSON plan for a captured statement with seq scans disabled"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def iter_nodes(node):
+    """Walk a plan tree depth first"""
+    yield node
+    for child in node.get('Plans', []):
+        yield from iter_nodes(child)
+
+
+def table_access(plan, table):
+    """List (node type, index name) for every access path to a table"""
+    access = []
+    for node in iter_nodes(plan):
+        if node.get('Relation Name') == table and node['Node Type'] != 'Bitmap Heap Scan':
+            access.append((node['Node Type'], node.get('Index Name')))
+        elif node['Node Type'] == 'Bitmap Index Scan' and node['Index Name'].startswith(table):
+            access.append((node['Node Type'], node['Index Name']))
+    return access
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Query plans are PostgreSQL specific')
+class QueryPlanTest(TransactionTestCase):
+    """
+    Assert index usage for scoring and review queries. Rows are committed
+    and vacuumed, as in production, so covering indexes can be read
+    without visiting the table.
+    """
+
+    def setUp(self):
+        self.departments = Department.objects.bulk_create([
+            Department(code=f'D{i}', name=f'Department {i}') for i in range(4)
+        ])
+        self.dept = self.departments[0]
+        faculty = User.objects.bulk_create([
+            User(email=f'f{d.id}_{i}@rtc.edu', full_name=f'Faculty {i}', role=UserRole.FACULTY, department=d)
+            for d in self.departments for i in range(15)
+        ])
+        self.faculty = faculty[0]
+        # Departments also hold office staff, and retired departments keep
+        # their faculty accounts
+        retired = Department.objects.bulk_create([
+            Department(code=f'R{i}', name=f'Retired {i}', is_active=False) for i in range(8)
+        ])
+        User.objects.bulk_create([
+            User(email=f's{d.id}_{i}@rtc.edu', full_name=f'Staff {i}', role=UserRole.ADMIN, department=d)
+            for d in self.departments for i in range(15)
+        ] + [
+            User(email=f'r{d.id}_{i}@rtc.edu', full_name=f'Faculty {i}', role=UserRole.FACULTY, department=d)
+            for d in retired for i in range(15)
+        ])
+        self.hod = User.objects.create(email='hod@rtc.edu', full_name='HoD', role=UserRole.HOD, department=self.dept)
+        self.dean = User.objects.create(email='dean@rtc.edu', full_name='Dean', role=UserRole.DEAN)
+        self.dean.dean_departments.set(self.departments[:2])
+        self.other = User.objects.create(email='other@rtc.edu', full_name='Other', role=UserRole.FACULTY)
+
+        faculty_param = MainParameter.objects.create(name='Research', role_owner=UserRole.FACULTY)
+        hod_param = MainParameter.objects.create(name='Leadership', role_owner=UserRole.HOD)
+        self.sub_params = SubParameter.objects.bulk_create([
+            SubParameter(main_parameter=faculty_param, name=f'Faculty {i}', max_points=50) for i in range(4)
+        ] + [
+            SubParameter(
+                main_parameter=faculty_param, name='Other routed', max_points=50,
+                approval_routing=ApprovalRouting.OTHER, other_approver_email='other@rtc.edu'
+            )
+        ])
+        hod_sub = SubParameter.objects.create(main_parameter=hod_param, name='Team', max_points=50)
+        HodSubParamMapping.objects.create(hod_subparam=hod_sub, faculty_subparam=self.sub_params[0])
+
+        # Past months are mostly reviewed; only the latest month is still in
+        # the review queues, as in production
+        statuses = [
+            SubmissionStatus.DEAN_APPROVED, SubmissionStatus.DRAFT, SubmissionStatus.REJECTED,
+            SubmissionStatus.DEAN_APPROVED, SubmissionStatus.DRAFT,
+        ]
+        queued = [SubmissionStatus.SUBMITTED, SubmissionStatus.HOD_APPROVED, SubmissionStatus.DRAFT]
+        submissions = []
+        for n, user in enumerate(faculty):
+            for year in (2024, 2025):
+                for month in range(1, 13):
+                    for k, sub_param in enumerate(self.sub_params):
+                        cycle = queued if (year, month) == (2025, 12) else statuses
+                        at = datetime(year, month, 1 + k, tzinfo=dt_timezone.utc)
+                        submissions.append(Submission(
+                            user=user, department_id=user.department_id, owner_role=user.role,
+                            sub_parameter=sub_param, month=month, year=year,
+                            status=cycle[(n + month + k) % len(cycle)], awarded_points=k + 1,
+                            submitted_at=at, reviewed_at=at + timedelta(days=3)
+                        ))
+        submissions.append(Submission(
+            user=self.hod, department=self.dept, owner_role=UserRole.HOD,
+            sub_parameter=hod_sub, month=1, year=2025,
+            status=SubmissionStatus.HOD_APPROVED, awarded_points=10
+        ))
+        Submission.objects.bulk_create(submissions, batch_size=2000)
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM ANALYZE submissions')
+            cursor.execute('VACUUM ANALYZE users')
+
+    def assertIndexDriven(self, func, *indexes):
+        """
+        Run func and assert every submissions read uses a secondary index,
+        and that each of the named indexes is used by one of its queries
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        statements = [q['sql'] for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith('SELECT')]
+        checked = 0
+        used = set()
+        for sql in statements:
+            if '"users"' in sql:
+                used.update(index_name for _, index_name in table_access(explain(sql), 'users'))
+            if '"submissions"' not in sql:
+                continue
+            access = table_access(explain(sql), 'submissions')
+            for node_type, index_name in access:
+                self.assertIn(node_type, INDEX_SCANS, f'{node_type} on submissions for: {sql}')
+                self.assertNotEqual(index_name, 'submissions_pkey', f'Primary key scan for: {sql}')
+            used.update(index_name for _, index_name in access)
+            checked += 1
+        self.assertGreater(checked, 0, 'No submissions queries were captured')
+        for index_name in indexes:
+            self.assertIn(index_name, used, f'{index_name} is not used')
+
+    def test_faculty_scores(self):
+        self.assertIndexDriven(
+            lambda: ScoringService.get_faculty_scores(self.faculty, 3, 2025), 'submissions_approved_user_idx'
+        )
+
+    def test_hod_scores(self):
+        self.assertIndexDriven(
+            lambda: ScoringService.get_hod_scores(self.hod, 1, 2025), 'submissions_dept_approved_idx'
+        )
+
+    def test_department_average_for_subparam(self):
+        self.assertIndexDriven(lambda: ScoringService.get_department_average_for_subparam(
+            self.dept, self.sub_params[0], 3, 2025
+        ), 'submissions_dept_approved_idx')
+
+    def test_department_comparison(self):
+        self.assertIndexDriven(
+            lambda: ScoringService.get_department_comparison(3, 2025),
+            'submissions_dept_approved_idx', 'users_department_role_idx'
+        )
+
+    def test_main_parameter_breakdown(self):
+        self.assertIndexDriven(
+            lambda: ScoringService.get_main_parameter_breakdown(self.dept, 3, 2025), 'submissions_dept_approved_idx'
+        )
+
+    def test_submission_status_counts(self):
+        # Counts cover every status, so no partial index applies
+        self.assertIndexDriven(lambda: ScoringService.get_submission_status_counts(
+            department=self.dept, month=3, year=2025
+        ))
+
+    def test_faculty_leaderboard(self):
+        # No index pinned: owner_role and the row count need the table, so
+        # the per-window index and the (month, year) index cost the same
+        self.assertIndexDriven(lambda: ScoringService.get_faculty_leaderboard(month=3, year=2025))
+
+    def test_department_trend(self):
+        self.assertIndexDriven(
+            lambda: TrendService.get_department_trend((1, 2025), (6, 2025)), 'submissions_approved_per_idx'
+        )
+
+    def test_hod_review_queue(self):
+        self.assertIndexDriven(lambda: list(ReviewService.get_pending_reviews(self.hod)), 'submissions_queue_idx')
+
+    def test_dean_review_queue(self):
+        self.assertIndexDriven(
+            lambda: list(ReviewService.get_pending_reviews(self.dean)), 'submissions_dean_queue_idx'
+        )
+
+    def test_other_approver_queue(self):
+        self.assertIndexDriven(
+            lambda: list(ReviewService.get_pending_reviews(self.other)), 'submissions_queue_idx'
+        )
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Query plans are PostgreSQL specific')
+class UserSearchPlanTest(TestCase):
+    """Assert user search and paging use the trigram and keyset indexes"""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            self.has_trigram = cursor.fetchone() is not None
+
+    def explain_search(self, query, **kwargs):
+        with CaptureQueriesContext(connection) as captured:
+            UserSearchService.search(User.objects.all(), query, **kwargs)
+        return table_access(explain(captured.captured_queries[-1]['sql']), 'users')
+
+    def test_search_uses_trigram_indexes(self):
+        if not self.has_trigram:
+            self.skipTest('pg_trgm is not installed on this server')
+        indexes = {index for _, index in self.explain_search('kumar')}
+        self.assertEqual(indexes, {'users_full_name_trgm_idx', 'users_email_trgm_idx', 'users_employee_id_trgm_idx'})
+
+    def test_list_pages_use_keyset_index(self):
+        indexes = {index for _, index in self.explain_search('')}
+        self.assertEqual(indexes, {'users_full_name_id_idx'})
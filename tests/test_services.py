@@ -2,13 +2,29 @@
 """
 Tests for service layer
 """
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
 from apps.departments.models import Department
 from apps.kpi.models import MainParameter, SubParameter
-from apps.submissions.models import Submission
-from apps.submissions.services import SubmissionService
-from apps.dashboards.services import ScoringService
+from apps.submissions.models import Attachment, AttachmentBlob, Submission
+from apps.submissions.services import AttachmentService, SubmissionService
+from apps.dashboards.services import FieldAnalyticsService, ScoringService, TrendService
+from apps.reviews.services import ReviewService, TimelineService
+from apps.accounts.services import UserPrefixIndex, UserSearchService
+from apps.submissions.search import SubmissionSearchService
+from apps.submissions.duplicates import DuplicateIndexService
+from apps.submissions import fingerprints
 from apps.common.constants import UserRole, SubmissionStatus
 
 User = get_user_model()
@@ -100,3 +116,652 @@ class ScoringServiceTest(TestCase):
         
         scores = ScoringService.get_faculty_scores(self.user, 1, 2025)
         self.assertEqual(scores['total_awarded_points'], 30)
+
+
+class TrendServiceTest(TestCase):
+    """Test multi-month trend service"""
+    
+    def setUp(self):
+        self.dept = Department.objects.create(code='CSE', name='Computer Science')
+        self.user = User.objects.create_user(
+            email='faculty@test.com',
+            password='test123',
+            full_name='Test Faculty',
+            role=UserRole.FACULTY,
+            department=self.dept
+        )
+        self.main_param = MainParameter.objects.create(
+            name='Research',
+            weightage=25,
+            role_owner=UserRole.FACULTY
+        )
+        self.sub_param = SubParameter.objects.create(
+            main_parameter=self.main_param,
+            name='Journal Papers',
+            max_points=50
+        )
+        for month, points in [(12, 5), (1, 10), (2, 20), (4, 5)]:
+            Submission.objects.create(
+                user=self.user,
+                sub_parameter=self.sub_param,
+                month=month,
+                year=2024 if month == 12 else 2025,
+                status=SubmissionStatus.HOD_APPROVED,
+                awarded_points=points
+            )
+    
+    def test_department_trend(self):
+        """Test running totals and month-over-month deltas across a gap"""
+        series = TrendService.get_department_trend((1, 2025), (4, 2025))
+        self.assertEqual(len(series), 1)
+        points = series[0]['points']
+        self.assertEqual([p['total_points'] for p in points], [10, 20, 0, 5])
+        self.assertEqual([p['running_total'] for p in points], [10, 30, 30, 35])
+        self.assertEqual([p['delta'] for p in points], [10, 10, -20, 5])
+    
+    def test_range_spans_years(self):
+        """Test that a range crossing a year boundary is contiguous"""
+        series = TrendService.get_user_trend(self.user, (12, 2024), (1, 2025))
+        points = series[0]['points']
+        self.assertEqual([(p['month'], p['year']) for p in points], [(12, 2024), (1, 2025)])
+        self.assertEqual([p['delta'] for p in points], [5, 5])
+
+
+class TimelineServiceTest(TestCase):
+    """Test the merged submission timeline"""
+    
+    def setUp(self):
+        self.dept = Department.objects.create(code='CSE', name='Computer Science')
+        self.faculty = User.objects.create_user(
+            email='faculty@test.com', password='test123', full_name='Test Faculty',
+            role=UserRole.FACULTY, department=self.dept
+        )
+        self.hod = User.objects.create_user(
+            email='hod@test.com', password='test123', full_name='Test HoD',
+            role=UserRole.HOD, department=self.dept
+        )
+        self.dean = User.objects.create_user(
+            email='dean@test.com', password='test123', full_name='Test Dean', role=UserRole.DEAN
+        )
+        main_param = MainParameter.objects.create(name='Research', weightage=25, role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Journal Papers', max_points=50)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submission = SubmissionService.create_submission(self.faculty, sub_param, 1, 2025)
+            SubmissionService.submit_submission(self.submission)
+            ReviewService.approve_submission(self.submission, self.hod, 40, comment='Good work')
+            ReviewService.dean_approve_faculty(self.faculty, 1, 2025, self.dean)
+    
+    def test_merges_sources_newest_first(self):
+        """Test logs, reviews and approvals are merged without duplicating reviews"""
+        events = TimelineService.get_timeline(submission=self.submission)['events']
+        self.assertEqual(
+            [(event['kind'], event['action']) for event in events],
+            [
+                ('approval', 'APPROVED'),
+                ('review', 'APPROVED'),
+                ('activity', 'SUBMITTED'),
+                ('activity', 'CREATED'),
+            ]
+        )
+        self.assertEqual(events[1]['actor'], self.hod)
+        self.assertEqual(events[1]['points'], 40)
+        self.assertEqual(events[1]['comment'], 'Good work')
+    
+    def test_keyset_pages_cover_timeline(self):
+        """Test walking one-event pages returns every event exactly once"""
+        expected = TimelineService.get_timeline(submission=self.submission)['events']
+        seen = []
+        cursor = None
+        while True:
+            page = TimelineService.get_timeline(submission=self.submission, before=cursor, limit=1)
+            seen.extend(page['events'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual([(e['kind'], e['id']) for e in seen], [(e['kind'], e['id']) for e in expected])
+    
+    def test_user_timeline(self):
+        """Test a user's timeline includes reviews of their submissions"""
+        events = TimelineService.get_timeline(user=self.faculty)['events']
+        self.assertEqual([event['kind'] for event in events], ['approval', 'review'])
+
+
+class UserSearchServiceTest(TestCase):
+    """Test ranked, keyset-paginated user search"""
+    
+    def setUp(self):
+        for email, full_name, employee_id in [
+            ('zed@test.com', 'Zed Exact', 'RAM'),
+            ('ramesh@test.com', 'Ramesh Kumar', 'E1'),
+            ('asha@test.com', 'Asha Raman', 'E2'),
+            ('vikram@test.com', 'Vikram Rao', 'E3'),
+            ('other@test.com', 'Other Person', 'E4'),
+        ]:
+            User.objects.create_user(email=email, password='test123', full_name=full_name, employee_id=employee_id)
+    
+    def names(self, query, **kwargs):
+        return [user.full_name for user in UserSearchService.search(User.objects.all(), query, **kwargs)['users']]
+    
+    def test_ranking(self):
+        """Test exact matches rank first, then prefix matches of any name word"""
+        names = self.names('ram')
+        self.assertEqual(names[:3], ['Zed Exact', 'Asha Raman', 'Ramesh Kumar'])
+        self.assertNotIn('Other Person', names)
+        if UserSearchService.searches_in_database():
+            # The prefix index used on SQLite matches word prefixes only
+            self.assertEqual(names[3:], ['Vikram Rao'])
+    
+    def test_keyset_pages_cover_results(self):
+        """Test walking two-user pages returns every user exactly once, in order"""
+        expected = self.names('')
+        seen = []
+        cursor = None
+        while True:
+            page = UserSearchService.search(User.objects.all(), '', after=cursor, limit=2)
+            seen.extend(user.full_name for user in page['users'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 5)
+    
+    def test_malformed_cursor_returns_first_page(self):
+        self.assertEqual(self.names('', after='not-a-cursor'), self.names(''))
+    
+    def test_prefix_index(self):
+        """Test the in-memory index matches email and name word prefixes"""
+        index = UserPrefixIndex([(1, 'John Doe', 'john.doe@rtc.edu', 'F001'), (2, 'Jane Roe', 'jane@rtc.edu', None)])
+        self.assertEqual(index.search('john.d'), {1})
+        self.assertEqual(index.search('DOE'), {1})
+        self.assertEqual(index.search('j roe'), {2})
+        self.assertEqual(index.search('rtc'), {1, 2})
+        self.assertEqual(index.search('f00'), {1})
+        self.assertEqual(index.search('oe'), set())
+
+
+class AttachmentServiceTest(TestCase):
+    """Test content-addressed attachment storage"""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        dept = Department.objects.create(code='CSE', name='Computer Science')
+        user = User.objects.create_user(
+            email='faculty@test.com', password='test123', full_name='Test Faculty',
+            role=UserRole.FACULTY, department=dept
+        )
+        main_param = MainParameter.objects.create(name='Research', weightage=25, role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Journal Papers', max_points=50)
+        self.submission = Submission.objects.create(user=user, sub_parameter=sub_param, month=1, year=2025)
+    
+    def attach(self, name, content):
+        upload = SimpleUploadedFile(name, content, content_type='application/pdf')
+        return AttachmentService.attach(self.submission, None, upload)
+    
+    def stored_files(self):
+        return [name for _, _, names in os.walk(self.media_root) for name in names]
+    
+    def test_identical_content_stored_once(self):
+        """Test re-uploading the same bytes shares one blob and one file"""
+        first = self.attach('paper.pdf', b'%PDF-1.4 same')
+        second = self.attach('renamed.pdf', b'%PDF-1.4 same')
+        self.assertEqual(first.blob_id, second.blob_id)
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(AttachmentBlob.objects.get().ref_count, 2)
+        self.assertEqual(len(self.stored_files()), 1)
+    
+    def test_same_name_different_content(self):
+        """Test same-named uploads with different bytes do not collide"""
+        first = self.attach('paper.pdf', b'%PDF-1.4 one')
+        second = self.attach('paper.pdf', b'%PDF-1.4 two')
+        self.assertNotEqual(first.file.name, second.file.name)
+        self.assertEqual(first.file.read(), b'%PDF-1.4 one')
+    
+    def test_file_removed_with_last_reference(self):
+        """Test the file outlives every attachment but the last"""
+        first = self.attach('paper.pdf', b'%PDF-1.4 same')
+        second = self.attach('copy.pdf', b'%PDF-1.4 same')
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(AttachmentBlob.objects.get().ref_count, 1)
+        self.assertEqual(len(self.stored_files()), 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(AttachmentBlob.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+    
+    def test_cascade_delete_releases_blob(self):
+        """Test deleting the submission releases its attachments' files"""
+        self.attach('paper.pdf', b'%PDF-1.4 same')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submission.delete()
+        self.assertFalse(Attachment.objects.exists())
+        self.assertFalse(AttachmentBlob.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Concurrent transactions need PostgreSQL')
+class AttachmentStoreRaceTest(TransactionTestCase):
+    """Test a file is not deleted while the same contents are being stored again"""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        user = User.objects.create_user(
+            email='faculty@test.com', password='test123', full_name='Test Faculty', role=UserRole.FACULTY
+        )
+        main_param = MainParameter.objects.create(name='Research', role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Journal Papers', max_points=50)
+        self.submission = Submission.objects.create(user=user, sub_parameter=sub_param, month=1, year=2025)
+    
+    def upload(self):
+        return SimpleUploadedFile('paper.pdf', b'%PDF-1.4 same', content_type='application/pdf')
+    
+    def in_thread(self, target):
+        def run():
+            try:
+                target()
+            finally:
+                connections.close_all()
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+    
+    def test_release_waits_for_concurrent_store(self):
+        """Test the released file survives a store of the same bytes that commits after the release"""
+        attachment = AttachmentService.attach(self.submission, None, self.upload())
+        with mock.patch('apps.submissions.services.transaction.on_commit') as on_commit:
+            attachment.delete()
+        delete_file, = [
+            call.args[0] for call in on_commit.call_args_list
+            if getattr(call.args[0], '__name__', '') == 'delete_file'
+        ]
+        
+        stored, commit = threading.Event(), threading.Event()
+        
+        def store_again():
+            with transaction.atomic():
+                AttachmentService.attach(self.submission, None, self.upload())
+                stored.set()
+                commit.wait(5)
+        
+        storing = self.in_thread(store_again)
+        self.assertTrue(stored.wait(5))
+        deleting = self.in_thread(delete_file)
+        deleting.join(0.5)
+        # Blocked until the new blob is committed
+        self.assertTrue(deleting.is_alive())
+        commit.set()
+        storing.join(5)
+        deleting.join(5)
+        
+        blob = AttachmentBlob.objects.get()
+        self.assertTrue(blob.file.storage.exists(blob.file.name))
+
+
+class SubmissionSearchServiceTest(TestCase):
+    """Test full-text search over submission field values"""
+    
+    def setUp(self):
+        from apps.forms_builder.models import DynamicFormTemplate, DynamicField
+        
+        self.cse = Department.objects.create(code='CSE', name='Computer Science')
+        self.ece = Department.objects.create(code='ECE', name='Electronics')
+        self.faculty = User.objects.create_user(
+            email='faculty@test.com', password='test123', full_name='Faculty',
+            role=UserRole.FACULTY, department=self.cse
+        )
+        self.hod = User.objects.create_user(
+            email='hod@test.com', password='test123', full_name='HoD',
+            role=UserRole.HOD, department=self.cse
+        )
+        self.outsider = User.objects.create_user(
+            email='outsider@test.com', password='test123', full_name='Outsider',
+            role=UserRole.FACULTY, department=self.ece
+        )
+        self.research = MainParameter.objects.create(name='Research', role_owner=UserRole.FACULTY)
+        self.sub_param = SubParameter.objects.create(main_parameter=self.research, name='Papers', max_points=50)
+        template = DynamicFormTemplate.objects.create(sub_parameter=self.sub_param)
+        DynamicField.objects.create(template=template, name='title', label='Title', field_type='text', order=0)
+        DynamicField.objects.create(template=template, name='venue', label='Venue', field_type='textarea', order=1)
+        DynamicField.objects.create(template=template, name='pages', label='Pages', field_type='number', order=2)
+    
+    def submit(self, title, venue, month=None):
+        month = month or 12 - Submission.objects.count()
+        submission = Submission.objects.create(user=self.faculty, sub_parameter=self.sub_param, month=month, year=2025)
+        with self.captureOnCommitCallbacks(execute=True):
+            SubmissionService.save_submission_data(submission, {'title': title, 'venue': venue, 'pages': '4242'})
+        return submission
+    
+    def test_saving_values_builds_one_document(self):
+        """Test a form save schedules one rebuild and indexes text values only"""
+        from apps.submissions.search import _PendingReindex
+        
+        submission = Submission.objects.create(user=self.faculty, sub_parameter=self.sub_param, month=1, year=2025)
+        with self.captureOnCommitCallbacks() as callbacks:
+            SubmissionService.save_submission_data(submission, {'title': 'Graph Mining', 'venue': 'IEEE', 'pages': '4242'})
+        pending = [callback for callback in callbacks if isinstance(callback, _PendingReindex)]
+        self.assertEqual([callback.index for callback in pending].count(SubmissionSearchService.index_submissions), 1)
+        for callback in callbacks:
+            callback()
+        
+        document = submission.search_document
+        self.assertEqual(document.content, 'Graph Mining\nIEEE')
+        self.assertNotIn('4242', document.content)
+    
+    def test_search_ranks_and_highlights(self):
+        """Test matches are ranked by relevance and headlines are escaped with matches marked"""
+        strong = self.submit('Neural networks for neural decoding', 'Neural Networks & Systems')
+        weak = self.submit('Survey of graph networks', 'Journal of Graphs')
+        self.submit('Compiler design', 'Software Practice')
+        
+        results = SubmissionSearchService.search(self.faculty, 'neural networks')['results']
+        self.assertEqual([result['submission'] for result in results], [strong])
+        self.assertIn('<mark>', results[0]['headline'])
+        self.assertIn('&amp;', results[0]['headline'])
+        
+        results = SubmissionSearchService.search(self.faculty, 'networks')['results']
+        self.assertEqual([result['submission'] for result in results], [strong, weak])
+        self.assertEqual(SubmissionSearchService.search(self.faculty, 'the')['results'], [])
+    
+    def test_visibility_and_filters(self):
+        """Test results are limited to visible submissions and the requested filters"""
+        january = self.submit('Deep learning', 'NeurIPS', month=1)
+        march = self.submit('Deep learning again', 'ICML', month=3)
+        
+        def found(user, **filters):
+            return {result['submission'] for result in SubmissionSearchService.search(user, 'learning', **filters)['results']}
+        
+        self.assertEqual(found(self.faculty), {january, march})
+        self.assertEqual(found(self.hod), {january, march})
+        self.assertEqual(found(self.outsider), set())
+        self.assertEqual(found(self.hod, month=3), {march})
+        self.assertEqual(found(self.hod, department=self.ece.pk), set())
+        self.assertEqual(found(self.hod, main_parameter=self.research.pk + 1), set())
+    
+    def test_pages(self):
+        """Test pages do not overlap and has_next marks the last one"""
+        from unittest import mock
+        
+        submissions = {self.submit(f'Robotics study {i}', 'Robotics Journal') for i in range(3)}
+        with mock.patch.object(SubmissionSearchService, 'PAGE_SIZE', 2):
+            first = SubmissionSearchService.search(self.faculty, 'robotics')
+            second = SubmissionSearchService.search(self.faculty, 'robotics', page=2)
+        self.assertTrue(first['has_next'])
+        self.assertFalse(second['has_next'])
+        found = [result['submission'] for result in first['results'] + second['results']]
+        self.assertEqual(len(found), 3)
+        self.assertEqual(set(found), submissions)
+    
+    def test_rebuild_command_indexes_bulk_loads(self):
+        """Test rebuild_search_index indexes values written without signals"""
+        from django.core.management import call_command
+        from apps.submissions.models import SubmissionFieldValue
+        
+        submission = Submission.objects.create(user=self.faculty, sub_parameter=self.sub_param, month=1, year=2025)
+        SubmissionFieldValue.objects.bulk_create([
+            SubmissionFieldValue(submission=submission, field=field, field_name=field.name, value='Quantum sensing')
+            for field in self.sub_param.form_template.fields.filter(name='title')
+        ])
+        self.assertEqual(SubmissionSearchService.search(self.faculty, 'quantum')['results'], [])
+        
+        call_command('rebuild_search_index', '--missing', stdout=open(os.devnull, 'w'))
+        results = SubmissionSearchService.search(self.faculty, 'quantum')['results']
+        self.assertEqual([result['submission'] for result in results], [submission])
+
+
+class InvertedIndexTest(TestCase):
+    """Test the in-process index used where PostgreSQL full-text search is unavailable"""
+    
+    def test_search_and_headline(self):
+        """Test every term must match, rarer terms weigh more and headlines mark matches"""
+        from apps.submissions.search import MARK_START, MARK_STOP, InvertedIndex
+        
+        index = InvertedIndex([
+            (1, 'graph neural networks'),
+            (2, 'graph databases and graph queries'),
+            (3, 'neural graph'),
+        ])
+        self.assertEqual(set(index.search('graph neural')), {1, 3})
+        self.assertEqual(index.search('graph missing'), {})
+        scores = index.search('graph')
+        self.assertGreater(scores[2], scores[1])
+        
+        headline = InvertedIndex.headline('A study of graph databases', 'graph')
+        self.assertEqual(headline, f'A study of {MARK_START}graph{MARK_STOP} databases')
+
+
+class FingerprintTest(TestCase):
+    """Test evidence normalization and title hashing"""
+    
+    def test_canonical_urls(self):
+        """Test equivalent links and DOIs reduce to one canonical form"""
+        self.assertEqual(
+            fingerprints.url_fingerprints('See https://WWW.Example.org/paper/42/?utm_source=mail&b=2&a=1#top.'),
+            {'example.org/paper/42?a=1&b=2'}
+        )
+        self.assertEqual(
+            fingerprints.url_fingerprints('http://example.org:80/paper/42?a=1&b=2&fbclid=x'),
+            {'example.org/paper/42?a=1&b=2'}
+        )
+        self.assertEqual(
+            fingerprints.url_fingerprints('https://doi.org/10.1109/TPAMI.2020.1234 and DOI 10.1109/tpami.2020.1234.'),
+            {'doi:10.1109/tpami.2020.1234'}
+        )
+    
+    def test_similar_titles_share_a_band(self):
+        """Test near-identical titles share LSH bands and unrelated ones do not"""
+        title = fingerprints.normalize_title('Deep Learning for Medical Image Segmentation: A Survey')
+        similar = fingerprints.normalize_title('Deep learning for medical image segmentation - a survey.')
+        variant = fingerprints.normalize_title('Deep Learning for Medical Image Segmentation Survey (2nd ed.)')
+        other = fingerprints.normalize_title('Compiler optimizations for embedded microcontrollers')
+        keys = set(fingerprints.band_keys(title))
+        self.assertEqual(set(fingerprints.band_keys(similar)), keys)
+        self.assertTrue(keys & set(fingerprints.band_keys(variant)))
+        self.assertFalse(keys & set(fingerprints.band_keys(other)))
+    
+    def test_fingerprint_submission(self):
+        """Test which values and attachments produce fingerprints"""
+        rows = fingerprints.fingerprint_submission(
+            [('url', 'https://example.org/x'), ('text', 'Short'), ('number', '12345678901234567890123'),
+             ('text', 'Federated learning on edge devices')],
+            [('ab' * 32, 'paper.pdf')]
+        )
+        kinds = [kind for kind, _, _ in rows]
+        self.assertEqual(kinds.count('url'), 1)
+        self.assertEqual(kinds.count('title'), fingerprints.LSH_BANDS)
+        self.assertEqual(kinds.count('file'), 1)
+
+
+class DuplicateIndexServiceTest(TestCase):
+    """Test duplicate evidence lookups"""
+    
+    def setUp(self):
+        from apps.forms_builder.models import DynamicFormTemplate, DynamicField
+        
+        self.cse = Department.objects.create(code='CSE', name='Computer Science')
+        self.ece = Department.objects.create(code='ECE', name='Electronics')
+        self.faculty = User.objects.create_user(
+            email='faculty@test.com', password='test123', full_name='Faculty',
+            role=UserRole.FACULTY, department=self.cse
+        )
+        self.colleague = User.objects.create_user(
+            email='colleague@test.com', password='test123', full_name='Colleague',
+            role=UserRole.FACULTY, department=self.ece
+        )
+        self.hod = User.objects.create_user(
+            email='hod@test.com', password='test123', full_name='HoD',
+            role=UserRole.HOD, department=self.cse
+        )
+        self.admin = User.objects.create_superuser(email='admin@test.com', password='admin123', full_name='Admin')
+        main_param = MainParameter.objects.create(name='Research', role_owner=UserRole.FACULTY)
+        self.sub_param = SubParameter.objects.create(main_parameter=main_param, name='Papers', max_points=50)
+        template = DynamicFormTemplate.objects.create(sub_parameter=self.sub_param)
+        DynamicField.objects.create(template=template, name='title', label='Title', field_type='text', order=0)
+        DynamicField.objects.create(template=template, name='link', label='Link', field_type='url', order=1)
+    
+    def submit(self, title, link, month, user=None):
+        submission = Submission.objects.create(
+            user=user or self.faculty, sub_parameter=self.sub_param, month=month, year=2025
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            SubmissionService.save_submission_data(submission, {'title': title, 'link': link})
+        return submission
+    
+    def test_flags_repeated_evidence(self):
+        """Test a repeated link and a reworded title are flagged, unrelated work is not"""
+        original = self.submit('Graph neural networks for traffic forecasting', 'https://arxiv.org/abs/2101.00001', 1)
+        same_link = self.submit('Traffic forecasting', 'http://www.arxiv.org/abs/2101.00001/', 2)
+        similar_title = self.submit('Graph Neural Networks for Traffic Forecasting.', 'https://example.org/a', 3)
+        self.submit('Compiler optimizations for embedded microcontrollers', 'https://example.org/b', 4)
+        
+        duplicates = DuplicateIndexService.find_duplicates(original, self.hod)
+        self.assertEqual(
+            {duplicate['submission'] for duplicate in duplicates}, {same_link, similar_title}
+        )
+        kinds = {duplicate['submission']: [match['kind'] for match in duplicate['matches']] for duplicate in duplicates}
+        self.assertEqual(kinds, {same_link: ['url'], similar_title: ['title']})
+        self.assertGreaterEqual(duplicates[0]['matches'][0]['similarity'], DuplicateIndexService.TITLE_SIMILARITY)
+        
+        self.client.force_login(self.hod)
+        response = self.client.get(reverse('reviews:review_detail', args=[original.pk]))
+        self.assertContains(response, 'Possible Duplicates')
+        self.assertContains(response, 'Same link: arxiv.org/abs/2101.00001')
+    
+    def test_edits_and_visibility(self):
+        """Test fingerprints follow edits and lookups respect department visibility"""
+        original = self.submit('Quantum sensing with nitrogen vacancy centers', 'https://example.org/q', 1)
+        other = self.submit('Quantum sensing with nitrogen vacancy centers', 'https://example.org/q', 1, self.colleague)
+        self.assertEqual(DuplicateIndexService.find_duplicates(original, self.hod), [])
+        self.assertEqual(len(DuplicateIndexService.find_duplicates(original, self.admin)), 1)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            SubmissionService.save_submission_data(other, {'title': 'Unrelated topic entirely here', 'link': ''})
+        self.assertEqual(DuplicateIndexService.find_duplicates(original, self.admin), [])
+    
+    def test_invisible_matches_do_not_use_up_the_limit(self):
+        """Test evidence shared by more than MAX_MATCHES hidden submissions still shows visible duplicates"""
+        original = self.submit('Short', 'https://example.org/shared-profile', 1)
+        visible = self.submit('Other', 'https://example.org/shared-profile', 2)
+        for month in range(3, 7):
+            self.submit('Hidden', 'https://example.org/shared-profile', month, self.colleague)
+        
+        with mock.patch.object(DuplicateIndexService, 'MAX_MATCHES', 3):
+            duplicates = DuplicateIndexService.find_duplicates(original, self.hod)
+        self.assertEqual([duplicate['submission'] for duplicate in duplicates], [visible])
+
+
+class FieldAnalyticsServiceTest(TestCase):
+    """Test dynamic field reports"""
+    
+    def setUp(self):
+        from apps.forms_builder.models import DynamicFormTemplate, DynamicField
+        
+        cache.clear()
+        self.cse = Department.objects.create(code='CSE', name='Computer Science')
+        self.ece = Department.objects.create(code='ECE', name='Electronics')
+        self.faculty = User.objects.create_user(
+            email='faculty@test.com', password='test123', full_name='Faculty',
+            role=UserRole.FACULTY, department=self.cse
+        )
+        self.colleague = User.objects.create_user(
+            email='colleague@test.com', password='test123', full_name='Colleague',
+            role=UserRole.FACULTY, department=self.ece
+        )
+        main_param = MainParameter.objects.create(name='Research', role_owner=UserRole.FACULTY)
+        self.sub_param = SubParameter.objects.create(main_parameter=main_param, name='Papers', max_points=50)
+        template = DynamicFormTemplate.objects.create(sub_parameter=self.sub_param)
+        self.amount = DynamicField.objects.create(
+            template=template, name='amount', label='Amount', field_type='number', order=0
+        )
+        self.held_on = DynamicField.objects.create(
+            template=template, name='held_on', label='Held On', field_type='date', order=1
+        )
+        self.category = DynamicField.objects.create(
+            template=template, name='category', label='Category', field_type='select', order=2,
+            choices=['National', 'International']
+        )
+        self.indexing = DynamicField.objects.create(
+            template=template, name='indexing', label='Indexed In', field_type='multiselect', order=3,
+            choices=[['scopus', 'Scopus'], ['wos', 'Web of Science']]
+        )
+    
+    def submit(self, user, month, data, status=SubmissionStatus.SUBMITTED):
+        submission = Submission.objects.create(
+            user=user, sub_parameter=self.sub_param, month=month, year=2025, status=status
+        )
+        SubmissionService.save_submission_data(submission, data)
+        return submission
+    
+    def test_number_report(self):
+        """Test summary, histogram and department breakdown of a number field"""
+        self.submit(self.faculty, 1, {'amount': '10'})
+        self.submit(self.faculty, 2, {'amount': '20'}, SubmissionStatus.HOD_APPROVED)
+        self.submit(self.colleague, 1, {'amount': '110'})
+        
+        report = FieldAnalyticsService.get_report(self.amount, year=2025)
+        self.assertEqual(report['summary']['count'], 3)
+        self.assertEqual(report['summary']['sum'], 140)
+        histogram = report['histogram']
+        self.assertEqual(len(histogram), FieldAnalyticsService.HISTOGRAM_BINS)
+        self.assertEqual((histogram[0]['start'], histogram[-1]['end']), (10, 110))
+        self.assertEqual([row['count'] for row in histogram], [1, 1, 0, 0, 0, 0, 0, 0, 0, 1])
+        self.assertEqual(
+            [(row['department'], row['count'], row['sum']) for row in report['by_department']],
+            [('Computer Science', 2, 30), ('Electronics', 1, 110)]
+        )
+        
+        scoped = FieldAnalyticsService.get_report(self.amount, year=2025, month=1, department=self.cse)
+        self.assertEqual(scoped['summary']['sum'], 10)
+        self.assertEqual(scoped['histogram'], [{'start': 10, 'end': 10, 'count': 1}])
+        approved = FieldAnalyticsService.get_report(self.amount, year=2025, approved_only=True)
+        self.assertEqual(approved['summary']['sum'], 20)
+    
+    def test_date_and_choice_reports(self):
+        """Test monthly date buckets and top select and multiselect choices"""
+        self.submit(self.faculty, 1, {
+            'held_on': '2025-01-10', 'category': 'National', 'indexing': ['scopus', 'wos'],
+        })
+        self.submit(self.faculty, 2, {'held_on': '2025-01-25', 'category': 'National', 'indexing': ['scopus']})
+        self.submit(self.colleague, 1, {'held_on': '2025-03-02', 'category': 'International', 'indexing': []})
+        
+        dates = FieldAnalyticsService.get_report(self.held_on, year=2025)['histogram']
+        self.assertEqual([(row['month'].month, row['count']) for row in dates], [(1, 2), (3, 1)])
+        categories = FieldAnalyticsService.get_report(self.category, year=2025)['top_choices']
+        self.assertEqual(
+            [(row['value'], row['count']) for row in categories], [('National', 2), ('International', 1)]
+        )
+        indexing = FieldAnalyticsService.get_report(self.indexing, year=2025)['top_choices']
+        self.assertEqual(
+            [(row['label'], row['count']) for row in indexing], [('Scopus', 2), ('Web of Science', 1)]
+        )
+    
+    def test_reports_are_cached_until_data_changes(self):
+        """Test a repeated report only checks the watermark and writes invalidate it"""
+        submission = self.submit(self.faculty, 1, {'amount': '10'})
+        first = FieldAnalyticsService.get_report(self.amount, year=2025, approved_only=True)
+        self.assertEqual(first['summary']['count'], 0)
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(FieldAnalyticsService.get_report(self.amount, year=2025, approved_only=True), first)
+        self.assertEqual(len(queries), 2)
+        
+        submission.status = SubmissionStatus.HOD_APPROVED
+        submission.save()
+        self.assertEqual(
+            FieldAnalyticsService.get_report(self.amount, year=2025, approved_only=True)['summary']['count'], 1
+        )
+        SubmissionService.save_submission_data(submission, {'amount': '15'})
+        self.assertEqual(
+            FieldAnalyticsService.get_report(self.amount, year=2025, approved_only=True)['summary']['sum'], 15
+        )
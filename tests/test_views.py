@@ -2,11 +2,17 @@
 """
 Functional tests for views
 """
-from django.test import TestCase, Client
+import pytest
+from django.conf import settings
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from apps.departments.models import Department
-from apps.common.constants import UserRole
+from apps.kpi.models import MainParameter, SubParameter
+from apps.submissions.models import Submission
+from apps.common.constants import UserRole, SubmissionStatus
 
 User = get_user_model()
 
@@ -49,6 +55,125 @@ class AuthViewsTest(TestCase):
         self.assertContains(response, 'Invalid')
 
 
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000, PASSWORD_SCRYPT_WORK_FACTOR=2 ** 10)
+class PasswordHashingTest(TestCase):
+    """Test tunable hashers, rehashing on login and bulk import hashing"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='hash@rtc.edu',
+            password='test123',
+            full_name='Hash User',
+            role=UserRole.FACULTY
+        )
+
+    def login(self):
+        return self.client.post(reverse('accounts:login'), {'email': 'hash@rtc.edu', 'password': 'test123'})
+
+    def stored_password(self):
+        return User.objects.values_list('password', flat=True).get(pk=self.user.pk)
+
+    def test_iterations_from_settings(self):
+        """New hashes use the configured cost"""
+        self.assertTrue(self.stored_password().startswith('pbkdf2_sha256$1000$'))
+
+    def test_cost_change_rehashes_on_login(self):
+        """Raising the cost upgrades the hash at the next login"""
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.login().status_code, 302)
+        self.assertTrue(self.stored_password().startswith('pbkdf2_sha256$2000$'))
+
+    def test_preferred_hasher_change_rehashes_on_login(self):
+        """Switching PASSWORD_HASHER upgrades existing hashes at login"""
+        hashers = [settings.PASSWORD_HASHER_CLASSES['scrypt'], settings.PASSWORD_HASHER_CLASSES['pbkdf2']]
+        with override_settings(PASSWORD_HASHERS=hashers):
+            self.assertEqual(self.login().status_code, 302)
+            self.assertTrue(self.stored_password().startswith('scrypt$1024$'))
+            self.client.logout()
+            self.assertEqual(self.login().status_code, 302)
+
+    def test_csv_import_prehashes_passwords(self):
+        """Imported users get hashed passwords, with a unique salt each"""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        admin = User.objects.create_superuser(email='admin@rtc.edu', password='admin123', full_name='Admin')
+        self.client.force_login(admin)
+        rows = 'email,full_name,role,employee_id,password\n' + ''.join(
+            f'user{i}@rtc.edu,User {i},FACULTY,E{i},secret{i}\n' for i in range(3)
+        ) + 'user9@rtc.edu,User 9,FACULTY,E9\n'
+        upload = SimpleUploadedFile('users.csv', rows.encode(), content_type='text/csv')
+        with override_settings(PASSWORD_HASH_WORKERS=2):
+            self.client.post(reverse('accounts:user_import_csv'), {'csv_file': upload})
+
+        imported = User.objects.filter(email__startswith='user').order_by('email')
+        self.assertEqual(imported.count(), 4)
+        self.assertTrue(imported.get(email='user1@rtc.edu').check_password('secret1'))
+        self.assertTrue(imported.get(email='user9@rtc.edu').check_password('rtc@123'))
+        self.assertEqual(len({user.password for user in imported}), 4)
+
+
+class UserListViewTest(TestCase):
+    """Test the paginated admin user list"""
+    
+    def setUp(self):
+        admin = User.objects.create_superuser(email='admin@rtc.edu', password='admin123', full_name='Admin')
+        for i in range(3):
+            User.objects.create_user(
+                email=f'user{i}@rtc.edu', password='test123', full_name=f'User {i}', employee_id=f'E{i}'
+            )
+        self.client.force_login(admin)
+    
+    def test_pages_follow_next_link(self):
+        """Test the next link keeps the search and walks every match once"""
+        from unittest import mock
+        from apps.accounts.services import UserSearchService
+        seen = []
+        url = '?search=user'
+        with mock.patch.object(UserSearchService, 'DEFAULT_PAGE_SIZE', 2):
+            while url:
+                response = self.client.get(reverse('accounts:user_list') + url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.context['user_counts'], {'total': 3, 'active': 3})
+                seen.extend(user.email for user in response.context['users'])
+                url = response.context['next_page_url']
+        self.assertEqual(seen, ['user0@rtc.edu', 'user1@rtc.edu', 'user2@rtc.edu'])
+        self.assertIsNotNone(response.context['first_page_url'])
+
+
+class SessionRefreshTest(TestCase):
+    """Test sessions are saved only when their expiry needs renewing"""
+    
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='test@rtc.edu', password='test123', full_name='Test User', role=UserRole.FACULTY
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('notifications:notification_list')
+    
+    def session_writes(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        writes = [q for q in captured.captured_queries if q['sql'].startswith('UPDATE "django_session"')]
+        return len(writes), response
+    
+    def test_recent_session_not_saved(self):
+        self.session_writes()
+        writes, response = self.session_writes()
+        self.assertEqual(writes, 0)
+        self.assertNotIn('sessionid', response.cookies)
+    
+    def test_session_near_expiry_refreshed(self):
+        self.session_writes()
+        session = self.client.session
+        session['_refreshed_at'] -= settings.SESSION_COOKIE_AGE - settings.SESSION_REFRESH_THRESHOLD + 1
+        session.save()
+        
+        writes, response = self.session_writes()
+        self.assertEqual(writes, 1)
+        self.assertEqual(response.cookies['sessionid']['max-age'], settings.SESSION_COOKIE_AGE)
+
+
 class DashboardViewsTest(TestCase):
     """Test dashboard views"""
     
@@ -78,3 +203,313 @@ class DashboardViewsTest(TestCase):
         self.client.login(email='faculty@rtc.edu', password='test123')
         response = self.client.get(reverse('dashboards:dashboard'))
         self.assertEqual(response.status_code, 200)
+
+    def test_trend_data_forbidden_for_faculty(self):
+        """Test that faculty cannot access the trends endpoint"""
+        self.client.login(email='faculty@rtc.edu', password='test123')
+        response = self.client.get(reverse('dashboards:trends'))
+        self.assertEqual(response.status_code, 403)
+    
+    def test_trend_data_admin(self):
+        """Test admin gets a monthly series per department"""
+        self.client.login(email='admin@rtc.edu', password='admin123')
+        response = self.client.get(reverse('dashboards:trends'), {'start': '2025-01', 'end': '2025-06'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['periods']), 6)
+        self.assertEqual(data['series'][0]['label'], 'Computer Science')
+    
+    def test_trend_data_rejects_bad_ids(self):
+        """Test non-numeric department and user ids are a bad request, not a server error"""
+        self.client.login(email='admin@rtc.edu', password='admin123')
+        response = self.client.get(reverse('dashboards:trends'), {'department': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('dashboards:trends'), {'scope': 'user', 'user': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('dashboards:trends'), {'scope': 'user', 'user': self.faculty.pk})
+        self.assertEqual(response.status_code, 200)
+
+
+class ChartApiTest(TestCase):
+    """Test dashboard chart JSON endpoints and ETag handling"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.dept = Department.objects.create(code='CSE', name='Computer Science')
+        self.faculty = User.objects.create_user(
+            email='faculty@rtc.edu',
+            password='test123',
+            full_name='Test Faculty',
+            role=UserRole.FACULTY,
+            department=self.dept
+        )
+        self.admin = User.objects.create_superuser(
+            email='admin@rtc.edu',
+            password='admin123',
+            full_name='Test Admin'
+        )
+        main_param = MainParameter.objects.create(name='Research', weightage=25, role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Journal Papers', max_points=50)
+        self.submission = Submission.objects.create(
+            user=self.faculty,
+            sub_parameter=sub_param,
+            month=1,
+            year=2025,
+            status=SubmissionStatus.HOD_APPROVED,
+            awarded_points=30
+        )
+        self.client.login(email='admin@rtc.edu', password='admin123')
+        self.params = {'month': 1, 'year': 2025}
+    
+    def test_department_comparison(self):
+        """Test department comparison payload"""
+        response = self.client.get(reverse('dashboards:chart_department_comparison'), self.params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_points'], [30.0])
+        self.assertTrue(response.has_header('ETag'))
+    
+    def test_unchanged_data_returns_304(self):
+        """Test that a matching ETag short-circuits before aggregation"""
+        url = reverse('dashboards:chart_leaderboard')
+        etag = self.client.get(url, self.params)['ETag']
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, self.params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Only the watermark ran, no leaderboard aggregation
+        self.assertFalse(any('SUM(' in query['sql'] for query in ctx.captured_queries))
+    
+    def test_etag_changes_with_data(self):
+        """Test that updating a submission invalidates the ETag"""
+        url = reverse('dashboards:chart_parameter_breakdown')
+        etag = self.client.get(url, self.params)['ETag']
+        
+        self.submission.awarded_points = 40
+        self.submission.save()
+        response = self.client.get(url, self.params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_points'], [40.0])
+    
+    def test_faculty_limited_to_own_status_counts(self):
+        """Test faculty can only read their own status counts"""
+        self.client.login(email='faculty@rtc.edu', password='test123')
+        response = self.client.get(reverse('dashboards:chart_status_counts'), self.params)
+        self.assertEqual(response.json()['counts']['APPROVED'], 1)
+        response = self.client.get(reverse('dashboards:chart_department_comparison'), self.params)
+        self.assertEqual(response.status_code, 403)
+
+
+class DetailViewQueryBudgetTest(TestCase):
+    """Test detail pages run a fixed number of queries regardless of row counts"""
+    
+    def setUp(self):
+        from apps.forms_builder.models import DynamicFormTemplate, DynamicField
+        from apps.submissions.models import SubmissionFieldValue
+        from apps.reviews.models import Review
+        
+        self.dept = Department.objects.create(code='CSE', name='Computer Science')
+        self.faculty = User.objects.create_user(
+            email='faculty@rtc.edu', password='test123', full_name='Faculty',
+            role=UserRole.FACULTY, department=self.dept
+        )
+        self.hod = User.objects.create_user(
+            email='hod@rtc.edu', password='test123', full_name='HoD',
+            role=UserRole.HOD, department=self.dept
+        )
+        main_param = MainParameter.objects.create(name='Research', role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Papers', max_points=50)
+        template = DynamicFormTemplate.objects.create(sub_parameter=sub_param)
+        self.submission = Submission.objects.create(
+            user=self.faculty, sub_parameter=sub_param, month=1, year=2025,
+            status=SubmissionStatus.SUBMITTED
+        )
+        for i in range(6):
+            field = DynamicField.objects.create(
+                template=template, name=f'field_{i}', label=f'Field {i}', field_type='text', order=i
+            )
+            SubmissionFieldValue.objects.create(submission=self.submission, field=field, value=f'Value {i}')
+        for i in range(4):
+            Review.objects.create(
+                submission=self.submission, reviewer=self.hod, action='NEEDS_REVISION',
+                previous_status=SubmissionStatus.SUBMITTED, new_status=SubmissionStatus.NEEDS_REVISION
+            )
+    
+    def assertQueriesWithinBudget(self, url_name, user):
+        from django.conf import settings
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name, args=[self.submission.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(ctx.captured_queries), settings.QUERY_BUDGETS[url_name])
+        self.assertIn('Server-Timing', response)
+    
+    def test_submission_detail(self):
+        self.assertQueriesWithinBudget('submissions:submission_detail', self.faculty)
+    
+    def test_review_detail(self):
+        self.assertQueriesWithinBudget('reviews:review_detail', self.hod)
+    
+    @pytest.mark.no_query_budget
+    def test_budget_violation_sends_signal(self):
+        from apps.common.signals import query_budget_exceeded
+        received = []
+        
+        def record(sender, view_name, budget, stats, **kwargs):
+            received.append((view_name, budget, stats['queries']))
+        
+        query_budget_exceeded.connect(record)
+        try:
+            self.client.force_login(self.faculty)
+            with override_settings(
+                QUERY_INSTRUMENTATION=True, QUERY_BUDGETS={'submissions:submission_detail': 2}
+            ):
+                self.client.get(reverse('submissions:submission_detail', args=[self.submission.pk]))
+        finally:
+            query_budget_exceeded.disconnect(record)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(received[0][:2], ('submissions:submission_detail', 2))
+        self.assertGreater(received[0][2], 2)
+
+
+class SubmissionSearchViewTest(TestCase):
+    """Test the submission search page"""
+    
+    def setUp(self):
+        from apps.forms_builder.models import DynamicFormTemplate, DynamicField
+        from apps.submissions.models import SubmissionFieldValue
+        from apps.submissions.search import SubmissionSearchService
+        
+        dept = Department.objects.create(code='CSE', name='Computer Science')
+        self.faculty = User.objects.create_user(
+            email='faculty@rtc.edu', password='test123', full_name='Faculty',
+            role=UserRole.FACULTY, department=dept
+        )
+        main_param = MainParameter.objects.create(name='Research', role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Papers', max_points=50)
+        template = DynamicFormTemplate.objects.create(sub_parameter=sub_param)
+        field = DynamicField.objects.create(template=template, name='title', label='Title', field_type='text')
+        self.submission = Submission.objects.create(user=self.faculty, sub_parameter=sub_param, month=1, year=2025)
+        SubmissionFieldValue.objects.create(submission=self.submission, field=field, value='Federated learning at scale')
+        SubmissionSearchService.index_submissions([self.submission.pk])
+    
+    def test_search_lists_highlighted_matches(self):
+        """Test the page lists matching submissions with highlighted text"""
+        self.client.force_login(self.faculty)
+        response = self.client.get(reverse('submissions:submission_search'), {'q': 'federated', 'page': 'x'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['submission'] for result in response.context['results']['results']], [self.submission])
+        self.assertContains(response, '<mark>Federated</mark>')
+
+
+
+class FieldReportViewTest(TestCase):
+    """Test the field report page"""
+    
+    def setUp(self):
+        from apps.forms_builder.models import DynamicFormTemplate, DynamicField
+        from apps.submissions.models import SubmissionFieldValue
+        
+        self.dept = Department.objects.create(code='CSE', name='Computer Science')
+        self.faculty = User.objects.create_user(
+            email='faculty@rtc.edu', password='test123', full_name='Faculty',
+            role=UserRole.FACULTY, department=self.dept
+        )
+        self.admin = User.objects.create_superuser(email='admin@rtc.edu', password='admin123', full_name='Admin')
+        main_param = MainParameter.objects.create(name='Research', role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Grants', max_points=50)
+        template = DynamicFormTemplate.objects.create(sub_parameter=sub_param)
+        self.field = DynamicField.objects.create(template=template, name='amount', label='Amount', field_type='number')
+        submission = Submission.objects.create(user=self.faculty, sub_parameter=sub_param, month=1, year=2025)
+        SubmissionFieldValue.objects.create(submission=submission, field=self.field, value='2500')
+    
+    def test_admin_sees_report(self):
+        """Test admins get the field's report for the chosen scope"""
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('dashboards:field_report'),
+            {'field': self.field.pk, 'year': 2025, 'department': self.dept.pk, 'month': 'x'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['report']['summary']['sum'], 2500)
+        self.assertEqual(response.context['histogram_max'], 1)
+        self.assertContains(response, 'Computer Science')
+    
+    def test_faculty_cannot_view(self):
+        """Test non-admins are turned away"""
+        self.client.force_login(self.faculty)
+        response = self.client.get(reverse('dashboards:field_report'), {'field': self.field.pk})
+        self.assertNotEqual(response.status_code, 200)
+
+
+class AttachmentUploadViewTest(TestCase):
+    """Test uploads are validated while they stream in"""
+    
+    def setUp(self):
+        import shutil
+        import tempfile
+        from apps.forms_builder.models import DynamicFormTemplate, DynamicField
+        
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MAX_UPLOAD_SIZE=1024)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        dept = Department.objects.create(code='CSE', name='Computer Science')
+        self.faculty = User.objects.create_user(
+            email='faculty@rtc.edu', password='test123', full_name='Faculty',
+            role=UserRole.FACULTY, department=dept
+        )
+        main_param = MainParameter.objects.create(name='Research', weightage=25, role_owner=UserRole.FACULTY)
+        sub_param = SubParameter.objects.create(main_parameter=main_param, name='Papers', max_points=50)
+        template = DynamicFormTemplate.objects.create(sub_parameter=sub_param)
+        DynamicField.objects.create(
+            template=template, name='evidence', label='Evidence', field_type='file', is_required=False, order=1
+        )
+        self.submission = Submission.objects.create(user=self.faculty, sub_parameter=sub_param, month=1, year=2025)
+        self.url = reverse('submissions:submission_edit', args=[self.submission.pk])
+    
+    def upload(self, name, content, client=None):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        client = client or self.client
+        client.force_login(self.faculty)
+        return client.post(self.url, {'evidence': SimpleUploadedFile(name, content)})
+    
+    def stored_files(self):
+        import os
+        return [name for _, _, names in os.walk(self.media_root) for name in names]
+    
+    def test_valid_upload_stored_as_blob(self):
+        """Test a valid file is moved from staging into blob storage"""
+        response = self.upload('paper.pdf', b'%PDF-1.4 evidence')
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        attachment = self.submission.attachments.get()
+        self.assertEqual(attachment.content_type, 'application/pdf')
+        self.assertEqual(attachment.file.read(), b'%PDF-1.4 evidence')
+        self.assertEqual(len(self.stored_files()), 1)
+    
+    def test_oversized_upload_rejected(self):
+        """Test a file over MAX_UPLOAD_SIZE is dropped mid-stream"""
+        response = self.upload('paper.pdf', b'%PDF-1.4 ' + b'x' * 200 * 1024)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'File size cannot exceed')
+        self.assertFalse(self.submission.attachments.exists())
+        self.assertEqual(self.stored_files(), [])
+    
+    def test_mismatched_contents_rejected(self):
+        """Test leading bytes must match the extension"""
+        response = self.upload('paper.pdf', b'\x89PNG\r\n\x1a\n not a pdf')
+        self.assertContains(response, 'do not match')
+        self.assertFalse(self.submission.attachments.exists())
+        self.assertEqual(self.stored_files(), [])
+    
+    def test_disallowed_extension_rejected(self):
+        """Test disallowed extensions are skipped before any data is written"""
+        self.upload('script.exe', b'MZ')
+        self.assertFalse(self.submission.attachments.exists())
+        self.assertEqual(self.stored_files(), [])
+    
+    def test_csrf_still_enforced(self):
+        """Test the upload wrapper still verifies the CSRF token"""
+        response = self.upload('paper.pdf', b'%PDF-1.4 evidence', client=Client(enforce_csrf_checks=True))
+        self.assertEqual(response.status_code, 403)